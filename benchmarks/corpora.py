@@ -0,0 +1,189 @@
+"""
+Synthetic inputs for the benchmarks, shaped like the site's real data.
+
+Every generator is deterministic for a given size and seed, so a benchmark
+run measures the code and not the corpus.
+"""
+
+import hashlib
+import random
+from pathlib import Path
+
+import yaml
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache/bench-corpora"
+
+WORDS = (
+    "causal inference experiment design estimate treatment effect variance sample "
+    "randomization policy outcome network platform bandit calibration heterogeneous"
+).split()
+VENUES = ["NeurIPS", "ICML", "AISTATS", "KDD", "Science", "Nature", "PNAS", "JASA", "Management Science"]
+ICONS = ["bi-file-earmark-pdf", "bi-github", "bi-database", "bi-info", "bi-box-seam", "ai-archive"]
+
+
+def cached(name, generate):
+    """Text from `generate()`, kept on disk between runs.
+
+    Some corpora take longer to generate than to benchmark (10k papers take
+    seconds to dump as YAML). The file name includes a hash of this module,
+    so changing a generator regenerates its corpora.
+    """
+    version = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+    path = CACHE_DIR / f"{version}-{name}"
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+    text = generate()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+    return text
+
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+# -- papers.yaml --------------------------------------------------------
+
+
+def papers(n, seed=0):
+    """`n` papers.yaml entries with the field mix of the real file."""
+    rng = random.Random(seed)
+    entries = {}
+    for i in range(n):
+        authors = [f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()}"
+                   for _ in range(rng.randint(1, 8))]
+        authors.insert(rng.randint(0, len(authors)), "me")
+        entry = {
+            "title": _sentence(rng, rng.randint(4, 12)).rstrip("."),
+            "authors": authors,
+            "year": rng.randint(2008, 2026),
+        }
+        if rng.random() < 0.6:
+            entry["preprint"] = f"https://arxiv.org/abs/{rng.randint(1000, 2600)}.{rng.randint(10000, 99999)}"
+        if rng.random() < 0.6:
+            entry["published_url"] = f"https://doi.org/10.{rng.randint(1000, 9999)}/{i}"
+        if rng.random() < 0.15:
+            entry["pdf_url"] = f"https://example.com/papers/{i}.pdf"
+        if rng.random() < 0.1:
+            entry["github"] = f"https://github.com/example/repo-{i}"
+        if rng.random() < 0.1:
+            entry["data"] = f"https://example.com/data/{i}"
+        entry["venue"] = rng.choice(VENUES)
+        entry["visible"] = rng.random() < 0.9
+        entry["ssid"] = f"{rng.getrandbits(160):040x}"
+        entries[f"paper_{i}"] = entry
+    return entries
+
+
+def papers_yaml(n, seed=0):
+    """papers.yaml text with `n` entries."""
+    return yaml.safe_dump(papers(n, seed), sort_keys=False, allow_unicode=True)
+
+
+def button_specs(n, seed=0):
+    """`n` (url, label, icon) button specs, including an icon with no SVG."""
+    rng = random.Random(seed)
+    icons = ICONS + ["ai-google-scholar"]
+    return [(f"https://example.com/{i}", rng.choice(["Preprint", "Github", "Data", "PDF", "Published"]),
+             rng.choice(icons)) for i in range(n)]
+
+
+# -- Substack exports ---------------------------------------------------
+
+
+def substack_post(sections, seed=0):
+    """Substack-style HTML with `sections` blocks of mixed content."""
+    rng = random.Random(seed)
+    body, notes = [], []
+    for i in range(1, sections + 1):
+        body.append(f"<h2>Section {i}</h2>")
+        body.append(
+            f"<p>{_sentence(rng)} <strong>{_sentence(rng, 3)}</strong> <a href=\"https://example.com/{i}\">"
+            f"{_sentence(rng, 4)}</a> <em>{_sentence(rng, 5)}</em>"
+            f"<a class=\"footnote-anchor\" id=\"footnote-anchor-{i}\" href=\"#footnote-{i}\">{i}</a></p>"
+        )
+        body.append("<ul>" + "".join(f"<li><p>{_sentence(rng, 6)}</p></li>" for _ in range(3)) + "</ul>")
+        body.append(f"<blockquote><p>{_sentence(rng)}</p><p>{_sentence(rng)}</p></blockquote>")
+        body.append(
+            "<div class=\"captioned-image-container\"><figure><img src=\"https://cdn.example.com/"
+            f"{i}.png\"><figcaption>{_sentence(rng, 4)}</figcaption></figure></div>"
+        )
+        body.append("<p class=\"button-wrapper\"><a href=\"https://example.com/subscribe\">Subscribe</a></p>")
+        notes.append(
+            f"<div class=\"footnote\"><a id=\"footnote-{i}\" href=\"#footnote-anchor-{i}\" "
+            f"class=\"footnote-number\">{i}</a><div class=\"footnote-content\"><p>{_sentence(rng, 8)}</p></div></div>"
+        )
+    return "\n".join(body + notes)
+
+
+def list_footnote_post(footnotes):
+    """Post whose footnotes each contain a list instead of a <p>.
+
+    The old regex converter's footnote pattern backtracks across the rest
+    of the document for every one of these.
+    """
+    body = [
+        f"<p>Paragraph {i} with a note<a class=\"footnote-anchor\" id=\"footnote-anchor-{i}\" "
+        f"href=\"#footnote-{i}\">{i}</a></p>"
+        for i in range(1, footnotes + 1)
+    ]
+    notes = [
+        f"<div class=\"footnote\"><a id=\"footnote-{i}\" href=\"#footnote-anchor-{i}\" "
+        f"class=\"footnote-number\">{i}</a><div class=\"footnote-content\"><ul><li>Point {i}</li>"
+        "<li>Another point</li></ul></div></div>"
+        for i in range(1, footnotes + 1)
+    ]
+    return "\n".join(body + notes)
+
+
+# -- rendered posts -----------------------------------------------------
+
+
+def rendered_post(sections, seed=0):
+    """A long post page as Quarto renders it: chrome around a <main> with
+    sections, code cells, figures, callouts, tables and footnotes."""
+    rng = random.Random(seed)
+    main = []
+    for i in range(1, sections + 1):
+        code = "\n".join(
+            f'<span id="cb{i}-{j}"><a href="#cb{i}-{j}" aria-hidden="true" tabindex="-1"></a>'
+            f'<span class="fu">estimate</span>(<span class="st">"{rng.choice(WORDS)}"</span>)</span>'
+            for j in range(1, 6)
+        )
+        main.append(
+            f'<section id="section-{i}" class="level2">\n'
+            f'<h2 class="anchored" data-anchor-id="section-{i}">{_sentence(rng, 4)}</h2>\n'
+            f'<p>{_sentence(rng)} <a href="../other-post/">{_sentence(rng, 3)}</a> <em>{_sentence(rng, 5)}</em> '
+            f'<code>{rng.choice(WORDS)}()</code><a href="#fn{i}" class="footnote-ref" id="fnref{i}" '
+            f'role="doc-noteref"><sup>{i}</sup></a></p>\n'
+            f'<div class="sourceCode cell-code" id="cb{i}"><pre class="sourceCode r code-with-copy">'
+            f'<code class="sourceCode r">{code}</code><button title="Copy to Clipboard" '
+            f'class="code-copy-button"><i class="bi"></i></button></pre></div>\n'
+            f'<div class="quarto-figure quarto-figure-center"><figure class="figure"><p>'
+            f'<picture><source srcset="figure-{i}-480.webp 480w, figure-{i}-960.webp 960w" type="image/webp">'
+            f'<img src="figure-{i}.png" class="img-fluid figure-img" loading="lazy" width="960" height="540">'
+            f'</picture></p><figcaption>{_sentence(rng, 6)}</figcaption></figure></div>\n'
+            f'<div class="callout callout-style-default callout-note"><div class="callout-body">'
+            f'<p>{_sentence(rng)}</p></div></div>\n'
+            '<table class="caption-top table"><thead><tr><th>Arm</th><th>Estimate</th></tr></thead><tbody>'
+            + "".join(f"<tr><td>{rng.choice(WORDS)}</td><td>{rng.random():.3f}</td></tr>" for _ in range(4))
+            + "</tbody></table>\n<!-- cell end -->\n</section>"
+        )
+    notes = "".join(
+        f'<li id="fn{i}"><p>{_sentence(rng, 8)}<a href="#fnref{i}" class="footnote-back" '
+        f'role="doc-backlink">↩︎</a></p></li>'
+        for i in range(1, sections + 1)
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>Synthetic post</title>'
+        '<link href="../../site_libs/bootstrap/bootstrap.min.css" rel="stylesheet">'
+        '<script src="../../site_libs/quarto-html/quarto.js"></script></head>\n<body>'
+        '<nav class="navbar"><a class="navbar-brand" href="../../index.html">Drew Dimmery</a></nav>\n'
+        '<main class="content" id="quarto-document-content">\n'
+        + "\n".join(main)
+        + f'\n<section id="footnotes" class="footnotes footnotes-end-of-document" role="doc-endnotes">'
+        f'<hr><ol>{notes}</ol></section>\n</main>\n'
+        '<footer class="footer"><div class="nav-footer">CC BY 4.0</div></footer></body></html>'
+    )
@@ -0,0 +1,126 @@
+"""
+The regex-cascade Substack converter that html_to_markdown replaced.
+
+Kept only so the benchmarks can show what the single-pass converter gained;
+nothing else uses it.
+"""
+
+import html
+import re
+
+
+def extract_footnotes(html_content):
+    """Extract footnotes and return them as a dictionary."""
+    footnotes = {}
+    
+    # Find all footnote divs
+    footnote_pattern = r'<div class="footnote"[^>]*>.*?<a[^>]*id="footnote-(\d+)"[^>]*>(\d+)</a>.*?<div class="footnote-content"><p>(.*?)</p></div>.*?</div>'
+    
+    for match in re.finditer(footnote_pattern, html_content, flags=re.DOTALL):
+        footnote_id = match.group(1)
+        footnote_num = match.group(2)
+        footnote_text = match.group(3)
+        
+        # Convert links in footnotes first
+        footnote_text = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'[\2](\1)', footnote_text, flags=re.DOTALL)
+        
+        # Clean remaining HTML from footnote text
+        footnote_text = re.sub(r'<[^>]+>', '', footnote_text)
+        footnote_text = html.unescape(footnote_text)
+        
+        footnotes[footnote_num] = footnote_text
+    
+    return footnotes
+
+def legacy_clean_html_content(html_content):
+    """The regex-cascade converter html_to_markdown replaced (for comparison)."""
+    # Extract footnotes first
+    footnotes = extract_footnotes(html_content)
+    
+    # Remove Substack-specific elements
+    html_content = re.sub(r'<p class="button-wrapper".*?</p>', '', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<div><hr></div>', '\n\n---\n\n', html_content)
+    
+    # Handle footnote anchors - convert to Quarto footnotes
+    def replace_footnote_anchor(match):
+        footnote_num = match.group(1)
+        if footnote_num in footnotes:
+            return f'^[{footnotes[footnote_num]}]'
+        else:
+            return f'^[Footnote {footnote_num}]'
+    
+    html_content = re.sub(r'<a class="footnote-anchor"[^>]*href="#footnote-(\d+)"[^>]*>(\d+)</a>', replace_footnote_anchor, html_content)
+    
+    # Remove footnote divs at the end
+    html_content = re.sub(r'<div class="footnote".*?</div>', '', html_content, flags=re.DOTALL)
+    
+    # Handle images (left as remote URLs; no downloading here)
+    def replace_image(match):
+        return f'\n\n![Image]({match.group(1)})\n\n'
+    
+    # Match Substack image containers
+    img_pattern = r'<div class="captioned-image-container">.*?<img[^>]*src="([^"]*)"[^>]*>.*?</div>'
+    html_content = re.sub(img_pattern, replace_image, html_content, flags=re.DOTALL)
+    
+    # Also handle simpler img tags
+    simple_img_pattern = r'<img[^>]*src="([^"]*)"[^>]*>'
+    html_content = re.sub(simple_img_pattern, replace_image, html_content, flags=re.DOTALL)
+    
+    # Convert headings
+    html_content = re.sub(r'<h1>(.*?)</h1>', r'# \1\n\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<h2>(.*?)</h2>', r'## \1\n\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<h3>(.*?)</h3>', r'### \1\n\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<h4>(.*?)</h4>', r'#### \1\n\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<h5>(.*?)</h5>', r'##### \1\n\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<h6>(.*?)</h6>', r'###### \1\n\n', html_content, flags=re.DOTALL)
+    
+    # Handle text formatting
+    html_content = re.sub(r'<strong>(.*?)</strong>', r'**\1**', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<em>(.*?)</em>', r'*\1*', html_content, flags=re.DOTALL)
+    
+    # Handle lists
+    html_content = re.sub(r'<ul>\s*', '\n', html_content)
+    html_content = re.sub(r'\s*</ul>', '\n\n', html_content)
+    html_content = re.sub(r'<li><p>(.*?)</p></li>', r'- \1\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<li>(.*?)</li>', r'- \1\n', html_content, flags=re.DOTALL)
+    
+    # Handle blockquotes - support multiple paragraphs
+    def replace_blockquote(match):
+        blockquote_content = match.group(1)
+        # Handle multiple paragraphs within blockquote
+        paragraphs = re.findall(r'<p>(.*?)</p>', blockquote_content, flags=re.DOTALL)
+        if paragraphs:
+            # Join paragraphs with blockquote formatting
+            formatted_paragraphs = []
+            for p in paragraphs:
+                # Clean up the paragraph content
+                p_clean = re.sub(r'<[^>]+>', '', p)
+                p_clean = html.unescape(p_clean).strip()
+                if p_clean:  # Only add non-empty paragraphs
+                    formatted_paragraphs.append(f'> {p_clean}')
+            return '\n>\n'.join(formatted_paragraphs) + '\n\n'
+        else:
+            # Fallback for blockquotes without p tags
+            content_clean = re.sub(r'<[^>]+>', '', blockquote_content)
+            content_clean = html.unescape(content_clean).strip()
+            return f'> {content_clean}\n\n'
+    
+    html_content = re.sub(r'<blockquote[^>]*>(.*?)</blockquote>', replace_blockquote, html_content, flags=re.DOTALL)
+    
+    # Handle links - convert to markdown format
+    html_content = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'[\2](\1)', html_content, flags=re.DOTALL)
+    
+    # Handle paragraphs - convert to markdown with proper spacing
+    html_content = re.sub(r'<p>(.*?)</p>', r'\1\n\n', html_content, flags=re.DOTALL)
+    
+    # Clean up remaining HTML tags
+    html_content = re.sub(r'<[^>]+>', '', html_content)
+    
+    # Decode HTML entities
+    html_content = html.unescape(html_content)
+    
+    # Clean up whitespace - multiple newlines to double newlines
+    html_content = re.sub(r'\n{3,}', '\n\n', html_content)
+    html_content = html_content.strip()
+
+    return html_content
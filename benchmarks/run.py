@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Benchmark the site's Python scripts on synthetic corpora.
+
+Each stage runs one function on an input from benchmarks/corpora.py:
+
+- `parse_papers` / `render_publications`: the two halves of the Research
+  page's publication list (publications.py) for a 10k-entry papers.yaml
+- `icon_button` / `render_buttons`: icon_utils buttons, one call per button
+  and the batched sprite-referencing version
+- `html_to_markdown` / `clean_html_content`: converting a large Substack
+  post, on its own and as convert_substack does it (images are "fetched"
+  by a fetcher that never touches the network)
+- `legacy_html_to_markdown`: the regex cascade html_to_markdown replaced,
+  on the same post, plus both converters on footnotes that hold lists,
+  the old converter's pathological case
+- `prepare_email_html`: turning a long rendered post into a Listmonk email
+
+Each stage runs in its own spawned process, so one stage's imports, caches
+and allocations can't skew the next; that's why this is a standalone
+script rather than part of the pytest suite. A stage's time is the best of
+at least `--repeat` runs (more for fast stages), timed with
+time.perf_counter with the garbage collector off, and its throughput is the
+input size over that time. Peak memory comes from one more run under tracemalloc (Python
+allocations only), since tracing slows everything down.
+
+Results are written to `.cache/bench.json` and compared with
+benchmarks/baseline.json. A stage is flagged when it is slower, or peaks
+higher, than its baseline by more than `--threshold`. Stages whose input
+size differs from the baseline's (e.g. with `--quick`) are not compared.
+`--save-baseline` records the current results as the new baseline.
+Baselines are only comparable on the same machine and Python version.
+
+    python benchmarks/run.py [STAGE ...] [--quick] [--repeat 5] [--threshold 0.25] [--save-baseline] [--fail-on-regression]
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[1:1] = [str(ROOT), str(ROOT / "scripts")]
+
+import yaml  # noqa: E402
+
+import corpora  # noqa: E402
+import icon_utils  # noqa: E402
+import publications  # noqa: E402
+from convert_substack import clean_html_content  # noqa: E402
+from html_to_markdown import html_to_markdown  # noqa: E402
+from legacy_html_to_markdown import legacy_clean_html_content  # noqa: E402
+from scripts.listmonk.prepare_email_html import prepare_email_html  # noqa: E402
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+RESULTS_FILE = ROOT / ".cache/bench.json"
+# Fast stages are repeated until their runs add up to MIN_STAGE_SECONDS,
+# so their best time isn't one lucky (or unlucky) run; slow ones stop early
+# once past MAX_STAGE_SECONDS
+MIN_STAGE_SECONDS = 1.0
+MAX_STAGE_SECONDS = 10.0
+# Differences smaller than this are timing noise
+MIN_REGRESSION_SECONDS = 0.005
+
+# Corpus sizes at full scale; --quick divides them by 10
+PAPERS = 10000
+BUTTONS = 20000
+SUBSTACK_SECTIONS = 1000
+LIST_FOOTNOTES = 200
+RENDERED_SECTIONS = 500
+
+
+class OfflineFetcher:
+    """Stands in for convert_substack.ImageFetcher: every image "downloads"."""
+
+    def fetch_all(self, jobs):
+        return {url: True for url, _ in jobs}
+
+
+# -- stages -------------------------------------------------------------
+#
+# Each returns (input size, unit, function to time).
+
+
+def parse_papers(scale):
+    n = round(PAPERS * scale)
+    text = corpora.cached(f"papers-{n}.yaml", lambda: corpora.papers_yaml(n))
+    return n, "entries", lambda: yaml.safe_load(text)
+
+
+def render_publications(scale):
+    n = round(PAPERS * scale)
+    papers = corpora.papers(n)
+    return n, "entries", lambda: publications.render_fragment(papers)
+
+
+def icon_button(scale):
+    specs = corpora.button_specs(round(BUTTONS * scale))
+    return len(specs), "buttons", lambda: [icon_utils.button(url, label, icon) for url, label, icon in specs]
+
+
+def render_buttons(scale):
+    specs = corpora.button_specs(round(BUTTONS * scale))
+    return len(specs), "buttons", lambda: icon_utils.render_buttons(specs)
+
+
+def _substack(scale):
+    n = round(SUBSTACK_SECTIONS * scale)
+    return corpora.cached(f"substack-{n}.html", lambda: corpora.substack_post(n))
+
+
+def html_to_markdown_stage(scale):
+    html = _substack(scale)
+    return len(html), "bytes", lambda: html_to_markdown(html)
+
+
+def clean_html_content_stage(scale):
+    html = _substack(scale)
+    fetcher = OfflineFetcher()
+    return len(html), "bytes", lambda: clean_html_content(html, "post", "post", fetcher=fetcher)
+
+
+def legacy_html_to_markdown(scale):
+    html = _substack(scale)
+    return len(html), "bytes", lambda: legacy_clean_html_content(html)
+
+
+def _list_footnotes(scale):
+    return corpora.list_footnote_post(round(LIST_FOOTNOTES * scale))
+
+
+def html_to_markdown_list_footnotes(scale):
+    html = _list_footnotes(scale)
+    return len(html), "bytes", lambda: html_to_markdown(html)
+
+
+def legacy_html_to_markdown_list_footnotes(scale):
+    html = _list_footnotes(scale)
+    return len(html), "bytes", lambda: legacy_clean_html_content(html)
+
+
+def prepare_email_html_stage(scale):
+    n = round(RENDERED_SECTIONS * scale)
+    html = corpora.cached(f"rendered-{n}.html", lambda: corpora.rendered_post(n))
+    return len(html), "bytes", lambda: prepare_email_html(html, "Synthetic post", "https://ddimmery.com/posts/x/")
+
+
+STAGES = {
+    "parse_papers": parse_papers,
+    "render_publications": render_publications,
+    "icon_button": icon_button,
+    "render_buttons": render_buttons,
+    "html_to_markdown": html_to_markdown_stage,
+    "clean_html_content": clean_html_content_stage,
+    "legacy_html_to_markdown": legacy_html_to_markdown,
+    "html_to_markdown_list_footnotes": html_to_markdown_list_footnotes,
+    "legacy_html_to_markdown_list_footnotes": legacy_html_to_markdown_list_footnotes,
+    "prepare_email_html": prepare_email_html_stage,
+}
+
+
+# -- measuring ----------------------------------------------------------
+
+
+def best_time(func, repeat):
+    """(best seconds, runs) over `repeat` or more runs of `func`."""
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        while (len(times) < repeat or sum(times) < MIN_STAGE_SECONDS) and sum(times) < MAX_STAGE_SECONDS:
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(times), len(times)
+
+
+def peak_memory(func):
+    """Peak bytes Python allocated during one run of `func`."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_stage(name, scale, repeat, memory=True):
+    size, unit, func = STAGES[name](scale)
+    seconds, runs = best_time(func, repeat)
+    return {
+        "size": size,
+        "unit": unit,
+        "seconds": round(seconds, 6),
+        "throughput": round(size / seconds, 1),
+        "runs": runs,
+        "peak_bytes": peak_memory(func) if memory else None,
+    }
+
+
+# -- report -------------------------------------------------------------
+
+
+def _throughput(result):
+    if result["unit"] == "bytes":
+        return f"{result['throughput'] / 2**20:.2f} MiB/s"
+    return f"{result['throughput']:,.0f} {result['unit']}/s"
+
+
+def _size(result):
+    if result["unit"] == "bytes":
+        return f"{result['size'] / 1024:,.0f} KiB"
+    return f"{result['size']:,} {result['unit']}"
+
+
+def compare(baseline, results, threshold):
+    """{stage: note} for stages that differ from the baseline."""
+    notes = {}
+    for name, result in results.items():
+        old = baseline.get("stages", {}).get(name)
+        if old is None:
+            notes[name] = "new"
+            continue
+        if old["size"] != result["size"]:
+            notes[name] = "size differs"
+            continue
+        problems = []
+        slower = result["seconds"] - old["seconds"]
+        if slower > MIN_REGRESSION_SECONDS and slower > threshold * old["seconds"]:
+            problems.append(f"time +{slower / old['seconds']:.0%}")
+        if old.get("peak_bytes") and result["peak_bytes"] is not None \
+                and result["peak_bytes"] > (1 + threshold) * old["peak_bytes"]:
+            problems.append(f"memory +{result['peak_bytes'] / old['peak_bytes'] - 1:.0%}")
+        if problems:
+            notes[name] = "REGRESSION: " + ", ".join(problems)
+        elif result["seconds"] < old["seconds"] / (1 + threshold):
+            notes[name] = f"faster ({old['seconds'] / result['seconds']:.1f}x)"
+    return notes
+
+
+def print_report(results, baseline, notes):
+    print(f"{'stage':<40} {'input':>16} {'best':>10} {'throughput':>20} {'peak':>10} "
+          f"{'baseline':>10}  note")
+    for name, result in results.items():
+        old = baseline.get("stages", {}).get(name) if baseline else None
+        peak = "" if result["peak_bytes"] is None else f"{result['peak_bytes'] / 2**20:.1f} MiB"
+        before = f"{old['seconds'] * 1000:.1f}ms" if old else ""
+        print(f"{name:<40} {_size(result):>16} {result['seconds'] * 1000:>8.1f}ms {_throughput(result):>20} "
+              f"{peak:>10} {before:>10}  {notes.get(name, '')}")
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site's scripts on synthetic corpora.")
+    parser.add_argument("stages", nargs="*", metavar="STAGE", help=f"stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument("--quick", action="store_true", help="corpora a tenth of the full size")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (the best is kept)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change that counts as a regression")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="baseline to compare against")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE, help="where to write the results")
+    parser.add_argument("--save-baseline", action="store_true", help="record these results as the baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit non-zero if anything regressed")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    scale = 0.1 if args.quick else 1.0
+    results = {}
+    for name in args.stages or STAGES:
+        # A fresh interpreter per stage, so one stage's heap can't slow the next
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results[name] = pool.submit(run_stage, name, scale, args.repeat, args.memory).result()
+
+    report = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "environment": environment(), "stages": results}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = load_json(args.baseline)
+    notes = compare(baseline, results, args.threshold) if baseline else {}
+    if baseline and baseline.get("environment") != report["environment"]:
+        print(f"Note: the baseline was recorded on {baseline.get('environment')}, not {report['environment']}")
+    print_report(results, baseline, notes)
+
+    if args.save_baseline:
+        # Stages not run this time keep their old baseline
+        stages = {**(baseline or {}).get("stages", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**report, "stages": stages}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+    if args.fail_on_regression and any(note.startswith("REGRESSION") for note in notes.values()):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,15 @@
 Utility module for inline SVG icons.
 Provides Bootstrap Icons and Academicons as inline SVG to eliminate the need for
 bootstrap-icons.css and academicons.css
+
+Pages with many buttons should use `render_buttons()` together with
+`icon_sprite()`: each icon's path data is then emitted once, as an SVG
+<symbol>, and every button references it with <use href>.
 """
 
+import re
+from functools import lru_cache
+
 # All icons are sized to 16x16 for consistency in buttons
 # Bootstrap Icons use viewBox="0 0 16 16"
 BOOTSTRAP_ICONS = {
@@ -41,6 +48,72 @@ def get_icon_svg(icon_name):
     return ALL_ICONS.get(icon_name)
 
 
+_SVG_RE = re.compile(r'<svg\b[^>]*\bviewBox="([^"]+)"[^>]*>(.*)</svg>', re.DOTALL)
+
+_BUTTON_OPEN = '<a class="btn btn-outline-dark btn-sm", href="{url}" target="_blank" rel="noopener noreferrer">'
+
+
+@lru_cache(maxsize=None)
+def _icon_parts(icon_name):
+    """(viewBox, inner markup) of a mapped icon, or None."""
+    icon_svg = get_icon_svg(icon_name)
+    if not icon_svg:
+        return None
+    match = _SVG_RE.search(icon_svg)
+    return match.groups() if match else None
+
+
+def icon_symbol_id(icon_name):
+    return f"icon-{icon_name}"
+
+
+def icon_sprite(icon_names):
+    """
+    Hidden SVG sprite defining a <symbol> for each distinct mapped icon.
+
+    Args:
+        icon_names: Icon class names; duplicates and unmapped icons are ignored
+
+    Returns:
+        HTML string to include once per page, before any referencing button
+    """
+    symbols = []
+    for icon_name in dict.fromkeys(icon_names):
+        parts = _icon_parts(icon_name)
+        if parts:
+            view_box, inner = parts
+            symbols.append(f'<symbol id="{icon_symbol_id(icon_name)}" viewBox="{view_box}">{inner}</symbol>')
+    if not symbols:
+        return ""
+    return ('<svg xmlns="http://www.w3.org/2000/svg" style="display: none" aria-hidden="true">'
+            + "".join(symbols) + "</svg>")
+
+
+@lru_cache(maxsize=None)
+def _icon_markup(icon, label):
+    """Icon part of a sprite-referencing button; built once per (icon, label)."""
+    if _icon_parts(icon):
+        return ('<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" '
+                f'aria-hidden="true"><use href="#{icon_symbol_id(icon)}"/></svg>')
+    return f"<i class=\"{icon[:2]} {icon}\" role='img' aria-label='{label}'></i>"
+
+
+def render_buttons(specs):
+    """
+    Render many buttons in one pass, referencing icons from `icon_sprite()`.
+
+    Args:
+        specs: Iterable of (url, label, icon) tuples
+
+    Returns:
+        List of HTML strings, one per button, in input order
+    """
+    return [
+        f"{_BUTTON_OPEN.format(url=url)}{_icon_markup(icon, label)} {label}</a>"
+        for url, label, icon in specs
+    ]
+
+
 def button(url, str, icon):
     """
     Create a button with an icon. Uses inline SVG when available,
@@ -0,0 +1,159 @@
+"""
+Render the publication list for the Research page from papers.yaml.
+
+The output is a Markdown fragment (headings per year, raw HTML lists) that
+research.qmd includes as-is. Rendering is memoized on a hash of papers.yaml
+and of the rendering code, both in-process and on disk, so unchanged data is
+never re-rendered.
+
+Can be run without a Jupyter kernel:
+
+    python publications.py [papers.yaml] [-o fragment.md]
+"""
+
+import argparse
+import hashlib
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+import icon_utils
+from icon_utils import icon_sprite, render_buttons
+
+YAML_FILE = "papers.yaml"
+CACHE_DIR = Path(".cache/publications")
+
+SECTIONS = {
+    "pubs": ("Published", "published"),
+    "wps": ("Working Papers / Non-archival", "not-published"),
+}
+
+
+def readable_list(_s):
+    if len(_s) < 3:
+        return ' and '.join(map(str, _s))
+    *a, b = _s
+    return f"{', '.join(map(str, a))}, and {b}"
+
+
+def button_specs(data):
+    """(url, label, icon) tuples for a paper's buttons, in display order."""
+    specs = []
+    if data.get("preprint"):
+        specs.append((data["preprint"], "Preprint", "bi-file-earmark-pdf"))
+    if data.get("github"):
+        specs.append((data["github"], "Github", "bi-github"))
+    if data.get("data"):
+        specs.append((data["data"], "Data", "bi-database"))
+    if data.get("pdf_url"):
+        specs.append((data["pdf_url"], "PDF", "bi-file-earmark-pdf"))
+    if data.get("published_url"):
+        specs.append((data["published_url"], "Published", "ai-archive"))
+    return specs
+
+
+def citation(data):
+    """Author list, year, title and venue as an HTML string."""
+    authors = data.get("authors", ["me"])
+    authors = [aut if aut != "me" else "<strong>Drew Dimmery</strong>" for aut in authors]
+    pub_str = f'{readable_list(authors)}. ({data["year"]}) "{data["title"]}."'
+    if data.get("venue"):
+        pub_str += f" <em>{data['venue']}</em>"
+    return pub_str
+
+
+def group_publications(papers):
+    """Visible papers as {section: {year: [list item HTML]}} plus icons used."""
+    pub_strs = {section: {} for section in SECTIONS}
+    used_icons = set()
+    for data in papers.values():
+        # Only show visible papers
+        if not data.get("visible", False):
+            continue
+        section = "wps" if data.get("published_url") is None else "pubs"
+        specs = button_specs(data)
+        used_icons.update(icon for _, _, icon in specs)
+        pub_strs[section].setdefault(str(data["year"]), []).append(
+            "<li class='list-group-item'>" + citation(data) + "<br>"
+            + " ".join(render_buttons(specs)) + "</li>"
+        )
+    return pub_strs, used_icons
+
+
+def raw_html(html):
+    return "```{=html}\n" + html + "\n```"
+
+
+def render_fragment(papers):
+    """Markdown fragment for the whole publication list."""
+    pub_strs, used_icons = group_publications(papers)
+    # Icon path data is emitted once here; buttons reference it with <use href>
+    blocks = [raw_html(icon_sprite(sorted(used_icons)))]
+    for section, (heading, anchor) in SECTIONS.items():
+        blocks.append(f"## {heading}")
+        for year in sorted(pub_strs[section].keys(), reverse=True):
+            blocks.append(f"### {year}" + "{#" + f"{anchor}-{year}" + "}")
+            blocks.append(raw_html(
+                "<ul class='list-group list-group-flush'>" + "\n".join(pub_strs[section][year]) + "</ul>"
+            ))
+    return "\n\n".join(blocks) + "\n"
+
+
+def content_hash(data):
+    """Hash of the papers data and of the code that renders it."""
+    digest = hashlib.sha256(data)
+    for module in (__file__, icon_utils.__file__):
+        digest.update(Path(module).read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=8)
+def _render_cached(digest, data):
+    cache_file = CACHE_DIR / f"{digest}.md"
+    if cache_file.exists():
+        return cache_file.read_text(encoding="utf-8")
+    fragment = render_fragment(yaml.safe_load(data) or {})
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(fragment, encoding="utf-8")
+    return fragment
+
+
+def render_publications(path=YAML_FILE):
+    """Publication list fragment for `path`, memoized on its content hash."""
+    data = Path(path).read_bytes()
+    return _render_cached(content_hash(data), data)
+
+
+def write_if_changed(path, text):
+    """Write `text` to `path` unless it already holds exactly that.
+
+    Leaving unchanged files untouched keeps their mtime, so downstream
+    freshness checks only fire when the data changed.
+    """
+    path = Path(path)
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the publication list from papers.yaml.")
+    parser.add_argument("papers", nargs="?", default=YAML_FILE, help="papers YAML file")
+    parser.add_argument("-o", "--output", help="write the fragment here instead of stdout")
+    args = parser.parse_args(argv)
+
+    fragment = render_publications(args.papers)
+    if args.output:
+        changed = write_if_changed(args.output, fragment)
+        print(f"{args.output}: {'updated' if changed else 'unchanged'}", file=sys.stderr)
+    else:
+        sys.stdout.write(fragment)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
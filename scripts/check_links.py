@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Check the external links in papers.yaml, software.yaml and the posts.
+
+Every http(s) URL is collected with the places it appears: the paper or
+package field it came from, or the post and line (code blocks are skipped).
+The links are then checked concurrently:
+
+- An asyncio task per URL holds a slot of the global limit
+  (`--concurrency`) and one of its host's (`--per-host`), so no single
+  server gets more than a few requests at a time. The HTTP requests
+  themselves go through a pooled `requests` session in worker threads.
+- Each link gets a HEAD request first. Servers that reject or mishandle
+  HEAD (`HEAD_FALLBACK_STATUSES`) get a streamed GET whose body is never
+  read.
+- 401/403/429 and LinkedIn's 999 usually mean bot protection rather than a
+  dead link, so those are reported as "blocked" but don't fail the run.
+
+Results are cached in `.cache/links.json`. Working links are rechecked
+after about a week and broken or blocked ones after about a day, with the
+expiry spread out so a daily run only rechecks a slice of the links.
+`--refresh` ignores the cache.
+
+`--stub` checks against a local stub server instead of the network: every
+URL is requested from it and answered with 200, or with the status given
+for that URL in an optional JSON file of `{url: status}` or
+`{url: {"HEAD": status, "GET": status}}`. Stub runs use their own cache
+file.
+
+    python scripts/check_links.py [--refresh] [--concurrency N] [--per-host N] [--stub [FILE]]
+
+Exits non-zero if any link is broken.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ROOT = Path(__file__).resolve().parent.parent
+PAPERS_FILE = ROOT / "papers.yaml"
+SOFTWARE_FILE = ROOT / "software.yaml"
+POSTS_DIR = ROOT / "posts"
+CACHE_FILE = ROOT / ".cache/links.json"
+STUB_CACHE_FILE = ROOT / ".cache/links-stub.json"
+CACHE_VERSION = 1
+
+CONCURRENCY = 32
+PER_HOST = 4
+TIMEOUT = (5, 20)  # connect, read (seconds)
+OK_TTL = 7 * 24 * 60 * 60  # seconds
+BROKEN_TTL = 24 * 60 * 60  # seconds; failures are often transient
+STUB_LATENCY = 0.05  # seconds per stub response, so stub runs exercise the concurrency
+USER_AGENT = "Mozilla/5.0 (compatible; ddimmery.com link checker)"
+
+# Answers to HEAD that a GET may not share
+HEAD_FALLBACK_STATUSES = {400, 403, 404, 405, 406, 429, 500, 501, 503}
+# Bot protection, not link rot
+BLOCKED_STATUSES = {401, 403, 429, 999}
+SKIP_HOSTS = {"localhost", "127.0.0.1", "example.com", "www.example.com"}
+
+_URL_RE = re.compile(r"https?://[^\s<>\"'`\[\]{}|\\^]+")
+_FENCE_RE = re.compile(r"^(```+|~~~+).*?^\1", re.MULTILINE | re.DOTALL)
+_INLINE_CODE_RE = re.compile(r"`[^`\n]+`")
+
+
+# -- collecting ---------------------------------------------------------
+
+
+def clean_url(url):
+    """Cut a URL found in prose at the end of the link.
+
+    A `)` with no `(` before it closes the surrounding Markdown link, and
+    trailing punctuation ends the sentence, not the URL.
+    """
+    depth = 0
+    for i, ch in enumerate(url):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            if depth == 0:
+                url = url[:i]
+                break
+            depth -= 1
+    return url.rstrip(".,;:!?*")
+
+
+def collect_links(papers_file=PAPERS_FILE, software_file=SOFTWARE_FILE, posts_dir=POSTS_DIR):
+    """Map each external URL to the sorted places it appears."""
+    links = defaultdict(set)
+
+    def add(url, source):
+        # Links to different anchors of a page are one link to check
+        url = urllib.parse.urldefrag(clean_url(url.strip())).url
+        host = urllib.parse.urlsplit(url).hostname
+        if host and host not in SKIP_HOSTS:
+            links[url].add(source)
+
+    with open(papers_file, "r", encoding="utf-8") as f:
+        papers = yaml.safe_load(f) or {}
+    for key, paper in papers.items():
+        for field, value in (paper or {}).items():
+            if isinstance(value, str) and value.startswith(("http://", "https://")):
+                add(value, f"{Path(papers_file).name}: {key}.{field}")
+
+    with open(software_file, "r", encoding="utf-8") as f:
+        software = yaml.safe_load(f) or []
+    for package in software:
+        for field, value in package.items():
+            if isinstance(value, str) and value.startswith(("http://", "https://")):
+                add(value, f"{Path(software_file).name}: {package.get('title')}.{field}")
+
+    for path in sorted(Path(posts_dir).glob("*/index.qmd")):
+        text = path.read_text(encoding="utf-8")
+        # Blank out code, keeping the line count so line numbers still match
+        text = _FENCE_RE.sub(lambda m: "\n" * m.group(0).count("\n"), text)
+        text = _INLINE_CODE_RE.sub("", text)
+        source = path.relative_to(Path(posts_dir).parent).as_posix()
+        for lineno, line in enumerate(text.splitlines(), 1):
+            for match in _URL_RE.finditer(line):
+                add(match.group(0), f"{source}:{lineno}")
+
+    return {url: sorted(sources) for url, sources in sorted(links.items())}
+
+
+# -- checking -----------------------------------------------------------
+
+
+def outcome(entry):
+    """Whether a checked link is "ok", "blocked" or "broken"."""
+    status = entry.get("status")
+    if status is not None and status < 400:
+        return "ok"
+    if status in BLOCKED_STATUSES:
+        return "blocked"
+    return "broken"
+
+
+class LinkChecker:
+    """Checks URLs concurrently, through the result cache."""
+
+    def __init__(self, cache_file=CACHE_FILE, concurrency=CONCURRENCY, per_host=PER_HOST,
+                 timeout=TIMEOUT, rewrite=None):
+        self.cache_file = Path(cache_file)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        # Maps a URL to the address actually requested (see StubServer)
+        self.rewrite = rewrite or (lambda url: url)
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 504],
+                      allowed_methods=["HEAD", "GET"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=per_host, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.cache = self._load_cache()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return cache.get("links", {}) if cache.get("version") == CACHE_VERSION else {}
+
+    def _save_cache(self, urls):
+        # Only links still on the site are kept
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "links": {url: self.cache[url] for url in urls if url in self.cache}},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp, self.cache_file)
+
+    def fetch(self, url):
+        """Check one URL (blocking); returns its cache entry."""
+        target = self.rewrite(url)
+        entry = {"status": None, "error": None, "method": "HEAD"}
+        try:
+            response = self.session.head(target, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in HEAD_FALLBACK_STATUSES:
+                entry["method"] = "GET"
+                with self.session.get(target, allow_redirects=True, timeout=self.timeout, stream=True) as response:
+                    pass
+            entry["status"] = response.status_code
+        except requests.RequestException as e:
+            entry["error"] = type(e).__name__
+        now = time.time()
+        ttl = OK_TTL if outcome(entry) == "ok" else BROKEN_TTL
+        entry["checked_at"] = round(now)
+        entry["expires_at"] = round(now + ttl * random.uniform(0.75, 1.0))
+        return entry
+
+    async def _check_all(self, urls):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        overall = asyncio.Semaphore(self.concurrency)
+        per_host = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+        async def check(url):
+            # Host slot first, so a busy host's queue doesn't hold global slots
+            async with per_host[urllib.parse.urlsplit(url).hostname]:
+                async with overall:
+                    self.cache[url] = await asyncio.to_thread(self.fetch, url)
+
+        await asyncio.gather(*(check(url) for url in urls))
+
+    def check(self, urls, refresh=False):
+        """Results for `urls`, checking only those without a fresh cache entry.
+
+        Returns (results, number of URLs checked).
+        """
+        now = time.time()
+        stale = [url for url in urls if refresh or self.cache.get(url, {}).get("expires_at", 0) <= now]
+        try:
+            if stale:
+                asyncio.run(self._check_all(stale))
+        finally:
+            self._save_cache(urls)
+        return {url: self.cache[url] for url in urls}, len(stale)
+
+
+# -- stub server --------------------------------------------------------
+
+
+class StubServer:
+    """Local HTTP server standing in for every linked site.
+
+    `https://host/path?q` is requested as `<base>/https/host/path?q`. The
+    answer is 200 unless `responses` maps the original URL to another
+    status, or to `{"HEAD": status, "GET": status}`.
+    """
+
+    def __init__(self, responses=None, latency=STUB_LATENCY):
+        responses = responses or {}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                scheme, _, rest = self.path.lstrip("/").partition("/")
+                status = responses.get(f"{scheme}://{rest}", 200)
+                if isinstance(status, dict):
+                    status = status.get(self.command, 200)
+                time.sleep(latency)
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_HEAD = do_GET = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def rewrite(self, url):
+        parts = urllib.parse.urlsplit(url)
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{self.base_url}/{parts.scheme}/{parts.netloc}{parts.path or '/'}{query}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# -- report -------------------------------------------------------------
+
+
+def report_markdown(results, links):
+    """Markdown table of the links that aren't ok, for $GITHUB_STEP_SUMMARY."""
+    rows = [(outcome(entry), url) for url, entry in results.items() if outcome(entry) != "ok"]
+    if not rows:
+        return "## Links\n\nAll links work.\n"
+    lines = ["## Links", "", "| | Status | URL | Found in |", "|---|---|---|---|"]
+    for kind, url in sorted(rows):
+        entry = results[url]
+        lines.append(f"| {kind} | {entry['status'] or entry['error']} | {url} | {'<br>'.join(links[url])} |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the external links in papers, software and posts.")
+    parser.add_argument("--refresh", action="store_true", help="recheck every link, ignoring the cache")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="requests in flight overall")
+    parser.add_argument("--per-host", type=int, default=PER_HOST, help="requests in flight per host")
+    parser.add_argument("--cache", type=Path, help=f"result cache (default: {CACHE_FILE.relative_to(ROOT)})")
+    parser.add_argument("--stub", nargs="?", const="", metavar="FILE",
+                        help="check against a local stub server, with optional JSON of {url: status}")
+    parser.add_argument("--stub-latency", type=float, default=STUB_LATENCY, help="seconds per stub response")
+    args = parser.parse_args(argv)
+
+    links = collect_links()
+    start = time.perf_counter()
+    if args.stub is None:
+        checker = LinkChecker(args.cache or CACHE_FILE, args.concurrency, args.per_host)
+        results, checked = checker.check(list(links), refresh=args.refresh)
+    else:
+        responses = {}
+        if args.stub:
+            with open(args.stub, "r", encoding="utf-8") as f:
+                responses = json.load(f)
+        with StubServer(responses, args.stub_latency) as stub:
+            checker = LinkChecker(args.cache or STUB_CACHE_FILE, args.concurrency, args.per_host,
+                                  rewrite=stub.rewrite)
+            results, checked = checker.check(list(links), refresh=args.refresh)
+    elapsed = time.perf_counter() - start
+
+    counts = defaultdict(int)
+    for entry in results.values():
+        counts[outcome(entry)] += 1
+    print(f"Checked {checked} of {len(links)} link(s) in {elapsed:.1f}s ({len(links) - checked} cached): "
+          f"{counts['ok']} ok, {counts['blocked']} blocked, {counts['broken']} broken")
+    for kind, heading in (("broken", "Broken"), ("blocked", "Blocked (likely bot protection; check by hand)")):
+        urls = [url for url, entry in results.items() if outcome(entry) == kind]
+        if urls:
+            print(f"\n{heading}:")
+            for url in urls:
+                entry = results[url]
+                print(f"  {entry['status'] or entry['error']}  {url}")
+                for source in links[url]:
+                    print(f"      {source}")
+
+    if os.environ.get("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a", encoding="utf-8") as f:
+            f.write(report_markdown(results, links))
+    return 1 if counts["broken"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
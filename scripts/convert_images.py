@@ -1,132 +1,303 @@
 #!/usr/bin/env python3
 """
 Convert all main images to PNG format and standardize sizes.
+
+Conversion uses Pillow and runs across a process pool, one post per task.
+Source hashes and output dimensions are recorded in `.image-manifest.json`,
+so images that haven't changed since the last run are skipped without being
+decoded.
+
+Each main image also gets a set of responsive variants (several widths, in
+WebP and optionally AVIF). Their srcset strings are stored in the manifest,
+where `scripts/responsive_images.py` picks them up after rendering.
 """
 
+import argparse
+import hashlib
+import json
 import os
-import subprocess
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from PIL import Image, ImageOps, features
+
+from frontmatter import PostIndex
+
+POSTS_DIR = Path("posts")
+MANIFEST_FILE = Path(".image-manifest.json")
+TARGET_NAME = "main-image.png"
+TARGET_WIDTH = 1200
+
+# Listing thumbnails, mid-size cards and the full-width social image
+VARIANT_WIDTHS = (400, 800, 1200)
+VARIANT_FORMATS = {
+    "webp": {"mime": "image/webp", "save": {"format": "WEBP", "quality": 80, "method": 6}},
+    "avif": {"mime": "image/avif", "save": {"format": "AVIF", "quality": 60}},
+}
+
+IMAGE_RE = re.compile(r"^image:\s*(.+)$", re.MULTILINE)
 
-def convert_image_to_png(input_path, output_path, target_width=1200):
-    """Convert an image to PNG format and resize to consistent width."""
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's bytes (the image is never decoded)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """Load the image manifest; empty dict if missing or unreadable."""
     try:
-        # Using macOS sips command
-        # First convert to PNG
-        cmd = [
-            "sips",
-            "-s",
-            "format",
-            "png",
-            "-Z",
-            str(target_width),  # Resize to target width maintaining aspect ratio
-            str(input_path),
-            "--out",
-            str(output_path),
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print(f"Converted {input_path} -> {output_path}")
-            return True
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def convert_image_to_png(input_path, output_path, target_width=TARGET_WIDTH):
+    """Convert an image to PNG, resizing its longest side to `target_width`.
+
+    Returns the (width, height) of the written image. The output is written to
+    a temporary file first, so converting a file onto itself is safe.
+    """
+    with Image.open(input_path) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or "A" in im.getbands() else "RGB")
+        # Same semantics as `sips -Z`: scale so the longest side is target_width
+        scale = target_width / max(im.size)
+        if scale != 1:
+            size = (round(im.width * scale), round(im.height * scale))
+            im = im.resize(size, Image.LANCZOS)
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+        im.save(tmp_path, format="PNG", optimize=True)
+        os.replace(tmp_path, output_path)
+        return im.size
+
+
+def variant_name(width, fmt):
+    return f"{Path(TARGET_NAME).stem}-{width}.{fmt}"
+
+
+def write_variants(target_image, formats):
+    """Write resized copies of the main image in each of `formats`.
+
+    Widths larger than the main image are skipped rather than upscaled.
+    Returns manifest records for the written files plus srcset strings keyed
+    by MIME type.
+    """
+    variants = []
+    srcset = {}
+    with Image.open(target_image) as im:
+        im.load()
+        widths = [w for w in VARIANT_WIDTHS if w <= im.width] or [im.width]
+        for fmt in formats:
+            spec = VARIANT_FORMATS[fmt]
+            candidates = []
+            for width in widths:
+                height = round(im.height * width / im.width)
+                resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+                name = variant_name(width, fmt)
+                resized.save(target_image.with_name(name), **spec["save"])
+                variants.append({"file": name, "format": fmt, "width": width, "height": height})
+                candidates.append(f"{name} {width}w")
+            srcset[spec["mime"]] = ", ".join(candidates)
+    return variants, srcset
+
+
+def available_formats(avif=False):
+    """Variant formats to emit; AVIF only if requested and supported."""
+    formats = ["webp"]
+    if avif:
+        if features.check("avif"):
+            formats.append("avif")
         else:
-            print(f"Failed to convert {input_path}: {result.stderr}")
-            return False
+            print("  AVIF is not supported by this Pillow build, emitting WebP only")
+    return formats
 
-    except Exception as e:
-        print(f"Error converting {input_path}: {e}")
+
+def find_source_image(post_dir, image_ref):
+    """Use the referenced file, or search for common names."""
+    referenced_path = post_dir / image_ref
+    if referenced_path.exists():
+        return referenced_path
+    for ext in [".jpeg", ".jpg", ".png", ".webp"]:
+        for name in ["main-image", "image_1"]:
+            candidate = post_dir / f"{name}{ext}"
+            if candidate.exists():
+                return candidate
+    return None
+
+
+def file_state(path):
+    """Size, mtime and hash of a file, as recorded in the manifest."""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+
+
+def matches_state(path, state):
+    """Check a file against its recorded state.
+
+    A matching size and mtime is trusted as-is; otherwise the bytes are
+    hashed and compared with the recorded hash.
+    """
+    if not state or not path.exists():
         return False
+    stat = path.stat()
+    if stat.st_size == state.get("size") and stat.st_mtime_ns == state.get("mtime_ns"):
+        return True
+    return file_sha256(path) == state.get("sha256")
 
 
-def get_image_width(image_path):
-    """Get the pixel width of an image using sips."""
-    try:
-        result = subprocess.run(
-            ["sips", "-g", "pixelWidth", str(image_path)],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            for line in result.stdout.splitlines():
-                if "pixelWidth" in line:
-                    return int(line.split(":")[1].strip())
-    except Exception:
-        pass
-    return None
+def is_up_to_date(entry, source_image, target_image):
+    """Check a post's manifest entry against the files on disk."""
+    if not entry or not matches_state(target_image, entry.get("target")):
+        return False
+    # Once converted, the post references main-image.png itself
+    if source_image == target_image:
+        return True
+    return source_image.name == entry.get("source") and matches_state(
+        source_image, entry.get("source_state")
+    )
 
 
-def main():
-    import re
+def variants_up_to_date(entry, post_dir, formats):
+    """Variants are current if they were cut from the current main image."""
+    if not entry or entry.get("variants_of") != (entry.get("target") or {}).get("sha256"):
+        return False
+    variants = entry.get("variants") or []
+    if {v["format"] for v in variants} != set(formats):
+        return False
+    return all((post_dir / v["file"]).exists() for v in variants)
+
+
+def process_post(post_dir, source_image, entry, formats, target_width=TARGET_WIDTH):
+    """Convert one post's image and cut its variants. Runs in a worker process.
 
-    posts_dir = Path("posts")
-    target_width = 1200
+    `entry` is the post's existing manifest entry when the main image is
+    already current and only the variants need regenerating, otherwise None.
+    """
+    target_image = post_dir / TARGET_NAME
+    if entry is None:
+        source_state = file_state(source_image)
+        width, height = convert_image_to_png(source_image, target_image, target_width)
+        entry = {
+            "source": source_image.name,
+            "source_state": source_state,
+            "target": file_state(target_image),
+            "width": width,
+            "height": height,
+        }
+    variants, srcset = write_variants(target_image, formats)
+    return {**entry, "variants": variants, "srcset": srcset, "variants_of": entry["target"]["sha256"]}
 
-    for post_dir in sorted(posts_dir.iterdir()):
-        if not post_dir.is_dir():
+
+def collect_posts(posts_dir=POSTS_DIR):
+    """Yield (post_dir, index_file, source_image) for posts with an image."""
+    index = PostIndex(posts_dir)
+    for slug in index.posts:
+        image_ref = index.image(slug)
+        if not image_ref:
             continue
 
-        index_file = post_dir / "index.qmd"
-        if not index_file.exists():
+        post_dir = posts_dir / slug
+        source_image = find_source_image(post_dir, image_ref)
+        if not source_image:
+            print(f"  {slug}: no image file found, skipping")
             continue
 
-        with open(index_file, "r", encoding="utf-8") as f:
-            content = f.read()
+        yield post_dir, post_dir / "index.qmd", source_image
 
-        image_match = re.search(r"^image:\s*(.+)$", content, re.MULTILINE)
-        if not image_match:
-            continue
 
-        image_ref = image_match.group(1).strip()
+def update_image_reference(index_file):
+    """Point the post's `image:` front matter at main-image.png."""
+    with open(index_file, "r", encoding="utf-8") as f:
+        content = f.read()
+    # The header comes first, so the first match is the front-matter key
+    updated_content = IMAGE_RE.sub(f"image: {TARGET_NAME}", content, count=1)
+    if updated_content != content:
+        with open(index_file, "w", encoding="utf-8") as f:
+            f.write(updated_content)
+        print(f"    Updated {index_file}")
 
-        # Find the source image: use the referenced file, or search for common names
-        source_image = None
-        referenced_path = post_dir / image_ref
-        if referenced_path.exists():
-            source_image = referenced_path
-        else:
-            for ext in [".jpeg", ".jpg", ".png", ".webp"]:
-                for name in ["main-image", "image_1"]:
-                    candidate = post_dir / f"{name}{ext}"
-                    if candidate.exists():
-                        source_image = candidate
-                        break
-                if source_image:
-                    break
 
-        if not source_image:
-            print(f"  {post_dir.name}: no image file found, skipping")
-            continue
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="reconvert every image")
+    parser.add_argument("--avif", action="store_true", help="also emit AVIF variants")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
 
-        target_image = post_dir / "main-image.png"
+    formats = available_formats(args.avif)
 
-        # Check if already standardized (correct format, name, and width)
-        current_width = get_image_width(source_image)
-        already_standard = (
-            source_image == target_image
-            and source_image.suffix == ".png"
-            and current_width == target_width
-        )
+    manifest = load_manifest()
+    pending = {}
 
-        if already_standard:
-            print(
-                f"  {post_dir.name}: already standardized ({current_width}px), skipping"
-            )
+    for post_dir, index_file, source_image in collect_posts():
+        target_image = post_dir / TARGET_NAME
+        entry = manifest.get(post_dir.name)
+        if not args.force and is_up_to_date(entry, source_image, target_image):
+            if variants_up_to_date(entry, post_dir, formats):
+                print(f"  {post_dir.name}: unchanged ({entry['width']}px), skipping")
+            else:
+                pending[post_dir.name] = (post_dir, index_file, source_image, entry)
             continue
+        if not (args.force or entry) and source_image == target_image:
+            # Adopt images standardized before the manifest existed; opening
+            # only reads the header, not the pixel data
+            with Image.open(target_image) as im:
+                size = im.size
+            if max(size) == TARGET_WIDTH:
+                manifest[post_dir.name] = {
+                    "source": TARGET_NAME,
+                    "source_state": None,
+                    "target": file_state(target_image),
+                    "width": size[0],
+                    "height": size[1],
+                }
+                print(f"  {post_dir.name}: already standardized ({size[0]}px), recorded")
+                pending[post_dir.name] = (post_dir, index_file, source_image, manifest[post_dir.name])
+                continue
+        pending[post_dir.name] = (post_dir, index_file, source_image, None)
+
+    if not pending:
+        save_manifest(manifest)
+        return 0
 
-        print(
-            f"  {post_dir.name}: {source_image.name} ({current_width}px) -> main-image.png ({target_width}px)"
-        )
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(process_post, post_dir, source_image, entry, formats): slug
+            for slug, (post_dir, _, source_image, entry) in pending.items()
+        }
+        for future in as_completed(futures):
+            slug = futures[future]
+            post_dir, index_file, source_image, old_entry = pending[slug]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"  {slug}: failed to convert {source_image.name}: {e}")
+                failed += 1
+                continue
+            if old_entry is None:
+                print(f"  {slug}: {source_image.name} -> {TARGET_NAME} ({entry['width']}x{entry['height']})")
+                update_image_reference(index_file)
+            print(f"    {len(entry['variants'])} variants ({', '.join(formats)})")
+            manifest[slug] = entry
 
-        if convert_image_to_png(source_image, target_image, target_width):
-            # Update the index.qmd to reference main-image.png
-            updated_content = re.sub(
-                r"^image:\s*.+$", "image: main-image.png", content, flags=re.MULTILINE
-            )
-            if updated_content != content:
-                with open(index_file, "w", encoding="utf-8") as f:
-                    f.write(updated_content)
-                print(f"    Updated {index_file}")
+    save_manifest(manifest)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
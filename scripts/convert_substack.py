@@ -1,227 +1,471 @@
 #!/usr/bin/env python3
 """
 Convert Substack exported posts to Quarto markdown format.
+
+posts.csv is streamed and posts are converted across a thread pool. Images
+are fetched concurrently through a shared, pooled HTTP session with timeouts
+and retries; interrupted downloads resume from their partial file, and every
+image lands in a content-addressed cache, so re-imports never fetch the same
+URL twice.
+
+Re-imports are incremental. `posts/.substack-import.json` records, for each
+post_id, a hash of its source (HTML, metadata and converter code), the slug
+it was written to and a hash of the generated index.qmd. Unchanged posts are
+skipped without being converted, posts whose index.qmd was edited locally are
+left alone unless `--force` is given, and a slug already taken by a
+different post gets a numeric suffix instead of overwriting it.
 """
+import argparse
 import csv
+import hashlib
+import inspect
+import json
 import os
 import re
-import urllib.request
+import shutil
+import threading
 import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-import html
 
-def download_image(url, post_dir, img_counter):
-    """Download an image and return the local path."""
-    try:
-        # Get file extension from URL or default to .jpg
-        parsed_url = urllib.parse.urlparse(url)
-        ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
-        
-        filename = f"image_{img_counter}{ext}"
-        filepath = os.path.join(post_dir, filename)
-        
-        urllib.request.urlretrieve(url, filepath)
-            
-        return filename
-    except Exception as e:
-        print(f"Failed to download image {url}: {e}")
-        return url  # Fallback to original URL
-
-def extract_footnotes(html_content):
-    """Extract footnotes and return them as a dictionary."""
-    footnotes = {}
-    
-    # Find all footnote divs
-    footnote_pattern = r'<div class="footnote"[^>]*>.*?<a[^>]*id="footnote-(\d+)"[^>]*>(\d+)</a>.*?<div class="footnote-content"><p>(.*?)</p></div>.*?</div>'
-    
-    for match in re.finditer(footnote_pattern, html_content, flags=re.DOTALL):
-        footnote_id = match.group(1)
-        footnote_num = match.group(2)
-        footnote_text = match.group(3)
-        
-        # Convert links in footnotes first
-        footnote_text = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'[\2](\1)', footnote_text, flags=re.DOTALL)
-        
-        # Clean remaining HTML from footnote text
-        footnote_text = re.sub(r'<[^>]+>', '', footnote_text)
-        footnote_text = html.unescape(footnote_text)
-        
-        footnotes[footnote_num] = footnote_text
-    
-    return footnotes
-
-def clean_html_content(html_content, post_dir, post_slug):
-    """Clean HTML content and convert to Quarto-friendly markdown."""
-    # Extract footnotes first
-    footnotes = extract_footnotes(html_content)
-    
-    # Remove Substack-specific elements
-    html_content = re.sub(r'<p class="button-wrapper".*?</p>', '', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<div><hr></div>', '\n\n---\n\n', html_content)
-    
-    # Handle footnote anchors - convert to Quarto footnotes
-    def replace_footnote_anchor(match):
-        footnote_num = match.group(1)
-        if footnote_num in footnotes:
-            return f'^[{footnotes[footnote_num]}]'
-        else:
-            return f'^[Footnote {footnote_num}]'
-    
-    html_content = re.sub(r'<a class="footnote-anchor"[^>]*href="#footnote-(\d+)"[^>]*>(\d+)</a>', replace_footnote_anchor, html_content)
-    
-    # Remove footnote divs at the end
-    html_content = re.sub(r'<div class="footnote".*?</div>', '', html_content, flags=re.DOTALL)
-    
-    # Handle images - download them and convert to local references
-    img_counter = 1
-    def replace_image(match):
-        nonlocal img_counter
-        url = match.group(1)
-        
-        if url.startswith('http'):
-            local_path = download_image(url, post_dir, img_counter)
-            img_counter += 1
-            return f'\n\n![Image]({local_path})\n\n'
-        else:
-            return f'\n\n![Image]({url})\n\n'
-    
-    # Match Substack image containers
-    img_pattern = r'<div class="captioned-image-container">.*?<img[^>]*src="([^"]*)"[^>]*>.*?</div>'
-    html_content = re.sub(img_pattern, replace_image, html_content, flags=re.DOTALL)
-    
-    # Also handle simpler img tags
-    simple_img_pattern = r'<img[^>]*src="([^"]*)"[^>]*>'
-    html_content = re.sub(simple_img_pattern, replace_image, html_content, flags=re.DOTALL)
-    
-    # Convert headings
-    html_content = re.sub(r'<h1>(.*?)</h1>', r'# \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h2>(.*?)</h2>', r'## \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h3>(.*?)</h3>', r'### \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h4>(.*?)</h4>', r'#### \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h5>(.*?)</h5>', r'##### \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h6>(.*?)</h6>', r'###### \1\n\n', html_content, flags=re.DOTALL)
-    
-    # Handle text formatting
-    html_content = re.sub(r'<strong>(.*?)</strong>', r'**\1**', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<em>(.*?)</em>', r'*\1*', html_content, flags=re.DOTALL)
-    
-    # Handle lists
-    html_content = re.sub(r'<ul>\s*', '\n', html_content)
-    html_content = re.sub(r'\s*</ul>', '\n\n', html_content)
-    html_content = re.sub(r'<li><p>(.*?)</p></li>', r'- \1\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<li>(.*?)</li>', r'- \1\n', html_content, flags=re.DOTALL)
-    
-    # Handle blockquotes - support multiple paragraphs
-    def replace_blockquote(match):
-        blockquote_content = match.group(1)
-        # Handle multiple paragraphs within blockquote
-        paragraphs = re.findall(r'<p>(.*?)</p>', blockquote_content, flags=re.DOTALL)
-        if paragraphs:
-            # Join paragraphs with blockquote formatting
-            formatted_paragraphs = []
-            for p in paragraphs:
-                # Clean up the paragraph content
-                p_clean = re.sub(r'<[^>]+>', '', p)
-                p_clean = html.unescape(p_clean).strip()
-                if p_clean:  # Only add non-empty paragraphs
-                    formatted_paragraphs.append(f'> {p_clean}')
-            return '\n>\n'.join(formatted_paragraphs) + '\n\n'
-        else:
-            # Fallback for blockquotes without p tags
-            content_clean = re.sub(r'<[^>]+>', '', blockquote_content)
-            content_clean = html.unescape(content_clean).strip()
-            return f'> {content_clean}\n\n'
-    
-    html_content = re.sub(r'<blockquote[^>]*>(.*?)</blockquote>', replace_blockquote, html_content, flags=re.DOTALL)
-    
-    # Handle links - convert to markdown format
-    html_content = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'[\2](\1)', html_content, flags=re.DOTALL)
-    
-    # Handle paragraphs - convert to markdown with proper spacing
-    html_content = re.sub(r'<p>(.*?)</p>', r'\1\n\n', html_content, flags=re.DOTALL)
-    
-    # Clean up remaining HTML tags
-    html_content = re.sub(r'<[^>]+>', '', html_content)
-    
-    # Decode HTML entities
-    html_content = html.unescape(html_content)
-    
-    # Clean up whitespace - multiple newlines to double newlines
-    html_content = re.sub(r'\n{3,}', '\n\n', html_content)
-    html_content = html_content.strip()
-    
-    return html_content
-
-def process_posts():
-    """Process all published Substack posts and convert to QMD format."""
-    posts_csv_path = 'substack-export/posts.csv'
-    posts_dir = 'substack-export/posts'
-    output_dir = 'posts'
-    
-    # Read the posts CSV
-    with open(posts_csv_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        for row in reader:
-            # Skip unpublished posts
-            if row['is_published'] != 'true':
-                continue
-                
-            post_id = row['post_id']
-            title = row['title'].strip() if row['title'] else 'Untitled'
-            subtitle = row['subtitle'].strip() if row['subtitle'] else ''
-            
-            # Parse date
-            if row['post_date']:
-                date_obj = datetime.fromisoformat(row['post_date'].replace('Z', '+00:00'))
-                date_str = date_obj.strftime('%Y-%m-%d')
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import html_to_markdown as html_to_markdown_module
+from html_to_markdown import html_to_markdown
+
+IMAGE_CACHE_DIR = 'substack-export/.image-cache'
+MANIFEST_FILE = 'posts/.substack-import.json'
+WORKERS = 8
+TIMEOUT = (5, 30)  # connect, read (seconds)
+
+
+class ImageFetcher:
+    """Concurrent image downloader backed by a content-addressed cache.
+
+    Blobs are stored as `<cache>/blobs/<sha256><ext>` and `index.json` maps
+    each URL to its blob. Downloads go to `<cache>/partial/` first and resume
+    with a Range request if interrupted. The ETag or Last-Modified of the
+    response that started a partial file is kept next to it and sent as
+    If-Range, so an image that changed in between is downloaded again in
+    full rather than spliced onto the old bytes. A partial file without a
+    validator is discarded.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, workers=WORKERS, timeout=TIMEOUT):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / 'blobs'
+        self.partial_dir = self.cache_dir / 'partial'
+        self.index_file = self.cache_dir / 'index.json'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        # Shared by every post, so concurrency is bounded across the import
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def partial_path(self, url):
+        """Where an interrupted download of `url` is kept."""
+        return self.partial_dir / (hashlib.sha256(url.encode()).hexdigest() + '.part')
+
+    @staticmethod
+    def _validator(response):
+        """ETag or Last-Modified usable in If-Range (weak ETags aren't), or None."""
+        etag = response.headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return response.headers.get('Last-Modified')
+
+    def _download(self, url, ext):
+        """Download `url` into the blob store and return the blob path."""
+        partial = self.partial_path(url)
+        validator_file = partial.with_name(partial.name + '.validator')
+        validator = validator_file.read_text(encoding='utf-8') if validator_file.exists() else None
+        offset = partial.stat().st_size if partial.exists() else 0
+        headers = {}
+        if offset and validator:
+            headers = {'Range': f'bytes={offset}-', 'If-Range': validator}
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and headers:  # partial file already complete
+                pass
             else:
-                date_str = '2023-01-01'  # fallback date
-            
-            # Read HTML content
-            html_file = os.path.join(posts_dir, f'{post_id}.html')
-            if not os.path.exists(html_file):
-                print(f"HTML file not found: {html_file}")
-                continue
-                
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            # Create slug from title
-            slug = re.sub(r'[^a-zA-Z0-9\s-]', '', title.lower())
-            slug = re.sub(r'\s+', '-', slug).strip('-')
-            if not slug:
-                slug = f'post-{post_id.split(".")[0]}'
-            
-            # Create post directory
-            post_dir = os.path.join(output_dir, slug)
-            os.makedirs(post_dir, exist_ok=True)
-            
-            # Convert HTML to markdown
-            markdown_content = clean_html_content(html_content, post_dir, slug)
-            
-            # Generate QMD content
-            qmd_content = f"""---
+                response.raise_for_status()
+                # Anything but a 206 is the whole image: the server ignored
+                # the Range header, or the image changed since the partial
+                # file was started
+                if response.status_code == 206:
+                    mode = 'ab'
+                else:
+                    mode = 'wb'
+                    validator = self._validator(response)
+                    if validator:
+                        validator_file.write_text(validator, encoding='utf-8')
+                    else:
+                        validator_file.unlink(missing_ok=True)
+                with open(partial, mode) as f:
+                    for chunk in response.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+
+        digest = hashlib.sha256()
+        with open(partial, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        blob = self.blob_dir / (digest.hexdigest() + ext)
+        os.replace(partial, blob)
+        validator_file.unlink(missing_ok=True)
+        return blob
+
+    def fetch(self, url, dest):
+        """Copy the image at `url` to `dest`, downloading it only if uncached."""
+        ext = os.path.splitext(dest)[1]
+        with self._url_lock(url):
+            blob_name = self.index.get(url)
+            blob = self.blob_dir / blob_name if blob_name else None
+            if blob is None or not blob.exists():
+                blob = self._download(url, ext)
+                with self._lock:
+                    self.index[url] = blob.name
+        shutil.copyfile(blob, dest)
+
+    def fetch_all(self, jobs):
+        """Fetch (url, dest) pairs concurrently; returns {url: succeeded}."""
+        results = {}
+
+        def run(job):
+            url, dest = job
+            try:
+                self.fetch(url, dest)
+                return url, True
+            except Exception as e:
+                print(f"Failed to download image {url}: {e}")
+                return url, False
+
+        for url, ok in self._pool.map(run, jobs):
+            results[url] = ok
+        return results
+
+    def close(self):
+        """Wait for outstanding downloads and persist the URL index."""
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            tmp = self.index_file.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.index_file)
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents, or None if it doesn't exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def converter_hash():
+    """Hash of the conversion code, so converter changes re-import every post.
+
+    Only the code that shapes index.qmd counts; changes to fetching,
+    scheduling or the manifest don't re-import anything.
+    """
+    digest = hashlib.sha256()
+    for code in (html_to_markdown_module, image_filename, clean_html_content, convert_post):
+        digest.update(inspect.getsource(code).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def source_hash(row, html_content, code_hash):
+    """Hash of everything a post's index.qmd is generated from."""
+    digest = hashlib.sha256(code_hash.encode())
+    for field in ('title', 'subtitle', 'post_date'):
+        digest.update(b'\0' + (row.get(field) or '').encode('utf-8'))
+    digest.update(b'\0' + html_content.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def slugify(title, post_id):
+    """URL slug for a post title, falling back to the post id."""
+    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', title.lower())
+    slug = re.sub(r'\s+', '-', slug).strip('-')
+    return slug or f'post-{post_id.split(".")[0]}'
+
+
+def post_title(row):
+    return row['title'].strip() if row['title'] else 'Untitled'
+
+
+class ImportManifest:
+    """post_id -> {source_hash, slug, title, output_hash} for imported posts."""
+
+    def __init__(self, path=MANIFEST_FILE, output_dir='posts'):
+        self.path = Path(path)
+        self.output_dir = output_dir
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.posts = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.posts = {}
+        self.slug_owners = {entry['slug']: post_id for post_id, entry in self.posts.items()}
+
+    def _owned_by_other(self, slug, post_id, title):
+        owner = self.slug_owners.get(slug)
+        if owner is not None:
+            return owner != post_id
+        # A directory the manifest doesn't know about: adopt it if it holds
+        # an earlier import of this same post, otherwise it's someone else's
+        qmd = os.path.join(self.output_dir, slug, 'index.qmd')
+        if not os.path.exists(qmd):
+            return False
+        with open(qmd, 'r', encoding='utf-8') as f:
+            return f'title: "{title}"\n' not in f.read()
+
+    def claim_slug(self, post_id, title):
+        """Slug for a post: its recorded one, or a fresh unclaimed one.
+
+        Returns (slug, collided_with), where `collided_with` names the slug
+        that was already taken by a different post, if any.
+        """
+        if post_id in self.posts:
+            return self.posts[post_id]['slug'], None
+        base = slugify(title, post_id)
+        slug, n = base, 2
+        while self._owned_by_other(slug, post_id, title):
+            slug, n = f'{base}-{n}', n + 1
+        self.slug_owners[slug] = post_id
+        return slug, (base if slug != base else None)
+
+    def record(self, post_id, entry):
+        self.posts[post_id] = entry
+        self.slug_owners[entry['slug']] = post_id
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.posts, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def image_filename(url, img_counter):
+    """Local filename for a post's Nth image, keeping the URL's extension."""
+    # Get file extension from URL or default to .jpg
+    parsed_url = urllib.parse.urlparse(url)
+    ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
+    return f"image_{img_counter}{ext}"
+
+def clean_html_content(html_content, post_dir, post_slug, fetcher=None):
+    """Clean HTML content and convert to Quarto-friendly markdown.
+
+    Conversion is a single pass of `html_to_markdown`. Images are collected
+    during conversion and fetched concurrently at the end through `fetcher`;
+    any that fail keep their remote URL.
+    """
+    # Queue image downloads and leave a placeholder for the local reference,
+    # filled in once all of the post's images are fetched
+    image_jobs = []
+    def queue_image(url):
+        image_jobs.append((url, image_filename(url, len(image_jobs) + 1)))
+        return f'\x00IMG{len(image_jobs) - 1}\x00'
+
+    markdown_content = html_to_markdown(html_content, image_src=queue_image)
+
+    # Fetch the post's images concurrently and resolve the placeholders
+    if image_jobs:
+        own_fetcher = fetcher is None
+        fetcher = fetcher or ImageFetcher()
+        try:
+            fetched = fetcher.fetch_all(
+                [(url, os.path.join(post_dir, filename)) for url, filename in image_jobs]
+            )
+        finally:
+            if own_fetcher:
+                fetcher.close()
+        def resolve_image(match):
+            url, filename = image_jobs[int(match.group(1))]
+            return filename if fetched.get(url) else url  # Fallback to original URL
+        markdown_content = re.sub(r'\x00IMG(\d+)\x00', resolve_image, markdown_content)
+
+    return markdown_content
+
+
+def read_post_html(row, posts_dir):
+    """The post's exported HTML, or None if the export doesn't include it."""
+    html_file = os.path.join(posts_dir, f"{row['post_id']}.html")
+    if not os.path.exists(html_file):
+        return None
+    with open(html_file, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def plan_post(row, html_content, manifest, code_hash, output_dir, force=False):
+    """Decide what to do with a post before converting it.
+
+    Returns (action, slug, digest, note) where action is 'skip' or 'convert'.
+    """
+    post_id = row['post_id']
+    title = post_title(row)
+    digest = source_hash(row, html_content, code_hash)
+    slug, collided = manifest.claim_slug(post_id, title)
+    note = f" (slug '{collided}' is taken by another post; using '{slug}')" if collided else ''
+
+    entry = manifest.posts.get(post_id)
+    if entry is None or force:
+        return 'convert', slug, digest, note
+    qmd_file = os.path.join(output_dir, slug, 'index.qmd')
+    current = file_sha256(qmd_file)
+    if current is not None and current != entry.get('output_hash'):
+        return 'skip', slug, digest, f"Skipped (edited locally; use --force to overwrite): {qmd_file}"
+    if current is not None and entry.get('source_hash') == digest:
+        return 'skip', slug, digest, None
+    return 'convert', slug, digest, note
+
+
+def convert_post(row, html_content, slug, output_dir, fetcher):
+    """Convert one posts.csv row to posts/<slug>/index.qmd; returns its path."""
+    title = post_title(row)
+    subtitle = row['subtitle'].strip() if row['subtitle'] else ''
+
+    # Parse date
+    if row['post_date']:
+        date_obj = datetime.fromisoformat(row['post_date'].replace('Z', '+00:00'))
+        date_str = date_obj.strftime('%Y-%m-%d')
+    else:
+        date_str = '2023-01-01'  # fallback date
+
+    # Create post directory
+    post_dir = os.path.join(output_dir, slug)
+    os.makedirs(post_dir, exist_ok=True)
+
+    # Convert HTML to markdown
+    markdown_content = clean_html_content(html_content, post_dir, slug, fetcher)
+
+    # Generate QMD content
+    qmd_content = f"""---
 title: "{title}"
 """
-            if subtitle:
-                qmd_content += f'description: "{subtitle}"\n'
-            
-            qmd_content += f"""date: "{date_str}"
+    if subtitle:
+        qmd_content += f'description: "{subtitle}"\n'
+
+    qmd_content += f"""date: "{date_str}"
 categories:
   - substack
 ---
 
 {markdown_content}
 """
-            
-            # Write QMD file
-            qmd_file = os.path.join(post_dir, 'index.qmd')
-            with open(qmd_file, 'w', encoding='utf-8') as f:
-                f.write(qmd_content)
-                
-            print(f"Converted: {title} -> {qmd_file}")
+
+    # Write QMD file
+    qmd_file = os.path.join(post_dir, 'index.qmd')
+    with open(qmd_file, 'w', encoding='utf-8') as f:
+        f.write(qmd_content)
+
+    return qmd_file
+
+
+def published_rows(posts_csv_path):
+    """Stream published rows from posts.csv."""
+    with open(posts_csv_path, 'r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            # Skip unpublished posts
+            if row['is_published'] == 'true':
+                yield row
+
+
+def process_posts(workers=WORKERS, force=False):
+    """Convert new and changed published Substack posts to QMD format."""
+    posts_csv_path = 'substack-export/posts.csv'
+    posts_dir = 'substack-export/posts'
+    output_dir = 'posts'
+
+    manifest = ImportManifest(MANIFEST_FILE, output_dir)
+    code_hash = converter_hash()
+    counts = {'converted': 0, 'unchanged': 0, 'skipped': 0}
+    fetcher = None
+    pending = {}
+
+    def finish(done):
+        for future in done:
+            row, slug, digest, note = pending.pop(future)
+            title = post_title(row)
+            try:
+                qmd_file = future.result()
+            except Exception as e:
+                print(f"Failed to convert {title}: {e}")
+                counts['skipped'] += 1
+                continue
+            manifest.record(row['post_id'], {
+                'source_hash': digest,
+                'slug': slug,
+                'title': title,
+                'output_hash': file_sha256(qmd_file),
+            })
+            counts['converted'] += 1
+            print(f"Converted: {title} -> {qmd_file}{note}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for row in published_rows(posts_csv_path):
+                html_content = read_post_html(row, posts_dir)
+                if html_content is None:
+                    print(f"HTML file not found: {os.path.join(posts_dir, row['post_id'] + '.html')}")
+                    counts['skipped'] += 1
+                    continue
+                # Slugs are claimed here, in CSV order, so collisions resolve
+                # the same way on every run
+                action, slug, digest, note = plan_post(
+                    row, html_content, manifest, code_hash, output_dir, force)
+                if action == 'skip':
+                    counts['skipped' if note else 'unchanged'] += 1
+                    if note:
+                        print(note)
+                    continue
+                # Keep a bounded window of posts in flight so the CSV is
+                # streamed rather than loaded up front
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    finish(done)
+                fetcher = fetcher or ImageFetcher(workers=workers)
+                future = pool.submit(convert_post, row, html_content, slug, output_dir, fetcher)
+                pending[future] = (row, slug, digest, note)
+            finish(wait(pending).done)
+    finally:
+        if fetcher is not None:
+            fetcher.close()
+        manifest.save()
+    print(f"{counts['converted']} converted, {counts['unchanged']} unchanged, "
+          f"{counts['skipped']} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a Substack export to Quarto posts.")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f"posts converted and images fetched concurrently (default: {WORKERS})")
+    parser.add_argument('--force', action='store_true',
+                        help="re-convert every post, overwriting local edits to imported posts")
+    args = parser.parse_args()
+    process_posts(workers=args.workers, force=args.force)
+
 
 if __name__ == '__main__':
-    process_posts()
\ No newline at end of file
+    main()
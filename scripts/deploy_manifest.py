@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Record what a deploy contains and what changed since the live one.
+
+Run after `quarto render`, before deploying:
+
+1. Every file in `_site` is hashed (SHA-1, the digest Netlify's deploy API
+   uses) into `_site/deploy-manifest.json`, which ships with the site.
+   Deploy configuration that lives outside `_site` (netlify.toml) is
+   hashed too, so a headers- or redirects-only change still deploys.
+2. The manifest of the previous deploy is fetched from the live site (or
+   read from a file) and compared with the new one.
+3. The changed and deleted paths are written to a JSON file for the
+   uploader and summarised on stdout and in $GITHUB_STEP_SUMMARY.
+   `changed=true|false` goes to $GITHUB_OUTPUT, so CI can skip a deploy
+   that wouldn't change anything.
+
+Netlify only uploads files whose digest it doesn't already have, so the
+changed set is also what a deploy actually transfers.
+
+    python scripts/deploy_manifest.py [--site _site] [--previous URL|PATH] [--output deploy-diff.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import requests
+
+SITE_DIR = Path("_site")
+SITE_URL = "https://ddimmery.com"
+MANIFEST_NAME = "deploy-manifest.json"
+# Read by Netlify at deploy time but not part of the site directory
+DEPLOY_CONFIG = ("netlify.toml",)
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(site_dir=SITE_DIR, config=DEPLOY_CONFIG):
+    """{"files": {site path: {"sha1": ..., "size": ...}}, "config": {...}}.
+
+    "files" covers every file in the site, "config" the deploy config files
+    in `config` that exist.
+    """
+    files = {}
+    site_dir = Path(site_dir)
+    for root, _, names in os.walk(site_dir):
+        for name in names:
+            path = Path(root) / name
+            rel = path.relative_to(site_dir).as_posix()
+            if rel == MANIFEST_NAME:
+                continue
+            files[rel] = {"sha1": hash_file(path), "size": path.stat().st_size}
+    config_files = {
+        name: {"sha1": hash_file(name), "size": Path(name).stat().st_size}
+        for name in config if Path(name).is_file()
+    }
+    return {"files": dict(sorted(files.items())), "config": config_files}
+
+
+def load_manifest(source):
+    """A previous manifest from a URL or file, or None if there isn't one."""
+    if source.startswith(("http://", "https://")):
+        try:
+            response = requests.get(source, timeout=30)
+        except requests.RequestException as e:
+            print(f"Could not fetch {source}: {e}", file=sys.stderr)
+            return None
+        if response.status_code != 200:
+            print(f"No previous manifest at {source} ({response.status_code})", file=sys.stderr)
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+    try:
+        with open(source, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def diff_manifests(previous, current):
+    """Changed (added or modified) and deleted paths between two manifests.
+
+    Deploy config files that were added, changed or removed are listed
+    separately under "config_changed", since they aren't uploaded.
+    """
+    old = (previous or {}).get("files", {})
+    new = current["files"]
+    changed = [path for path, entry in new.items() if old.get(path, {}).get("sha1") != entry["sha1"]]
+    deleted = sorted(set(old) - set(new))
+    old_config = (previous or {}).get("config", {})
+    new_config = current.get("config", {})
+    config_changed = sorted(
+        name for name in set(old_config) | set(new_config)
+        if old_config.get(name, {}).get("sha1") != new_config.get(name, {}).get("sha1")
+    )
+    return {
+        "changed": changed,
+        "deleted": deleted,
+        "config_changed": config_changed,
+        "changed_bytes": sum(new[path]["size"] for path in changed),
+        "total_files": len(new),
+        "total_bytes": sum(entry["size"] for entry in new.values()),
+        "first_deploy": previous is None,
+    }
+
+
+def _size(n):
+    return f"{n / 1024:.0f} KiB" if n < 1 << 20 else f"{n / (1 << 20):.1f} MiB"
+
+
+def summary_markdown(diff, limit=50):
+    """Markdown summary of a diff, for the terminal or $GITHUB_STEP_SUMMARY."""
+    lines = ["## Deploy changes", ""]
+    if diff["first_deploy"]:
+        lines.append("No previous manifest found: every file is new.")
+    lines.append(
+        f"{len(diff['changed'])} of {diff['total_files']} file(s) changed "
+        f"({_size(diff['changed_bytes'])} of {_size(diff['total_bytes'])}), "
+        f"{len(diff['deleted'])} deleted."
+    )
+    if diff["config_changed"] and not diff["first_deploy"]:
+        lines.append(f"Deploy config changed: {', '.join(f'`{name}`' for name in diff['config_changed'])}.")
+    for title, key in (("Changed", "changed"), ("Deleted", "deleted")):
+        paths = diff[key]
+        if paths and not diff["first_deploy"]:
+            lines += ["", f"**{title}:**", ""]
+            lines += [f"- `{path}`" for path in paths[:limit]]
+            if len(paths) > limit:
+                lines.append(f"- ...and {len(paths) - limit} more")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the deploy manifest and diff it against the live site.")
+    parser.add_argument("--site", type=Path, default=SITE_DIR, help="rendered site directory")
+    parser.add_argument("--previous", default=f"{SITE_URL}/{MANIFEST_NAME}",
+                        help="URL or path of the previous deploy's manifest")
+    parser.add_argument("--output", type=Path, default=Path("deploy-diff.json"),
+                        help="where to write the changed/deleted file lists")
+    args = parser.parse_args(argv)
+
+    if not args.site.is_dir():
+        print(f"{args.site} not found", file=sys.stderr)
+        return 1
+
+    current = build_manifest(args.site)
+    diff = diff_manifests(load_manifest(args.previous), current)
+    with open(args.site / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=1)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(diff, f, indent=2)
+
+    summary = summary_markdown(diff)
+    print(summary)
+    if os.environ.get("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a", encoding="utf-8") as f:
+            f.write(summary)
+    if os.environ.get("GITHUB_OUTPUT"):
+        changed = bool(diff["changed"] or diff["deleted"] or diff["config_changed"])
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Move the rendered site's static assets to content-addressed filenames.
+
+Runs as the last Quarto post-render step on full renders, after
+purge_assets.py has settled the final bytes of every stylesheet and script:
+
+1. Every stylesheet, script and font that a page references is copied to
+   `_site/assets/<name>.<hash><ext>`. The hash covers the content, so files
+   that are identical across `site_libs` versions collapse into one.
+   Stylesheets have their own `url()` references fingerprinted first, so a
+   changed font also changes the name of the CSS that loads it.
+2. `src`/`href` attributes and `<style>` blocks in every page are rewritten
+   to the new names.
+3. The originals are removed, along with any `site_libs` library that no
+   page references (old versions carried over from `_freeze`).
+4. Any file in `assets/` that the current pages no longer reference, directly
+   or through a fingerprinted stylesheet, is deleted. Incremental renders
+   (scripts/render.py) run this step on a site that already has an `assets/`
+   directory, so without it every stale `<name>.<hash>` would be deployed.
+
+`netlify.toml` serves `/assets/*` with a far-future immutable Cache-Control
+header, which is safe because a name can only ever refer to one content.
+
+    python scripts/fingerprint_assets.py [--site _site] [--force]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+SITE_DIR = Path("_site")
+ASSETS_DIR = "assets"
+FINGERPRINT_EXTENSIONS = {".css", ".js", ".woff", ".woff2", ".ttf", ".otf", ".eot"}
+HASH_LENGTH = 10
+
+_ATTRIBUTE_RE = re.compile(r"""(\s(?:src|href)=)(["'])([^"']+)\2""", re.IGNORECASE)
+_STYLE_BLOCK_RE = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.IGNORECASE | re.DOTALL)
+_CSS_URL_RE = re.compile(r"""(url\(\s*)(["']?)([^"')]+)\2(\s*\))""")
+_CSS_IMPORT_RE = re.compile(r"""(@import\s+)(["'])([^"']+)\2""")
+_SOURCE_MAP_RE = re.compile(r"(sourceMappingURL=)()(\S+)()")
+_UNSAFE_NAME_RE = re.compile(r"[^\w.-]+")
+
+
+class Fingerprinter:
+    """Copies assets to hashed names, remembering where each one went."""
+
+    def __init__(self, site_dir=SITE_DIR):
+        self.site_dir = Path(os.path.abspath(site_dir))
+        self.assets_dir = self.site_dir / ASSETS_DIR
+        self.renamed = {}  # original path -> fingerprinted path
+        self.referenced = set()  # other site files that are referenced
+        self._by_digest = {}
+        self._active = set()
+
+    def resolve(self, ref, base_dir):
+        """(site file, query, fragment) a reference points at, or None."""
+        if ref.startswith(("#", "data:", "//")):
+            return None
+        parts = urlsplit(ref)
+        if parts.scheme or parts.netloc or not parts.path:
+            return None
+        if parts.path.startswith("/"):
+            path = self.site_dir / unquote(parts.path).lstrip("/")
+        else:
+            path = base_dir / unquote(parts.path)
+        path = Path(os.path.normpath(path))
+        if not path.is_relative_to(self.site_dir) or not path.is_file():
+            return None
+        return path, parts.query, parts.fragment
+
+    def fingerprint(self, path):
+        """Hashed copy of `path` in the assets directory."""
+        if path in self.renamed:
+            return self.renamed[path]
+        data = path.read_bytes()
+        if path.suffix == ".css":
+            self._active.add(path)
+            css = data.decode("utf-8", errors="surrogateescape")
+            for pattern in (_CSS_URL_RE, _CSS_IMPORT_RE):
+                css = self.rewrite(pattern, css, path.parent, self.assets_dir)
+            data = css.encode("utf-8", errors="surrogateescape")
+            self._active.discard(path)
+        elif path.suffix == ".js":
+            js = data.decode("utf-8", errors="surrogateescape")
+            js = self.rewrite(_SOURCE_MAP_RE, js, path.parent, self.assets_dir)
+            data = js.encode("utf-8", errors="surrogateescape")
+
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        target = self._by_digest.get((digest, path.suffix))
+        if target is None:
+            stem = _UNSAFE_NAME_RE.sub("-", path.stem)
+            target = self.assets_dir / f"{stem}.{digest}{path.suffix}"
+            self.assets_dir.mkdir(exist_ok=True)
+            target.write_bytes(data)
+            self._by_digest[(digest, path.suffix)] = target
+        self.renamed[path] = target
+        return target
+
+    def new_reference(self, ref, base_dir, new_dir):
+        """`ref` (relative to `base_dir`) rewritten for a file in `new_dir`."""
+        resolved = self.resolve(ref, base_dir)
+        if resolved is None:
+            return ref
+        path, query, fragment = resolved
+        if (path.suffix in FINGERPRINT_EXTENSIONS and path not in self._active
+                and not path.is_relative_to(self.assets_dir)):
+            path = self.fingerprint(path)
+            query = ""  # cache-busting query strings are redundant now
+        else:
+            self.referenced.add(path)
+            if base_dir == new_dir:
+                return ref
+        if ref.startswith("/"):
+            new = "/" + path.relative_to(self.site_dir).as_posix()
+        else:
+            new = Path(os.path.relpath(path, new_dir)).as_posix()
+        return new + (f"?{query}" if query else "") + (f"#{fragment}" if fragment else "")
+
+    def rewrite(self, pattern, text, base_dir, new_dir):
+        """Rewrite the reference in group 3 of every `pattern` match."""
+        def replace(match):
+            new = self.new_reference(match.group(3), base_dir, new_dir)
+            return f"{match.group(1)}{match.group(2)}{new}{match.group(2)}{match.group(4)}"
+
+        return pattern.sub(replace, text)
+
+    def rewrite_page(self, path):
+        """Point a page's asset references at the fingerprinted copies."""
+        html = path.read_text(encoding="utf-8", errors="surrogateescape")
+
+        def replace_attribute(match):
+            new = self.new_reference(match.group(3), path.parent, path.parent)
+            return f"{match.group(1)}{match.group(2)}{new}{match.group(2)}"
+
+        def replace_style(match):
+            css = self.rewrite(_CSS_URL_RE, match.group(2), path.parent, path.parent)
+            return match.group(1) + css + match.group(3)
+
+        new_html = _STYLE_BLOCK_RE.sub(replace_style, _ATTRIBUTE_RE.sub(replace_attribute, html))
+        if new_html != html:
+            path.write_text(new_html, encoding="utf-8", errors="surrogateescape")
+            return True
+        return False
+
+
+def remove_unused_libraries(site_dir, used):
+    """Delete site_libs libraries none of whose files are `used`."""
+    removed = []
+    libs = Path(site_dir) / "site_libs"
+    if not libs.is_dir():
+        return removed
+    for library in sorted(libs.iterdir()):
+        if library.is_dir() and not any(path.is_relative_to(library) for path in used):
+            shutil.rmtree(library)
+            removed.append(library.name)
+    return removed
+
+
+def remove_stale_assets(fingerprinter):
+    """Delete files in the assets directory that no page references."""
+    assets_dir = fingerprinter.assets_dir
+    if not assets_dir.is_dir():
+        return []
+    live = set(fingerprinter.renamed.values())
+    live.update(p for p in fingerprinter.referenced if p.is_relative_to(assets_dir))
+    # Stylesheets fingerprinted by an earlier run aren't read again this run,
+    # so follow their references (fonts, imports, source maps) here
+    pending = [p for p in live if p.suffix in (".css", ".js")]
+    while pending:
+        path = pending.pop()
+        text = path.read_text(encoding="utf-8", errors="surrogateescape")
+        patterns = (_CSS_URL_RE, _CSS_IMPORT_RE) if path.suffix == ".css" else (_SOURCE_MAP_RE,)
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                resolved = fingerprinter.resolve(match.group(3), path.parent)
+                if resolved is None:
+                    continue
+                found = resolved[0]
+                if found.is_relative_to(assets_dir) and found not in live:
+                    live.add(found)
+                    if found.suffix in (".css", ".js"):
+                        pending.append(found)
+
+    removed = sorted(p for p in assets_dir.iterdir() if p.is_file() and p not in live)
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+def remove_empty_dirs(paths, stop):
+    """Remove directories left empty by deleting `paths`, up to `stop`."""
+    for directory in sorted({p.parent for p in paths}, key=lambda d: len(d.parts), reverse=True):
+        while directory != stop and directory.is_dir() and not any(directory.iterdir()):
+            directory.rmdir()
+            directory = directory.parent
+
+
+def fingerprint_site(site_dir=SITE_DIR):
+    fingerprinter = Fingerprinter(site_dir)
+    pages = sorted(fingerprinter.site_dir.rglob("*.html"))
+    changed = sum(fingerprinter.rewrite_page(page) for page in pages)
+
+    originals = set(fingerprinter.renamed)
+    stale = remove_stale_assets(fingerprinter)
+    if stale:
+        print(f"Removed {len(stale)} stale file(s) from {ASSETS_DIR}/")
+    if not originals:
+        print("No unfingerprinted assets found")
+        return
+    removed = remove_unused_libraries(fingerprinter.site_dir, originals | fingerprinter.referenced)
+    for path in originals:
+        path.unlink()
+    remove_empty_dirs(originals, fingerprinter.site_dir)
+
+    print(f"Fingerprinted {len(originals)} asset(s) into {len(set(fingerprinter.renamed.values()))} "
+          f"file(s) under {ASSETS_DIR}/ and rewrote {changed} of {len(pages)} page(s)")
+    if removed:
+        print(f"Removed unused site_libs: {', '.join(removed)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fingerprint the rendered site's static assets.")
+    parser.add_argument("--site", type=Path, default=SITE_DIR, help="rendered site directory")
+    parser.add_argument("--force", action="store_true", help="run even on partial renders")
+    args = parser.parse_args(argv)
+
+    # Partial renders (and quarto preview) expect site_libs to stay in place,
+    # and purge_assets.py hasn't settled the final bytes to hash
+    if not args.force and not os.environ.get("QUARTO_PROJECT_RENDER_ALL"):
+        return 0
+    if not args.site.is_dir():
+        print(f"{args.site} not found", file=sys.stderr)
+        return 1
+    fingerprint_site(args.site)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Cached index of the YAML front matter of every post.
+
+Only the header of each `posts/*/index.qmd` is read (up to the closing
+`---`), and the parsed result is cached in `.cache/frontmatter.json`. A
+cached entry is reused while the file's mtime and size are unchanged, or
+when they changed but its SHA-256 didn't (e.g. after a fresh checkout). So
+a typical query parses nothing and reads no post bodies.
+
+Used by the Makefile, scripts/convert_images.py and the listmonk tools:
+
+    python scripts/frontmatter.py categories
+    python scripts/frontmatter.py posts [--since DATE] [--until DATE] [--drafts]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from datetime import date
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+POSTS_DIR = ROOT / "posts"
+CACHE_FILE = ROOT / ".cache/frontmatter.json"
+CACHE_VERSION = 1
+
+
+def read_header(path):
+    """The YAML text between the opening and closing `---`, or None."""
+    with open(path, "r", encoding="utf-8") as f:
+        if f.readline().rstrip() != "---":
+            return None
+        lines = []
+        for line in f:
+            if line.rstrip() == "---":
+                return "".join(lines)
+            lines.append(line)
+    return None
+
+
+def _jsonable(value):
+    # YAML dates become the strings they'd print as, so cached and freshly
+    # parsed metadata look the same
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, date):
+        return str(value)
+    return value
+
+
+def parse_front_matter(path):
+    """A post's front matter as a dict (empty if it has none)."""
+    header = read_header(path)
+    metadata = yaml.safe_load(header) if header else None
+    return _jsonable(metadata) if isinstance(metadata, dict) else {}
+
+
+def post_date(metadata):
+    """The front-matter date, or None if it has none we can read."""
+    try:
+        return date.fromisoformat(str(metadata["date"])[:10])
+    except (KeyError, ValueError):
+        return None
+
+
+def _sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class PostIndex:
+    """Front matter of every post, keyed by slug."""
+
+    def __init__(self, posts_dir=POSTS_DIR, cache_file=CACHE_FILE):
+        self.posts_dir = Path(posts_dir)
+        self.cache_file = Path(cache_file)
+        self.posts = {}
+        self._refresh()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if cache.get("version") != CACHE_VERSION or cache.get("posts_dir") != str(self.posts_dir.resolve()):
+            return {}
+        return cache.get("posts", {})
+
+    def _refresh(self):
+        cached = self._load_cache()
+        entries, changed = {}, False
+        for entry in sorted(os.scandir(self.posts_dir), key=lambda e: e.name):
+            path = Path(entry.path) / "index.qmd"
+            if not entry.is_dir() or not path.is_file():
+                continue
+            stat = path.stat()
+            old = cached.get(entry.name)
+            if old and (old["mtime_ns"], old["size"]) == (stat.st_mtime_ns, stat.st_size):
+                entries[entry.name] = old
+                continue
+            digest = _sha256(path)
+            metadata = old["metadata"] if old and old["sha256"] == digest else parse_front_matter(path)
+            entries[entry.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                                   "sha256": digest, "metadata": metadata}
+            changed = True
+        if changed or entries.keys() != cached.keys():
+            self._save(entries)
+        self.posts = {slug: entry["metadata"] for slug, entry in entries.items()}
+
+    def _save(self, entries):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "posts_dir": str(self.posts_dir.resolve()),
+                       "posts": entries}, f)
+        os.replace(tmp, self.cache_file)
+
+    # -- queries --------------------------------------------------------
+
+    def get(self, slug):
+        """Front matter of one post (empty if there's no such post)."""
+        return self.posts.get(slug, {})
+
+    def is_draft(self, slug):
+        return bool(self.get(slug).get("draft"))
+
+    def image(self, slug):
+        """The post's `image:` reference, or None."""
+        image = self.get(slug).get("image")
+        return str(image).strip() if image else None
+
+    def categories(self, drafts=True):
+        """Counter of category -> number of posts."""
+        counts = Counter()
+        for slug, metadata in self.posts.items():
+            if drafts or not metadata.get("draft"):
+                counts.update(metadata.get("categories") or [])
+        return counts
+
+    def dated(self, since=None, until=None, drafts=True):
+        """Slugs dated within [since, until], oldest first; undated posts are left out."""
+        selected = []
+        for slug, metadata in self.posts.items():
+            posted = post_date(metadata)
+            if posted is None or (since and posted < since) or (until and posted > until):
+                continue
+            if drafts or not metadata.get("draft"):
+                selected.append((posted, slug))
+        return [slug for _, slug in sorted(selected)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the front matter of all posts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("categories", help="print post counts per category")
+    posts = commands.add_parser("posts", help="print dated posts, oldest first")
+    posts.add_argument("--since", type=date.fromisoformat, help="first date to include (YYYY-MM-DD)")
+    posts.add_argument("--until", type=date.fromisoformat, help="last date to include (YYYY-MM-DD)")
+    posts.add_argument("--drafts", action="store_true", help="include drafts")
+    args = parser.parse_args(argv)
+
+    index = PostIndex()
+    if args.command == "categories":
+        for category, count in index.categories().most_common():
+            print(f"{count}\t{category}")
+    else:
+        for slug in index.dated(args.since, args.until, drafts=args.drafts):
+            metadata = index.get(slug)
+            print(f"{post_date(metadata)}\t{slug}\t{metadata.get('title', '')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
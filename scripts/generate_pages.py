@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Generate the Research and Software page bodies from their YAML data.
+
+Runs as a Quarto pre-render step, in one plain Python process, and writes
+Markdown fragments to `_generated/` that research.qmd and software.qmd pull
+in with `{{< include >}}`. Neither page needs a Jupyter kernel.
+
+Fragments are only rewritten when their content changes.
+"""
+
+import sys
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from icon_utils import icon_sprite, render_buttons  # noqa: E402
+from publications import raw_html, render_publications, write_if_changed  # noqa: E402
+
+OUTPUT_DIR = ROOT / "_generated"
+PAPERS_FILE = ROOT / "papers.yaml"
+SOFTWARE_FILE = ROOT / "software.yaml"
+
+
+def render_software(path=SOFTWARE_FILE):
+    """Markdown fragment for the Software page, newest package first."""
+    with open(path, "r", encoding="utf-8") as f:
+        yaml_data = yaml.safe_load(f)
+
+    blocks = [raw_html(icon_sprite(["bi-info", "bi-github", "bi-box-seam"]))]
+    for data in yaml_data[::-1]:
+        blocks.append("## `" + data["title"] + "` {#" + data["title"] + "}")
+        blocks.append(data["description"].strip())
+        buttons = []
+        if "website" in data:
+            buttons.append((data['website'], "Website", "bi-info"))
+        if "github" in data:
+            buttons.append((data['github'], "Github", "bi-github"))
+        if "package" in data:
+            buttons.append((data['package'], "Package", "bi-box-seam"))
+        blocks.append(raw_html(" ".join(render_buttons(buttons))))
+    return "\n\n".join(blocks) + "\n"
+
+
+def main():
+    pages = {
+        "research.md": lambda: render_publications(PAPERS_FILE),
+        "software.md": lambda: render_software(SOFTWARE_FILE),
+    }
+    for name, render in pages.items():
+        changed = write_if_changed(OUTPUT_DIR / name, render())
+        print(f"  _generated/{name}: {'updated' if changed else 'unchanged'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
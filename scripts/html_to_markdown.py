@@ -0,0 +1,291 @@
+"""
+Single-pass HTML to Markdown conversion for Substack exports.
+
+`MarkdownConverter` is an `html.parser.HTMLParser` that emits Markdown as
+tags open and close, so conversion is linear in the size of the document
+and nested tags come out in the right order. Elements that need their
+content before they can be written (links, blockquotes, footnotes) collect
+it in a buffer on a stack.
+
+Footnote references usually come before the footnote text, so they are
+written as placeholders and resolved in one final pass.
+"""
+
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+SKIP_TAGS = {"script", "style", "svg", "button", "noscript"}
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+_FOOTNOTE_RE = re.compile(r"\x00FN(\d+)\x00")
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+\n")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def _classes(attrs):
+    return (attrs.get("class") or "").split()
+
+
+def emphasis(text, marker):
+    """Wrap text in an emphasis marker, keeping surrounding spaces outside."""
+    core = text.strip()
+    if not core:
+        return text
+    lead = text[:len(text) - len(text.lstrip())]
+    trail = text[len(text.rstrip()):]
+    return f"{lead}{marker}{core}{marker}{trail}"
+
+
+class MarkdownConverter(HTMLParser):
+    """Streaming HTML to Markdown converter.
+
+    Args:
+        image_src: Optional callable mapping an image URL to the reference
+            written into the Markdown (e.g. a local filename)
+    """
+
+    def __init__(self, image_src=None):
+        super().__init__(convert_charrefs=True)
+        self.image_src = image_src or (lambda url: url)
+        self.footnotes = {}
+        # Each frame: [tag, on_close, buffer]; the bottom frame is the document
+        self.stack = [[None, None, []]]
+        # For each open list: [tag, marker column, content column of its
+        # current item]; a nested list starts at its parent item's content
+        self.lists = []
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.in_image_container = 0
+        self.in_caption = 0
+        self.image_done = False
+
+    # -- output helpers -------------------------------------------------
+
+    @property
+    def out(self):
+        return self.stack[-1][2]
+
+    def write(self, text):
+        self.out.append(text)
+
+    def block_break(self):
+        self.write("\n\n")
+
+    def push(self, tag, on_close):
+        self.stack.append([tag, on_close, []])
+
+    def last_char(self):
+        """Last character written so far, across all open buffers."""
+        for frame in reversed(self.stack):
+            for chunk in reversed(frame[2]):
+                if chunk:
+                    return chunk[-1]
+        return "\n"
+
+    def at_line_start(self):
+        return self.last_char() == "\n"
+
+    # -- parser callbacks -----------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+        if tag in SKIP_TAGS or (tag == "p" and "button-wrapper" in _classes(attrs)):
+            self.skip_depth = 1
+            return
+        if tag in VOID_TAGS:
+            self.handle_void(tag, attrs)
+            return
+
+        classes = _classes(attrs)
+        if tag == "div" and "footnote" in classes:
+            self.push(tag, self.close_footnote)
+            self.stack[-1].append(None)  # footnote number, set by its anchor
+        elif tag == "div" and "captioned-image-container" in classes:
+            self.in_image_container += 1
+            self.image_done = False
+            self.push(tag, self.close_image_container)
+        elif tag == "a":
+            self.start_link(attrs, classes)
+        elif tag in HEADINGS:
+            self.block_break()
+            self.push(tag, lambda text, level=HEADINGS[tag]: self.write(
+                "#" * level + " " + text.strip() + "\n\n"))
+        elif tag in ("strong", "b"):
+            self.push(tag, lambda text: self.write(emphasis(text, "**")))
+        elif tag in ("em", "i"):
+            self.push(tag, lambda text: self.write(emphasis(text, "*")))
+        elif tag == "code" and not self.pre_depth:
+            self.push(tag, lambda text: self.write(f"`{text}`"))
+        elif tag == "pre":
+            self.pre_depth += 1
+            self.push(tag, self.close_pre)
+        elif tag == "blockquote":
+            self.push(tag, self.close_blockquote)
+        elif tag in ("ul", "ol"):
+            if not self.lists:
+                self.block_break()
+            indent = self.lists[-1][2] if self.lists else 0
+            self.lists.append([tag, indent, indent])
+            self.push(tag, self.close_list)
+        elif tag == "li":
+            self.start_list_item()
+        elif tag == "p":
+            if not self.lists:
+                self.block_break()
+            self.push(tag, self.close_paragraph)
+        elif tag == "figcaption":
+            self.in_caption += 1
+            self.push(tag, self.close_caption)
+        else:
+            self.push(tag, None)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag in VOID_TAGS:
+            return
+        # Close any elements left open inside this one (e.g. unclosed <p>)
+        if not any(frame[0] == tag for frame in self.stack[1:]):
+            return
+        while True:
+            frame = self.stack.pop()
+            text = "".join(frame[2])
+            if frame[1] is None:
+                self.write(text)
+            elif len(frame) == 4:
+                frame[1](text, frame[3])
+            else:
+                frame[1](text)
+            if frame[0] == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skip_depth or (self.in_image_container and not self.in_caption):
+            return
+        if not self.pre_depth:
+            data = _WHITESPACE_RE.sub(" ", data)
+            if self.last_char() in "\n ":
+                data = data.lstrip()
+        if data:
+            self.write(data)
+
+    # -- element handlers -----------------------------------------------
+
+    def handle_void(self, tag, attrs):
+        if tag == "br":
+            self.write("\n")
+        elif tag == "hr":
+            self.write("\n\n---\n\n")
+        elif tag == "img":
+            src = attrs.get("src")
+            if not src or (self.in_image_container and self.image_done):
+                return
+            self.image_done = bool(self.in_image_container)
+            target = self.image_src(src) if src.startswith("http") else src
+            self.write(f"\n\n![Image]({target})\n\n")
+
+    def start_link(self, attrs, classes):
+        href = attrs.get("href") or ""
+        if "footnote-anchor" in classes and href.startswith("#footnote-"):
+            self.write(f"\x00FN{href[len('#footnote-'):]}\x00")
+            self.skip_depth = 1
+            return
+        if "footnote-number" in classes or (attrs.get("id") or "").startswith("footnote-"):
+            # The number link inside a footnote div identifies the footnote
+            for frame in reversed(self.stack):
+                if len(frame) == 4:
+                    frame[3] = (attrs.get("id") or "").replace("footnote-", "") or None
+                    break
+            self.skip_depth = 1
+            return
+        if not href or self.in_image_container:
+            self.push("a", None)
+            return
+        self.push("a", lambda text: self.write(f"[{text.strip()}]({href})" if text.strip() else ""))
+
+    def start_list_item(self):
+        # A stray <li> outside any list becomes a bullet
+        current = self.lists[-1] if self.lists else ["ul", 0, 0]
+        marker = "1. " if current[0] == "ol" else "- "
+        current[2] = current[1] + len(marker)
+        if not self.at_line_start():
+            self.write("\n")
+        self.write(" " * current[1] + marker)
+        self.push("li", lambda text: self.write(text.strip() + "\n"))
+
+    def close_list(self, text):
+        self.lists.pop()
+        self.write(text)
+        if not self.lists:
+            self.write("\n")
+
+    def close_paragraph(self, text):
+        if self.lists:
+            self.write(text.strip() + " ")
+        else:
+            self.write(text.strip() + "\n\n")
+
+    def close_pre(self, text):
+        self.pre_depth -= 1
+        self.write("\n\n```\n" + text.strip("\n") + "\n```\n\n")
+
+    def close_blockquote(self, text):
+        text = _BLANK_LINES_RE.sub("\n\n", text).strip()
+        if not text:
+            return
+        quoted = "\n".join(f"> {line}" if line.strip() else ">" for line in text.split("\n"))
+        self.write("\n\n" + quoted + "\n\n")
+
+    def close_caption(self, text):
+        self.in_caption -= 1
+        if text.strip():
+            self.write(f"*{text.strip()}*\n\n")
+
+    def close_image_container(self, text):
+        self.in_image_container -= 1
+        self.write(text)
+
+    def close_footnote(self, text, number):
+        if number is not None:
+            self.footnotes[number] = _WHITESPACE_RE.sub(" ", text).strip()
+
+    # -- results --------------------------------------------------------
+
+    def markdown(self):
+        """Finish parsing and return the Markdown document."""
+        self.close()
+        while len(self.stack) > 1:
+            self.handle_endtag(self.stack[-1][0])
+        text = "".join(self.stack[0][2])
+
+        def resolve(match):
+            number = match.group(1)
+            if number in self.footnotes:
+                return f"^[{self.footnotes[number]}]"
+            return f"^[Footnote {number}]"
+
+        text = _FOOTNOTE_RE.sub(resolve, text)
+        text = _TRAILING_SPACE_RE.sub("\n", text)
+        text = _BLANK_LINES_RE.sub("\n\n", text)
+        return text.strip()
+
+
+def html_to_markdown(html_content, image_src=None, chunk_size=1 << 16):
+    """Convert an HTML string to Markdown, feeding the parser in chunks."""
+    converter = MarkdownConverter(image_src=image_src)
+    for start in range(0, len(html_content), chunk_size):
+        converter.feed(html_content[start:start + chunk_size])
+    return converter.markdown()
@@ -0,0 +1,21 @@
+"""Publish blog posts to Listmonk.
+
+Run as `python -m scripts.listmonk` from the repository root; see
+`__main__.py` for the command line. The individual step modules still work
+as standalone scripts.
+"""
+
+from .batch import publish_batch, report_markdown, select_posts
+from .client import ListmonkClient, ListmonkError
+from .publish import build_post_campaign, publish_post, summary_markdown
+
+__all__ = [
+    "ListmonkClient",
+    "ListmonkError",
+    "build_post_campaign",
+    "publish_batch",
+    "publish_post",
+    "report_markdown",
+    "select_posts",
+    "summary_markdown",
+]
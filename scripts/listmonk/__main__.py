@@ -0,0 +1,175 @@
+"""Command line for publishing posts to Listmonk.
+
+    python -m scripts.listmonk publish back-to-basics \
+        [--send-at "tomorrow 2pm"] [--timezone Europe/Berlin] [--lists 3,4] \
+        [--suffix TEXT] [--from-email ADDR] [--test-emails a@x.com,b@y.com] \
+        [--dry-run]
+
+    python -m scripts.listmonk batch [SLUG ...] [--since 2025-01-01] [--until 2025-06-30] \
+        [--send-at "Monday 9am" --interval-hours 24] [--concurrency 2] \
+        [--report results.json] [--dry-run] [...same campaign options]
+
+Posts must already be rendered to _site/. Batch runs select posts by slug or
+by front-matter date, and tag each campaign with an idempotency key so a
+re-run resumes or skips campaigns instead of duplicating them.
+
+Site images are sent as 600px copies uploaded to Listmonk's media library
+(see email_images.py); --full-size-images links the originals instead.
+
+Credentials come from LISTMONK_URL, LISTMONK_USER and LISTMONK_PASSWORD;
+without --lists campaigns go to LISTMONK_DEFAULT_LIST_ID. When
+$GITHUB_STEP_SUMMARY is set, a summary of the run is appended to it.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+from .batch import CONCURRENCY, WORKERS, publish_batch, report_markdown, select_posts
+from .client import ListmonkClient, ListmonkError
+from .convert_to_json_array import split_values
+from .email_images import resolve_images
+from .parse_send_time import parse_send_time
+from .publish import build_post_campaign, publish_post, summary_markdown
+
+
+def add_campaign_args(parser):
+    parser.add_argument('--send-at', help='schedule time, e.g. "2025-10-25 14:00" or "tomorrow 2pm"')
+    parser.add_argument('--timezone', default='Europe/Berlin', help='timezone for --send-at')
+    parser.add_argument('--lists', help='comma-separated list IDs (default: $LISTMONK_DEFAULT_LIST_ID)')
+    parser.add_argument('--from-email', help='from address (default: Listmonk default)')
+    parser.add_argument('--test-emails', help='comma-separated addresses to send a test to first')
+    parser.add_argument('--full-size-images', dest='optimize_images', action='store_false',
+                        help='link the site images as-is instead of email-sized copies')
+
+
+def list_ids(args):
+    ids = split_values(args.lists or os.environ.get('LISTMONK_DEFAULT_LIST_ID', ''))
+    if not ids:
+        raise ListmonkError('No list IDs given and LISTMONK_DEFAULT_LIST_ID is not set')
+    return ids
+
+
+def write_summary(text):
+    path = os.environ.get('GITHUB_STEP_SUMMARY')
+    if path:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text)
+
+
+def cmd_publish(args):
+    lists = list_ids(args)
+    test_emails = split_values(args.test_emails) if args.test_emails else None
+
+    if args.dry_run:
+        send_at_iso = parse_send_time(args.send_at, args.timezone) if args.send_at else None
+        _, payload = build_post_campaign(args.slug, lists, send_at_iso, args.suffix, args.from_email,
+                                         optimize_images=args.optimize_images)
+        payload['body'] = resolve_images(payload['body'])
+        print(json.dumps(payload, indent=2))
+        return 0
+
+    with ListmonkClient.from_env() as client:
+        result = publish_post(
+            client, args.slug, lists,
+            send_at=args.send_at,
+            timezone=args.timezone,
+            campaign_name_suffix=args.suffix,
+            from_email=args.from_email,
+            test_emails=test_emails,
+            optimize_images=args.optimize_images,
+        )
+    print(f"Created campaign {result['campaign_id']} for '{result['title']}'")
+    if test_emails:
+        print(f"Test email sent to: {', '.join(test_emails)}")
+    if result['send_at']:
+        print(f"Scheduled for {result['send_at']}")
+    else:
+        print('Started campaign immediately')
+    write_summary(summary_markdown(result))
+    return 0
+
+
+def cmd_batch(args):
+    lists = list_ids(args)
+    test_emails = split_values(args.test_emails) if args.test_emails else None
+    slugs = select_posts(args.slugs, args.since, args.until, args.all_posts)
+    if not slugs:
+        print('No posts selected')
+        return 0
+    send_at_iso = parse_send_time(args.send_at, args.timezone) if args.send_at else None
+
+    # A dry run only reads from Listmonk, and works offline without credentials
+    client = None
+    if not args.dry_run or os.environ.get('LISTMONK_URL'):
+        client = ListmonkClient.from_env()
+    try:
+        rows = publish_batch(
+            client, slugs, lists,
+            send_at_iso=send_at_iso,
+            interval_hours=args.interval_hours,
+            campaign_name_suffix=args.suffix,
+            from_email=args.from_email,
+            test_emails=test_emails,
+            workers=args.workers,
+            concurrency=args.concurrency,
+            dry_run=args.dry_run,
+            optimize_images=args.optimize_images,
+        )
+    finally:
+        if client is not None:
+            client.close()
+
+    report = report_markdown(rows)
+    print(report)
+    write_summary(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    failed = [row for row in rows if row['error']]
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m scripts.listmonk',
+                                     description='Publish posts to Listmonk.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    publish = commands.add_parser('publish', help='publish one rendered post as a campaign')
+    publish.add_argument('slug', help='post slug, e.g. back-to-basics for posts/back-to-basics/')
+    publish.add_argument('--suffix', help='campaign name suffix (default: today\'s date)')
+    publish.add_argument('--dry-run', action='store_true', help='print the campaign payload and exit')
+    add_campaign_args(publish)
+    publish.set_defaults(func=cmd_publish)
+
+    batch = commands.add_parser('batch', help='publish several rendered posts as campaigns')
+    batch.add_argument('slugs', nargs='*', help='post slugs (or select by --since/--until, or --all)')
+    batch.add_argument('--since', type=date.fromisoformat, help='first post date to include (YYYY-MM-DD)')
+    batch.add_argument('--until', type=date.fromisoformat, help='last post date to include (YYYY-MM-DD)')
+    batch.add_argument('--all', dest='all_posts', action='store_true',
+                       help='with no slugs or dates, publish every post')
+    batch.add_argument('--interval-hours', type=float, default=0,
+                       help='with --send-at, schedule each post this many hours after the previous one')
+    batch.add_argument('--suffix', help='campaign name suffix (default: today\'s date)')
+    batch.add_argument('--workers', type=int, default=WORKERS, help='processes preparing email HTML')
+    batch.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                       help=f'campaigns sent to Listmonk at once (default: {CONCURRENCY})')
+    batch.add_argument('--report', help='also write the per-post results to this JSON file')
+    batch.add_argument('--dry-run', action='store_true', help='prepare and report without creating campaigns')
+    add_campaign_args(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    args = parser.parse_args(argv)
+    if args.command == 'batch' and not (args.slugs or args.since or args.until or args.all_posts):
+        batch.error('select posts by slug, --since/--until, or --all')
+    try:
+        return args.func(args)
+    except (ListmonkError, FileNotFoundError, ValueError) as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
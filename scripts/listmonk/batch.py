@@ -0,0 +1,182 @@
+"""Publish several posts as Listmonk campaigns in one run.
+
+Posts are chosen by slug, by front-matter date range, or (explicitly) all
+at once. Their email bodies are prepared in parallel across processes (HTML
+parsing is CPU-bound), then the campaigns go through a small thread pool so
+only a bounded number of API calls are in flight at once.
+
+Every campaign is tagged with an idempotency key derived from the slug and
+the target lists. The send time is deliberately left out: a relative
+`--send-at` ("Monday 9am") resolves differently on every run. Campaigns
+already carrying a key are looked up before anything is created: a draft
+left behind by a failed run is updated to this run's payload (body, images
+and send time) and started, and one that was already scheduled, running or
+sent is skipped, whatever its schedule. Re-running a batch therefore never
+creates duplicate campaigns.
+
+Cancelled campaigns don't count: a post whose campaign was cancelled (say,
+for a wrong schedule) gets a new campaign on the next run.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from ..frontmatter import PostIndex
+from .email_images import MediaUploader, resolve_images
+from .publish import POSTS_DIR, SITE_DIR, build_post_campaign, start_campaign
+
+KEY_PREFIX = 'publish-key:'
+WORKERS = os.cpu_count() or 1
+CONCURRENCY = 2
+
+
+def select_posts(slugs=None, since=None, until=None, all_posts=False, posts_dir=POSTS_DIR):
+    """Slugs to publish, oldest first.
+
+    Explicit `slugs` are used as given (deduplicated); otherwise every post
+    dated within [since, until] is selected, except drafts, which aren't
+    on the site. Selecting every post takes `all_posts`, so a batch with no
+    selector at all is an error rather than a mailing of the whole archive.
+    """
+    if slugs:
+        return list(dict.fromkeys(slugs))
+    if since is None and until is None and not all_posts:
+        raise ValueError('no posts selected: give slugs, --since/--until, or --all')
+    return PostIndex(posts_dir).dated(since, until, drafts=False)
+
+
+def idempotency_key(slug, list_ids):
+    """Campaign tag identifying one post sent to some lists."""
+    ident = '|'.join([slug, ','.join(map(str, sorted(list_ids)))])
+    return KEY_PREFIX + hashlib.sha256(ident.encode('utf-8')).hexdigest()[:16]
+
+
+def send_times(first_iso, count, interval_hours):
+    """ISO send time for each of `count` posts, `interval_hours` apart."""
+    if not first_iso:
+        return [None] * count
+    first = datetime.strptime(first_iso, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    step = timedelta(hours=interval_hours or 0)
+    return [(first + i * step).strftime('%Y-%m-%dT%H:%M:%SZ') for i in range(count)]
+
+
+def _prepare(job):
+    """Build one post's payload (runs in a worker process)."""
+    slug, list_ids, send_at_iso, suffix, from_email, key, optimize_images, posts_dir, site_dir = job
+    try:
+        metadata, payload = build_post_campaign(
+            slug, list_ids, send_at_iso, suffix, from_email, tags=[key],
+            optimize_images=optimize_images, posts_dir=posts_dir, site_dir=site_dir,
+        )
+        return slug, metadata, payload, None
+    except Exception as e:
+        return slug, None, None, str(e)
+
+
+def _send(client, prepared, existing, test_emails, uploader):
+    """Create (or resume) and start one campaign; returns its report row."""
+    row = {
+        'slug': prepared['slug'],
+        'title': prepared['title'],
+        'send_at': prepared['payload'].get('send_at'),
+        'campaign_id': None,
+        'outcome': None,
+        'status': None,
+        'error': None,
+    }
+    try:
+        campaign = existing.get(prepared['key'])
+        if campaign and campaign.get('status') != 'draft':
+            row.update(campaign_id=campaign['id'], status=campaign.get('status'), outcome='exists')
+            return row
+        payload = dict(prepared['payload'], body=resolve_images(prepared['payload']['body'], uploader))
+        if campaign:
+            # The draft still has the failed run's body and schedule; an
+            # explicit null clears a schedule this run doesn't have
+            campaign = client.update_campaign(campaign['id'], {'send_at': None, **payload})
+            row['outcome'] = 'resumed'
+        else:
+            campaign = client.create_campaign(payload)
+            row['outcome'] = 'created'
+        row['campaign_id'] = campaign['id']
+        row['status'] = start_campaign(
+            client, campaign['id'], scheduled=bool(row['send_at']), test_emails=test_emails)
+    except Exception as e:
+        # A campaign created before the failure is resumed on the next run
+        row['outcome'] = f"{row['outcome']}, not started" if row['outcome'] else 'failed'
+        row['error'] = str(e)
+    return row
+
+
+def publish_batch(client, slugs, list_ids, send_at_iso=None, interval_hours=0,
+                  campaign_name_suffix=None, from_email=None, test_emails=None,
+                  workers=WORKERS, concurrency=CONCURRENCY, dry_run=False,
+                  optimize_images=True, posts_dir=POSTS_DIR, site_dir=SITE_DIR):
+    """Publish `slugs` as campaigns; returns one report row per post, in order.
+
+    With `dry_run`, payloads are prepared and checked against existing
+    campaigns but nothing is created (`client` may be None if so).
+    """
+    times = send_times(send_at_iso, len(slugs), interval_hours)
+    keys = [idempotency_key(slug, list_ids) for slug in slugs]
+    jobs = [
+        (slug, list_ids, at, campaign_name_suffix, from_email, key, optimize_images, posts_dir, site_dir)
+        for slug, at, key in zip(slugs, times, keys)
+    ]
+
+    rows = {}
+    prepared = []
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        for (slug, metadata, payload, error), key in zip(pool.map(_prepare, jobs), keys):
+            if error:
+                rows[slug] = {'slug': slug, 'title': None, 'send_at': None, 'campaign_id': None,
+                              'outcome': 'failed', 'status': None, 'error': error}
+            else:
+                prepared.append({'slug': slug, 'title': metadata['title'], 'payload': payload, 'key': key})
+
+    # One listing up front instead of a lookup per post
+    existing = {}
+    if client is not None and prepared:
+        for campaign in client.iter_campaigns():
+            if campaign.get('status') == 'cancelled':
+                continue
+            for tag in campaign.get('tags') or []:
+                if tag.startswith(KEY_PREFIX):
+                    existing[tag] = campaign
+
+    if dry_run:
+        for item in prepared:
+            campaign = existing.get(item['key'])
+            rows[item['slug']] = {
+                'slug': item['slug'], 'title': item['title'],
+                'send_at': item['payload'].get('send_at'),
+                'campaign_id': campaign['id'] if campaign else None,
+                'outcome': 'dry-run' + (' (exists)' if campaign else ''),
+                'status': campaign.get('status') if campaign else None,
+                'error': None,
+            }
+    else:
+        # Shared so an image used by several posts is uploaded once
+        uploader = MediaUploader(client)
+        with ThreadPoolExecutor(max_workers=concurrency) as queue:
+            for row in queue.map(lambda item: _send(client, item, existing, test_emails, uploader), prepared):
+                rows[row['slug']] = row
+
+    return [rows[slug] for slug in slugs]
+
+
+def report_markdown(rows):
+    """Markdown table of batch results, for the terminal or $GITHUB_STEP_SUMMARY."""
+    lines = [
+        '## Listmonk batch publish',
+        '',
+        '| Post | Campaign | Outcome | Status | Send at (UTC) | Error |',
+        '|---|---|---|---|---|---|',
+    ]
+    for row in rows:
+        cells = [row['title'] or row['slug'], row['campaign_id'], row['outcome'],
+                 row['status'], row['send_at'] or 'now', row['error']]
+        lines.append('| ' + ' | '.join('' if c is None else str(c).replace('|', '\\|') for c in cells) + ' |')
+    return '\n'.join(lines) + '\n'
@@ -5,27 +5,9 @@ import sys
 import json
 
 
-def main():
-    if len(sys.argv) < 5:
-        print(
-            "Usage: build_campaign_payload.py <campaign_name> <subject> <list_ids_json> "
-            "<html_body_file> [from_email] [send_at] [altbody]",
-            file=sys.stderr
-        )
-        sys.exit(1)
-
-    campaign_name = sys.argv[1]
-    subject = sys.argv[2]
-    list_ids = json.loads(sys.argv[3])
-    html_body_file = sys.argv[4]
-    from_email = sys.argv[5] if len(sys.argv) > 5 else None
-    send_at = sys.argv[6] if len(sys.argv) > 6 else None
-    altbody = sys.argv[7] if len(sys.argv) > 7 else None
-
-    # Read HTML body
-    with open(html_body_file, 'r', encoding='utf-8') as f:
-        body = f.read()
-
+def build_campaign_payload(campaign_name, subject, list_ids, body,
+                           from_email=None, send_at=None, altbody=None, tags=None):
+    """Request body for POST /api/campaigns."""
     data = {
         'name': campaign_name,
         'subject': subject,
@@ -46,6 +28,34 @@ def main():
     if altbody:
         data['altbody'] = altbody
 
+    if tags:
+        data['tags'] = list(tags)
+
+    return data
+
+
+def main():
+    if len(sys.argv) < 5:
+        print(
+            "Usage: build_campaign_payload.py <campaign_name> <subject> <list_ids_json> "
+            "<html_body_file> [from_email] [send_at] [altbody]",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    # Read HTML body
+    with open(sys.argv[4], 'r', encoding='utf-8') as f:
+        body = f.read()
+
+    data = build_campaign_payload(
+        sys.argv[1],
+        sys.argv[2],
+        json.loads(sys.argv[3]),
+        body,
+        from_email=sys.argv[5] if len(sys.argv) > 5 else None,
+        send_at=sys.argv[6] if len(sys.argv) > 6 else None,
+        altbody=sys.argv[7] if len(sys.argv) > 7 else None,
+    )
     print(json.dumps(data))
 
 
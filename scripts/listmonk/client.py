@@ -0,0 +1,133 @@
+"""Minimal Listmonk API client.
+
+One pooled `requests.Session` is shared by every call, with retries on
+connection errors and on 429/5xx responses to idempotent requests. Campaign
+creation is a POST and is only retried if the connection failed before the
+request was sent, so a flaky network can't create duplicate campaigns.
+"""
+
+import mimetypes
+import os
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TIMEOUT = (5, 60)  # connect, read (seconds)
+
+
+class ListmonkError(RuntimeError):
+    """A Listmonk API call failed."""
+
+
+class ListmonkClient:
+    """Listmonk API client authenticated as an API user."""
+
+    def __init__(self, url, user, password, timeout=TIMEOUT, retries=3):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = (user, password)
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_env(cls):
+        """Client configured from LISTMONK_URL, LISTMONK_USER and LISTMONK_PASSWORD."""
+        missing = [name for name in ('LISTMONK_URL', 'LISTMONK_USER', 'LISTMONK_PASSWORD')
+                   if not os.environ.get(name)]
+        if missing:
+            raise ListmonkError(f"Missing environment variables: {', '.join(missing)}")
+        return cls(os.environ['LISTMONK_URL'], os.environ['LISTMONK_USER'],
+                   os.environ['LISTMONK_PASSWORD'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def request(self, method, path, **kwargs):
+        """Call the API and return the response's `data` field."""
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            response = self.session.request(method, f'{self.url}/api/{path.lstrip("/")}', **kwargs)
+        except requests.RequestException as e:
+            raise ListmonkError(f'{method} /api/{path}: {e}') from e
+        try:
+            body = response.json()
+        except ValueError:
+            body = {'message': response.text[:500]}
+        if not response.ok:
+            raise ListmonkError(
+                f'{method} /api/{path}: HTTP {response.status_code}: {body.get("message", body)}'
+            )
+        return body.get('data')
+
+    def create_campaign(self, payload):
+        """Create a campaign and return it (including its `id`)."""
+        data = self.request('POST', 'campaigns', json=payload)
+        if not isinstance(data, dict) or 'id' not in data:
+            raise ListmonkError(f'Unexpected response creating campaign: {data!r}')
+        return data
+
+    def update_campaign(self, campaign_id, payload):
+        """Replace a campaign's settings and content; returns the updated campaign."""
+        data = self.request('PUT', f'campaigns/{campaign_id}', json=payload)
+        if not isinstance(data, dict) or 'id' not in data:
+            raise ListmonkError(f'Unexpected response updating campaign {campaign_id}: {data!r}')
+        return data
+
+    def send_test(self, campaign_id, subscribers):
+        """Send the campaign to the given subscriber emails as a test."""
+        return self.request('POST', f'campaigns/{campaign_id}/test', json={'subscribers': subscribers})
+
+    def set_status(self, campaign_id, status):
+        """Change a campaign's status (e.g. 'scheduled', 'running', 'cancelled')."""
+        return self.request('PUT', f'campaigns/{campaign_id}/status', json={'status': status})
+
+    def iter_campaigns(self, per_page=100):
+        """Yield every campaign, a page at a time."""
+        page = 1
+        while True:
+            data = self.request('GET', 'campaigns', params={'page': page, 'per_page': per_page}) or {}
+            results = data.get('results') or []
+            yield from results
+            if len(results) < per_page or page * per_page >= data.get('total', 0):
+                return
+            page += 1
+
+    def list_media(self, per_page=100):
+        """Every file in the media library."""
+        media, page = [], 1
+        while True:
+            data = self.request('GET', 'media', params={'page': page, 'per_page': per_page})
+            # Older Listmonk versions return a bare list instead of a page
+            if isinstance(data, list):
+                return data
+            results = (data or {}).get('results') or []
+            media += results
+            if len(results) < per_page or page * per_page >= data.get('total', 0):
+                return media
+            page += 1
+
+    def upload_media(self, path):
+        """Upload a file to the media library and return its record (with `url`)."""
+        path = Path(path)
+        content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        with open(path, 'rb') as f:
+            data = self.request('POST', 'media', files={'file': (path.name, f, content_type)})
+        if not isinstance(data, dict) or 'url' not in data:
+            raise ListmonkError(f'Unexpected response uploading {path.name}: {data!r}')
+        return data
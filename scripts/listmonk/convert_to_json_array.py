@@ -5,25 +5,24 @@ import sys
 import json
 
 
-def main():
-    # Read from stdin
-    input_str = sys.stdin.read().strip()
-
+def split_values(input_str):
+    """List of comma-separated values, as ints if they all are."""
+    input_str = (input_str or '').strip()
     if not input_str:
-        print("[]")
-        return
+        return []
 
-    # Split and convert to appropriate type
     items = [x.strip() for x in input_str.split(',')]
 
     # Try to convert to integers if possible, otherwise keep as strings
     try:
-        items = [int(x) for x in items]
+        return [int(x) for x in items]
     except ValueError:
-        # Keep as strings if conversion fails
-        pass
+        return items
 
-    print(json.dumps(items))
+
+def main():
+    # Read from stdin
+    print(json.dumps(split_values(sys.stdin.read())))
 
 
 if __name__ == '__main__':
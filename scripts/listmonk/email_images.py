@@ -0,0 +1,129 @@
+"""Email-sized copies of the images in a campaign body.
+
+Posts reference the site's full-size images (1200px PNGs, and larger for
+some rendered figures). This stage runs in two steps:
+
+1. `resize_img` runs for each <img> during prepare_email_html's walk. It
+   is local-only, so batch runs do it in worker processes. It downscales
+   the site image to `EMAIL_WIDTH` and re-encodes it as an optimized JPEG,
+   or as PNG if it has transparency. Results are cached in
+   `.cache/email-images/` under a hash of the source bytes and settings.
+   The `src` becomes an `email-image:` placeholder, and explicit
+   width/height attributes are added.
+2. `resolve_images` uploads the variants to the Listmonk media library and
+   replaces the placeholders with their URLs. Uploads are named after the
+   content hash, so an image that's already in the library is reused.
+"""
+
+import hashlib
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from PIL import Image
+
+CACHE_DIR = Path('.cache/email-images')
+EMAIL_WIDTH = 600
+JPEG_QUALITY = 80
+PLACEHOLDER = 'email-image:'
+RESIZABLE = {'.png', '.jpg', '.jpeg', '.webp'}
+
+_PLACEHOLDER_RE = re.compile(re.escape(PLACEHOLDER) + r'([\w.-]+)')
+
+
+def local_path(src, site_url, site_dir):
+    """File in `site_dir` that a site image URL points at, or None."""
+    if not src or not src.startswith(site_url.rstrip('/') + '/'):
+        return None
+    path = Path(site_dir) / unquote(urlparse(src).path).lstrip('/')
+    return path if path.suffix.lower() in RESIZABLE and path.is_file() else None
+
+
+def make_variant(source, cache_dir=CACHE_DIR, width=EMAIL_WIDTH):
+    """(cached variant path, width, height) for an image file."""
+    data = source.read_bytes()
+    digest = hashlib.sha256(data + f'|{width}|{JPEG_QUALITY}'.encode()).hexdigest()[:16]
+    cache_dir = Path(cache_dir)
+    # Dimensions are part of the name, so a cache hit needs no decoding
+    for cached in cache_dir.glob(f'{digest}-*'):
+        w, h = cached.stem.split('-')[1].split('x')
+        return cached, int(w), int(h)
+
+    with Image.open(source) as im:
+        original_size = im.size
+        im.thumbnail((width, width * 10))
+        w, h = im.size
+        has_alpha = im.mode in ('RGBA', 'LA') or (im.mode == 'P' and 'transparency' in im.info)
+        ext = '.png' if has_alpha else '.jpg'
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        target = cache_dir / f'{digest}-{w}x{h}{ext}'
+        tmp = target.with_name(f'.{target.name}.tmp')
+        if has_alpha:
+            im.save(tmp, 'PNG', optimize=True)
+        else:
+            im.convert('RGB').save(tmp, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+    # Small images can come out bigger after re-encoding; keep the original then
+    if original_size == (w, h) and tmp.stat().st_size >= len(data):
+        target = cache_dir / f'{digest}-{w}x{h}{source.suffix.lower()}'
+        shutil.copyfile(source, tmp)
+    tmp.replace(target)
+    return target, w, h
+
+
+def resize_img(img, site_url, site_dir='_site', cache_dir=CACHE_DIR, width=EMAIL_WIDTH):
+    """Point an <img> at an email-sized variant of its site image.
+
+    Called for each image from prepare_email_html's walk; `src` becomes a
+    placeholder for `resolve_images` and width/height are set.
+    """
+    source = local_path(img.get('src'), site_url, site_dir)
+    if source is None:
+        return
+    try:
+        path, w, h = make_variant(source, cache_dir, width)
+    except OSError as e:
+        print(f'Could not resize {source}: {e}', file=sys.stderr)
+        return
+    img['src'] = PLACEHOLDER + path.name
+    img['width'] = str(w)
+    img['height'] = str(h)
+
+
+class MediaUploader:
+    """Uploads variants to Listmonk's media library, once per content hash."""
+
+    def __init__(self, client, cache_dir=CACHE_DIR):
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self._urls = None
+
+    def _index(self):
+        if self._urls is None:
+            self._urls = {item['filename']: item['url'] for item in self.client.list_media()
+                          if item.get('filename') and item.get('url')}
+        return self._urls
+
+    def url(self, filename):
+        # One lock for all uploads keeps a shared image from being sent twice
+        with self._lock:
+            urls = self._index()
+            if filename not in urls:
+                media = self.client.upload_media(self.cache_dir / filename)
+                urls[filename] = media['url']
+            return urls[filename]
+
+
+def resolve_images(html, uploader=None, cache_dir=CACHE_DIR):
+    """Replace placeholders with hosted URLs (or local file URIs without an uploader)."""
+    def replace(match):
+        filename = match.group(1)
+        if uploader is None:
+            return (Path(cache_dir) / filename).resolve().as_uri()
+        return uploader.url(filename)
+
+    return _PLACEHOLDER_RE.sub(replace, html)
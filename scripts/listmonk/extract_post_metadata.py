@@ -2,8 +2,25 @@
 """Extract metadata from Quarto post YAML frontmatter."""
 
 import sys
-import yaml
 import json
+from pathlib import Path
+
+try:
+    from ..frontmatter import parse_front_matter
+except ImportError:  # run as a standalone script
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from frontmatter import parse_front_matter
+
+
+def extract_post_metadata(post_path):
+    """Title, description and date from a post's YAML front matter."""
+    # Only the header is read, not the post body
+    metadata = parse_front_matter(post_path)
+    return {
+        'title': metadata.get('title', 'Untitled'),
+        'description': metadata.get('description', ''),
+        'date': str(metadata.get('date', '')),
+    }
 
 
 def main():
@@ -11,28 +28,9 @@ def main():
         print("Usage: extract_post_metadata.py <post_path>", file=sys.stderr)
         sys.exit(1)
 
-    post_path = sys.argv[1]
-
     try:
-        with open(post_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Extract YAML frontmatter between --- delimiters
-            parts = content.split('---')
-            if len(parts) >= 3:
-                metadata = yaml.safe_load(parts[1])
-                # Output as JSON for easy parsing in shell
-                output = {
-                    'title': metadata.get('title', 'Untitled'),
-                    'description': metadata.get('description', ''),
-                    'date': metadata.get('date', '')
-                }
-                print(json.dumps(output))
-            else:
-                print(json.dumps({
-                    'title': 'Untitled',
-                    'description': '',
-                    'date': ''
-                }))
+        # Output as JSON for easy parsing in shell
+        print(json.dumps(extract_post_metadata(sys.argv[1])))
     except Exception as e:
         print(f"Error reading metadata: {e}", file=sys.stderr)
         sys.exit(1)
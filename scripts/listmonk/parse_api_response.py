@@ -5,15 +5,16 @@ import sys
 import json
 
 
+def campaign_id(data):
+    """Campaign ID from a Listmonk API response; ValueError if absent."""
+    if isinstance(data, dict) and isinstance(data.get('data'), dict) and 'id' in data['data']:
+        return data['data']['id']
+    raise ValueError('Invalid response format:\n' + json.dumps(data, indent=2))
+
+
 def main():
     try:
-        data = json.load(sys.stdin)
-        if 'data' in data and 'id' in data['data']:
-            print(data['data']['id'])
-        else:
-            print('Error: Invalid response format', file=sys.stderr)
-            print(json.dumps(data, indent=2), file=sys.stderr)
-            sys.exit(1)
+        print(campaign_id(json.load(sys.stdin)))
     except Exception as e:
         print(f'Error parsing response: {e}', file=sys.stderr)
         sys.exit(1)
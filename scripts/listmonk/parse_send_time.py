@@ -2,32 +2,38 @@
 """Parse flexible datetime input and convert to ISO 8601 UTC format."""
 
 import sys
-from dateparser import parse
-import pytz
+from datetime import timezone as dt_timezone
 
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: parse_send_time.py <input_time> <timezone>", file=sys.stderr)
-        sys.exit(1)
+def parse_send_time(input_time, timezone):
+    """ISO 8601 UTC string for a human-readable time in `timezone`.
 
-    input_time = sys.argv[1]
-    timezone = sys.argv[2]
+    Raises ValueError if the input can't be parsed.
+    """
+    # dateparser is slow to import; only pay for it when scheduling
+    from dateparser import parse
 
-    # Parse the input time
     parsed = parse(
         input_time,
         settings={'TIMEZONE': timezone, 'RETURN_AS_TIMEZONE_AWARE': True}
     )
-
     if parsed is None:
-        print(f'Error: Could not parse time: {input_time}', file=sys.stderr)
-        sys.exit(1)
+        raise ValueError(f'Could not parse time: {input_time}')
 
     # Convert to UTC and format as ISO 8601
-    utc_time = parsed.astimezone(pytz.UTC)
-    iso_format = utc_time.strftime('%Y-%m-%dT%H:%M:%SZ')
-    print(iso_format)
+    return parsed.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: parse_send_time.py <input_time> <timezone>", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        print(parse_send_time(sys.argv[1], sys.argv[2]))
+    except ValueError as e:
+        print(f'Error: {e}', file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
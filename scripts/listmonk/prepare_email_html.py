@@ -1,62 +1,260 @@
 #!/usr/bin/env python3
-"""Extract HTML content from rendered Quarto post and add email header/footer."""
+"""Extract HTML content from rendered Quarto post and add email header/footer.
 
+The content is cleaned in one walk over the tree. That walk:
+
+- removes scripts, navigation, comments and other markup that email
+  clients ignore or strip anyway
+- makes relative URLs absolute
+- inlines CSS into `style` attributes, since most email clients drop
+  `<style>` and `<link>`
+
+The inlined rules are a few email defaults taken from the site theme plus
+the site's own styles.css. Only simple selectors (tag, class, id and
+descendant combinations of them) are supported. Anything else is skipped.
+
+Only `<main>` is parsed into a tree when the page has one, using lxml when
+it's installed and the stdlib parser otherwise.
+"""
+
+import importlib.util
+import re
 import sys
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
+from bs4 import BeautifulSoup, Comment, SoupStrainer, Tag
 
-def convert_relative_urls(content, base_url):
-    """Convert all relative URLs in the content to absolute URLs."""
-    # Get the base domain from the post URL
-    parsed_base = urlparse(base_url)
-    site_base = f"{parsed_base.scheme}://{parsed_base.netloc}"
-
-    # Convert image src attributes
-    for img in content.find_all('img'):
-        if img.get('src'):
-            img['src'] = urljoin(site_base, img['src'])
-
-    # Convert link href attributes (but not anchors starting with #)
-    for link in content.find_all('a'):
-        if link.get('href') and not link['href'].startswith('#'):
-            # Only convert relative URLs, leave absolute URLs as-is
-            if not urlparse(link['href']).netloc:
-                link['href'] = urljoin(site_base, link['href'])
-
-    # Convert CSS background images in style attributes
-    for elem in content.find_all(style=True):
-        style = elem['style']
-        if 'url(' in style:
-            # Simple regex-free approach for common cases
-            import re
-            def replace_url(match):
-                url = match.group(1).strip('\'"')
-                if not urlparse(url).netloc:
-                    return f'url({urljoin(site_base, url)})'
-                return match.group(0)
-            elem['style'] = re.sub(r'url\(([^)]+)\)', replace_url, style)
+PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+SITE_CSS = Path(__file__).resolve().parents[2] / 'styles.css'
 
-    return content
+# Elements dropped from the email along with their content
+STRIP_TAGS = {
+    'script', 'style', 'noscript', 'template', 'nav', 'button', 'form',
+    'input', 'link', 'meta',
+}
+# Quarto chrome inside <main> that has no use in an email
+STRIP_CLASSES = {'anchorjs-link', 'code-copy-button'}
 
+# Colours from dimmery.scss. Web fonts are left out: few email clients load them.
+EMAIL_CSS = """
+a { color: #ba0020; }
+h1, h2, h3, h4, h5, h6 { line-height: 1.1; }
+img { max-width: 100%; height: auto; }
+figure { margin: 1em 0; }
+figcaption, .figure-caption { font-size: 0.9em; color: #777; }
+blockquote { margin: 1em 0; padding-left: 1em; border-left: 3px solid #dee2e6; color: #495057; }
+pre { background-color: #f8f9fa; padding: 0.75em; white-space: pre-wrap; word-wrap: break-word; }
+code { font-family: monospace; font-size: 0.9em; }
+table { border-collapse: collapse; }
+th, td { padding: 0.25em 0.5em; border-bottom: 1px solid #dee2e6; }
+.callout { margin: 1em 0; padding: 0.5em 1em; border-left: 4px solid #aaa; background-color: #f8f9fa; }
+"""
 
-def main():
-    if len(sys.argv) != 4:
-        print(
-            "Usage: prepare_email_html.py <html_file> <post_title> <post_url>",
-            file=sys.stderr
-        )
-        sys.exit(1)
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_COMPOUND_RE = re.compile(r'^([a-z][a-z0-9]*|\*)?((?:[.#][\w-]+)*)$', re.IGNORECASE)
+_URL_RE = re.compile(r'url\(([^)]+)\)')
+
+
+def _css_blocks(css):
+    """Yield (prelude, body) for each top-level rule, skipping @-rules."""
+    css = _COMMENT_RE.sub('', css)
+    depth, start, prelude = 0, 0, None
+    for i, ch in enumerate(css):
+        if ch == '{':
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                if not prelude.startswith('@'):
+                    yield prelude, css[start:i]
+                start = i + 1
+        elif ch == ';' and depth == 0:
+            start = i + 1  # e.g. @import / @charset
+
+
+def _parse_compound(text):
+    """(tag, classes, id) for a compound selector like `p.note#intro`."""
+    match = _COMPOUND_RE.match(text)
+    if not match or not text:
+        return None
+    tag = match.group(1)
+    parts = re.findall(r'[.#][\w-]+', match.group(2))
+    ids = [p[1:] for p in parts if p[0] == '#']
+    if len(ids) > 1:
+        return None
+    return (None if tag in (None, '*') else tag.lower(),
+            frozenset(p[1:] for p in parts if p[0] == '.'),
+            ids[0] if ids else None)
+
+
+def _parse_declarations(body):
+    declarations = {}
+    for item in body.split(';'):
+        prop, sep, value = item.partition(':')
+        if sep and prop.strip() and value.strip():
+            declarations[prop.strip().lower()] = value.strip()
+    return declarations
+
+
+class StyleSheet:
+    """Simple-selector CSS rules, indexed by their rightmost compound."""
+
+    def __init__(self, *sources):
+        self.by_tag, self.by_class, self.by_id, self.universal = {}, {}, {}, []
+        order = 0
+        for css in sources:
+            for prelude, body in _css_blocks(css):
+                declarations = _parse_declarations(body)
+                if not declarations:
+                    continue
+                for selector in prelude.split(','):
+                    compounds = [_parse_compound(part) for part in selector.split()]
+                    if not compounds or None in compounds:
+                        continue  # pseudo-classes, attributes, child combinators...
+                    specificity = (
+                        sum(c[2] is not None for c in compounds),
+                        sum(len(c[1]) for c in compounds),
+                        sum(c[0] is not None for c in compounds),
+                    )
+                    rule = (specificity, order, compounds, declarations)
+                    order += 1
+                    tag, classes, id_ = compounds[-1]
+                    if id_:
+                        self.by_id.setdefault(id_, []).append(rule)
+                    elif classes:
+                        self.by_class.setdefault(min(classes), []).append(rule)
+                    elif tag:
+                        self.by_tag.setdefault(tag, []).append(rule)
+                    else:
+                        self.universal.append(rule)
+
+    @staticmethod
+    def _matches(compound, tag):
+        name, classes, id_ = compound
+        return ((name is None or tag.name == name)
+                and classes.issubset(tag.get('class') or ())
+                and (id_ is None or tag.get('id') == id_))
+
+    def _matches_selector(self, compounds, tag):
+        if not self._matches(compounds[-1], tag):
+            return False
+        # Descendant combinators: find each earlier compound among ancestors
+        ancestor = tag.parent
+        for compound in reversed(compounds[:-1]):
+            while isinstance(ancestor, Tag) and not self._matches(compound, ancestor):
+                ancestor = ancestor.parent
+            if not isinstance(ancestor, Tag):
+                return False
+            ancestor = ancestor.parent
+        return True
+
+    def declarations_for(self, tag):
+        """Declarations that apply to `tag`, in cascade order."""
+        candidates = list(self.universal)
+        candidates += self.by_tag.get(tag.name, ())
+        for cls in tag.get('class') or ():
+            candidates += self.by_class.get(cls, ())
+        if tag.get('id'):
+            candidates += self.by_id.get(tag['id'], ())
+        merged = {}
+        for _, _, compounds, declarations in sorted(candidates, key=lambda rule: rule[:2]):
+            if self._matches_selector(compounds, tag):
+                merged.update(declarations)
+        return merged
 
-    html_file = sys.argv[1]
-    post_title = sys.argv[2]
-    post_url = sys.argv[3]
 
-    with open(html_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
+@lru_cache(maxsize=1)
+def default_stylesheet():
+    """Email defaults followed by the site's styles.css, if present."""
+    site_css = SITE_CSS.read_text(encoding='utf-8') if SITE_CSS.exists() else ''
+    return StyleSheet(EMAIL_CSS, site_css)
 
-    # Try to find the main content area
-    content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
+
+def _absolute(url, base_url):
+    if not url or url.startswith(('#', 'mailto:', 'data:')) or urlparse(url).netloc:
+        return url
+    return urljoin(base_url, url)
+
+
+def clean_content(content, post_url, stylesheet, image_hook=None):
+    """Strip, absolutize and inline-style `content` in a single walk.
+
+    `image_hook`, if given, is called with each <img> after its src has been
+    made absolute.
+    """
+    # Resolve against the post itself: Quarto writes a post's own images
+    # as paths relative to it (e.g. main-image.png)
+    def replace_url(match):
+        url = match.group(1).strip(' \'"')
+        return f'url({_absolute(url, post_url)})'
+
+    # Nodes removed from the tree (by id); their descendants are skipped.
+    # Checking this set is much cheaper than bs4's Tag.decomposed.
+    dropped = set()
+    kept = [content]
+    for node in list(content.descendants):
+        if id(node.parent) in dropped:
+            dropped.add(id(node))
+            continue
+        if isinstance(node, Comment):
+            node.extract()
+            continue
+        if not isinstance(node, Tag):
+            continue
+        if node.name in STRIP_TAGS or STRIP_CLASSES.intersection(node.get('class') or ()):
+            node.extract()
+            dropped.add(id(node))
+            continue
+        if node.name == 'picture':
+            # Email clients don't support <picture>: keep only its <img>,
+            # which the walk reaches next
+            img = node.find('img')
+            if img is not None:
+                node.replace_with(img.extract())
+            else:
+                node.extract()
+            dropped.add(id(node))
+            continue
+
+        if node.name == 'img':
+            node['src'] = _absolute(node.get('src'), post_url)
+            node.attrs.pop('srcset', None)
+            node.attrs.pop('loading', None)
+            if image_hook is not None:
+                image_hook(node)
+        elif node.name == 'a' and node.get('href'):
+            node['href'] = _absolute(node['href'], post_url)
+
+        declarations = stylesheet.declarations_for(node)
+        inline = node.get('style')
+        if inline:
+            # The element's own style wins over stylesheet rules
+            declarations.update(_parse_declarations(_URL_RE.sub(replace_url, inline)))
+        if declarations:
+            node['style'] = ';'.join(f'{prop}:{value}' for prop, value in declarations.items())
+        kept.append(node)
+
+    # Classes are still needed for descendant matching until the walk ends
+    for node in kept:
+        for attr in [a for a in node.attrs if a == 'class' or a.startswith('data-')]:
+            del node[attr]
+    return content
+
+
+def prepare_email_html(html, post_title, post_url, stylesheet=None, image_hook=None):
+    """Email body for a rendered post: header, reading note and content."""
+    # Quarto pages keep the post in <main>; building the tree for just that
+    # skips the head, navbar, sidebar and footer
+    soup = BeautifulSoup(html, PARSER, parse_only=SoupStrainer('main'))
+    content = soup.find('main')
+
+    if not content:
+        soup = BeautifulSoup(html, PARSER)
+        content = soup.find('article') or soup.find('div', class_='content')
 
     if not content:
         # Fallback to body if no main content found
@@ -64,8 +262,9 @@ def main():
         if not content:
             content = soup
 
-    # Convert all relative URLs to absolute URLs
-    content = convert_relative_urls(content, post_url)
+    content = clean_content(content, post_url, stylesheet or default_stylesheet(), image_hook)
+    if content.name == 'body':
+        content.name = 'div'
 
     # Create header with link to post
     header = soup.new_tag('div', style='margin-bottom: 2em;')
@@ -95,7 +294,19 @@ def main():
     # Add the main content
     wrapper.append(content)
 
-    print(str(wrapper))
+    return str(wrapper)
+
+
+def main():
+    if len(sys.argv) != 4:
+        print(
+            "Usage: prepare_email_html.py <html_file> <post_title> <post_url>",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        print(prepare_email_html(f.read(), sys.argv[2], sys.argv[3]))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,123 @@
+"""Publish a rendered post as a Listmonk campaign.
+
+Runs every step of the publishing workflow in one process: read the post's
+front matter, turn the rendered HTML into an email body, create the
+campaign, optionally send a test, then schedule or start it.
+"""
+
+import os
+from datetime import date
+from functools import partial
+
+from .build_campaign_payload import build_campaign_payload
+from .email_images import MediaUploader, resize_img, resolve_images
+from .extract_post_metadata import extract_post_metadata
+from .parse_send_time import parse_send_time
+from .prepare_email_html import prepare_email_html
+
+SITE_URL = 'https://ddimmery.com'
+POSTS_DIR = 'posts'
+SITE_DIR = '_site'
+
+
+def post_url(slug):
+    return f'{SITE_URL}/posts/{slug}/'
+
+
+def campaign_name(title, suffix=None):
+    """Campaign name: the title plus a suffix, or today's date."""
+    return f'{title} - {suffix or date.today().isoformat()}'
+
+
+def build_post_campaign(slug, list_ids, send_at_iso=None, campaign_name_suffix=None,
+                        from_email=None, tags=None, optimize_images=True,
+                        posts_dir=POSTS_DIR, site_dir=SITE_DIR):
+    """(metadata, payload) for a post whose HTML has already been rendered.
+
+    With `optimize_images`, the body references email-sized image variants
+    through placeholders that `resolve_images` fills in before sending.
+    """
+    post_path = os.path.join(posts_dir, slug, 'index.qmd')
+    if not os.path.exists(post_path):
+        raise FileNotFoundError(f'Post not found at {post_path}')
+    html_path = os.path.join(site_dir, 'posts', slug, 'index.html')
+    if not os.path.exists(html_path):
+        raise FileNotFoundError(f'Rendered HTML not found at {html_path}')
+
+    metadata = extract_post_metadata(post_path)
+    image_hook = partial(resize_img, site_url=SITE_URL, site_dir=site_dir) if optimize_images else None
+    with open(html_path, 'r', encoding='utf-8') as f:
+        body = prepare_email_html(f.read(), metadata['title'], post_url(slug), image_hook=image_hook)
+
+    payload = build_campaign_payload(
+        campaign_name(metadata['title'], campaign_name_suffix),
+        metadata['title'],
+        list_ids,
+        body,
+        from_email=from_email,
+        send_at=send_at_iso,
+        altbody=metadata['description'],
+        tags=tags,
+    )
+    return metadata, payload
+
+
+def start_campaign(client, campaign_id, scheduled, test_emails=None):
+    """Send an optional test, then schedule or start a draft campaign."""
+    if test_emails:
+        client.send_test(campaign_id, test_emails)
+
+    # A campaign with send_at only goes out once it's marked scheduled
+    status = 'scheduled' if scheduled else 'running'
+    client.set_status(campaign_id, status)
+    return status
+
+
+def publish_post(client, slug, list_ids, send_at=None, timezone='Europe/Berlin',
+                 campaign_name_suffix=None, from_email=None, test_emails=None,
+                 optimize_images=True, posts_dir=POSTS_DIR, site_dir=SITE_DIR):
+    """Create, optionally test, and schedule or start a campaign for a post.
+
+    Returns a dict describing the published campaign.
+    """
+    send_at_iso = parse_send_time(send_at, timezone) if send_at else None
+    metadata, payload = build_post_campaign(
+        slug, list_ids, send_at_iso, campaign_name_suffix, from_email,
+        optimize_images=optimize_images, posts_dir=posts_dir, site_dir=site_dir,
+    )
+    payload['body'] = resolve_images(payload['body'], MediaUploader(client))
+
+    campaign_id = client.create_campaign(payload)['id']
+    status = start_campaign(client, campaign_id, scheduled=bool(send_at_iso), test_emails=test_emails)
+
+    return {
+        'slug': slug,
+        'title': metadata['title'],
+        'campaign_id': campaign_id,
+        'campaign_url': f'{client.url}/campaigns/{campaign_id}',
+        'lists': list_ids,
+        'status': status,
+        'send_at': send_at_iso,
+        'send_at_input': f'{send_at} ({timezone})' if send_at else None,
+        'test_emails': test_emails or [],
+    }
+
+
+def summary_markdown(result):
+    """Markdown summary of a published campaign, for $GITHUB_STEP_SUMMARY."""
+    lines = [
+        '## Campaign Published Successfully! 🚀',
+        '',
+        f"**Post:** {result['title']}",
+        f"**Campaign ID:** {result['campaign_id']}",
+        f"**Lists:** {', '.join(map(str, result['lists']))}",
+    ]
+    if result['send_at']:
+        lines.append(f"**Scheduled for (UTC):** {result['send_at']}")
+        lines.append(f"**Original input:** {result['send_at_input']}")
+    else:
+        lines.append('**Status:** Sending immediately')
+    if result['test_emails']:
+        lines.append(f"**Test sent to:** {', '.join(result['test_emails'])}")
+    lines += ['', f"View campaign in Listmonk: {result['campaign_url']}"]
+    return '\n'.join(lines) + '\n'
@@ -1,16 +1,13 @@
-"""Report papers.yaml entries added since the last commit.
+"""Report papers.yaml entries added by the last Semantic Scholar sync.
 
-Run after `quarto render research.qmd` re-executes the Semantic Scholar sync
-(see `make papers`). New entries land with `visible: false`, so they need a
-manual opt-in before they appear on the Research page.
+Run after `scripts/semantic_scholar.py` syncs papers.yaml (see `make papers`).
+New entries land with `visible: false`, so they need a manual opt-in before
+they appear on the Research page.
 """
 
-import subprocess
 import sys
 
-import yaml
-
-YAML_FILE = "papers.yaml"
+from papers_store import YAML_FILE, load_snapshot
 
 GREEN = "\033[32m"
 YELLOW = "\033[33m"
@@ -18,33 +15,21 @@ DIM = "\033[2m"
 RESET = "\033[0m"
 
 
-def committed_entries():
-    """Load papers.yaml as of HEAD; empty dict if unavailable."""
-    try:
-        blob = subprocess.run(
-            ["git", "show", f"HEAD:{YAML_FILE}"],
-            capture_output=True,
-            text=True,
-            check=True,
-        ).stdout
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return {}
-    return yaml.safe_load(blob) or {}
-
-
 def main():
-    with open(YAML_FILE) as f:
-        current = yaml.safe_load(f) or {}
+    snapshot = load_snapshot()
+    if snapshot is None:
+        print(f"  {DIM}No sync recorded yet - run `make papers`{RESET}")
+        return 0
 
-    old = committed_entries()
-    added = {k: v for k, v in current.items() if k not in old}
+    added = snapshot["added"]
+    total = snapshot["total"]
 
     if not added:
-        print(f"  {DIM}No new papers ({len(current)} entries){RESET}")
+        print(f"  {DIM}No new papers ({total} entries){RESET}")
         return 0
 
     print(f"  {GREEN}{len(added)} new paper(s){RESET} "
-          f"{DIM}({len(old)} -> {len(current)} entries){RESET}\n")
+          f"{DIM}({total - len(added)} -> {total} entries){RESET}\n")
 
     for key, data in added.items():
         year = data.get("year") or "n.d."
@@ -54,6 +39,8 @@ def main():
         for field in ("published_url", "preprint", "pdf_url"):
             if data.get(field):
                 print(f"        {DIM}{field}: {data[field]}{RESET}")
+        if data.get("duplicate_of"):
+            print(f"        {YELLOW}likely duplicate of {data['duplicate_of']}{RESET}")
         state = "visible" if data.get("visible") else "hidden"
         print(f"        {DIM}key: {key}  ({state}){RESET}\n")
 
@@ -0,0 +1,110 @@
+"""Flag likely duplicates among papers.yaml entries.
+
+Semantic Scholar often lists a preprint and its published version as
+separate papers, so an unseen `paperId` isn't necessarily a new paper. An
+entry is flagged as a duplicate of an existing one if they share a DOI or
+arXiv id, or if their normalized titles are near-identical.
+
+Titles are compared with trigram Jaccard similarity. An inverted index from
+trigram to entries is probed with prefix filtering: a title within the
+threshold must share at least one of the query's rarest trigrams, so only
+those postings are read, and common trigrams ("the", "ing") that appear in
+most titles are never scanned.
+"""
+
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+from papers_store import arxiv_from_url, doi_from_url
+
+SIMILARITY_THRESHOLD = 0.85
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title):
+    """Lowercase ASCII title with punctuation and extra whitespace removed."""
+    title = unicodedata.normalize("NFKD", title or "")
+    title = title.encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_ALNUM_RE.sub(" ", title).strip()
+
+
+def trigrams(normalized):
+    """Set of character trigrams, padded so short titles still get some."""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Inverted trigram index over titles."""
+
+    def __init__(self):
+        self.grams = {}
+        self.postings = defaultdict(set)
+
+    def add(self, key, title):
+        grams = trigrams(normalize_title(title))
+        self.grams[key] = grams
+        for gram in grams:
+            self.postings[gram].add(key)
+
+    def candidates(self, grams, threshold):
+        """Keys that may be within `threshold` of a title with `grams`.
+
+        A match shares at least ceil(threshold * n) of the query's n
+        trigrams, so it must contain one of any n - ceil(threshold * n) + 1
+        of them; the rarest are probed, which keeps the postings read short.
+        """
+        # The epsilon keeps float error from shrinking the prefix
+        min_overlap = max(1, math.ceil(threshold * len(grams) - 1e-9))
+        rarest = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+        keys = set()
+        for gram in rarest[:len(grams) - min_overlap + 1]:
+            keys.update(self.postings.get(gram, ()))
+        return keys
+
+    def best_match(self, title, threshold=SIMILARITY_THRESHOLD):
+        """(key, similarity) of the most similar indexed title, or None."""
+        grams = trigrams(normalize_title(title))
+        if not grams:
+            return None
+        best = None
+        for key in self.candidates(grams, threshold):
+            other = self.grams[key]
+            # Jaccard can't reach the threshold if the sizes are too far apart
+            if not threshold * len(grams) <= len(other) <= len(grams) / threshold:
+                continue
+            score = len(grams & other) / len(grams | other)
+            if score >= threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+
+class DuplicateFinder:
+    """Matches candidate entries against a PapersStore."""
+
+    def __init__(self, store, threshold=SIMILARITY_THRESHOLD):
+        self.store = store
+        self.threshold = threshold
+        self.titles = TitleIndex()
+        for key, entry in store.entries.items():
+            self.titles.add(key, entry.get("title"))
+
+    def add(self, key, entry):
+        """Index an entry added after construction."""
+        self.titles.add(key, entry.get("title"))
+
+    def find(self, entry):
+        """(key, reason) of an existing entry `entry` likely duplicates, or None."""
+        doi = doi_from_url(entry.get("published_url"))
+        if doi and doi in self.store.by_doi:
+            return self.store.by_doi[doi], f"same DOI ({doi})"
+        arxiv = arxiv_from_url(entry.get("preprint"))
+        if arxiv and arxiv in self.store.by_arxiv:
+            return self.store.by_arxiv[arxiv], f"same arXiv id ({arxiv})"
+        match = self.titles.best_match(entry.get("title"), self.threshold)
+        if match:
+            return match[0], f"similar title ({match[1]:.0%})"
+        return None
@@ -0,0 +1,134 @@
+"""Indexed, append-only access to papers.yaml.
+
+`PapersStore` parses the file once and indexes entries by Semantic Scholar
+id, DOI and arXiv id. New entries are appended to the end of the existing
+text instead of re-dumping the whole mapping, so hand-written comments and
+formatting survive a sync.
+
+Each save also writes a snapshot of what the sync added (see
+`scripts/new_papers.py`), so reporting needs neither git nor a second parse
+of papers.yaml.
+"""
+
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+YAML_FILE = Path("papers.yaml")
+SNAPSHOT_FILE = Path(".cache/papers-last-sync.json")
+
+DOI_RE = re.compile(r"doi\.org/(10\.[^\s?#]+)", re.IGNORECASE)
+ARXIV_RE = re.compile(r"arxiv\.org/(?:abs|pdf)/([^\s?#]+?)(?:v\d+)?(?:\.pdf)?$", re.IGNORECASE)
+
+
+def doi_from_url(url):
+    """Normalized DOI from a doi.org URL, or None."""
+    match = DOI_RE.search(url or "")
+    return match.group(1).lower().rstrip("/") if match else None
+
+
+def arxiv_from_url(url):
+    """Unversioned arXiv id from an arxiv.org abs/pdf URL, or None."""
+    match = ARXIV_RE.search(url or "")
+    return match.group(1).lower() if match else None
+
+
+class PapersStore:
+    """papers.yaml, loaded once, with lookup indexes."""
+
+    def __init__(self, path=YAML_FILE):
+        self.path = Path(path)
+        self.text = self.path.read_text(encoding="utf-8") if self.path.exists() else ""
+        self.entries = yaml.safe_load(self.text) or {}
+        self.added = {}
+        self.by_ssid = {}
+        self.by_doi = {}
+        self.by_arxiv = {}
+        self._key_counters = {}
+        for key, entry in self.entries.items():
+            self._index(key, entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _index(self, key, entry):
+        if entry.get("ssid"):
+            self.by_ssid[entry["ssid"]] = key
+        doi = doi_from_url(entry.get("published_url"))
+        if doi:
+            self.by_doi.setdefault(doi, key)
+        arxiv = arxiv_from_url(entry.get("preprint"))
+        if arxiv:
+            self.by_arxiv.setdefault(arxiv, key)
+
+    def find(self, ssid=None, doi=None, arxiv=None):
+        """Key of an existing entry matching any of the given ids, or None."""
+        if ssid and ssid in self.by_ssid:
+            return self.by_ssid[ssid]
+        if doi and doi.lower() in self.by_doi:
+            return self.by_doi[doi.lower()]
+        if arxiv and arxiv.lower() in self.by_arxiv:
+            return self.by_arxiv[arxiv.lower()]
+        return None
+
+    def unique_key(self, base):
+        """`base`, or `base_N` with the first free N."""
+        if base not in self.entries:
+            return base
+        # Remember where the last probe for this base ended
+        n = self._key_counters.get(base, 1)
+        while f"{base}_{n}" in self.entries:
+            n += 1
+        self._key_counters[base] = n + 1
+        return f"{base}_{n}"
+
+    def add(self, base_key, entry):
+        """Add an entry under a unique key derived from `base_key`."""
+        key = self.unique_key(base_key)
+        self.entries[key] = entry
+        self.added[key] = entry
+        self._index(key, entry)
+        return key
+
+    def save(self):
+        """Append entries added since loading to the file, then snapshot them."""
+        if self.added:
+            chunk = yaml.dump(self.added, default_flow_style=False, sort_keys=False)
+            text = self.text
+            if text and not text.endswith("\n"):
+                text += "\n"
+            text += chunk
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.text = text
+        write_snapshot(self.added, len(self.entries))
+        self.added = {}
+
+
+def write_snapshot(added, total, path=SNAPSHOT_FILE):
+    """Record the entries the latest sync added."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {
+        "synced_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total": total,
+        "added": added,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2)
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """The latest sync snapshot, or None if there hasn't been one."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
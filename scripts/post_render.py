@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Quarto post-render entry point: run each step in order and time it.
+
+The steps are the modules in `STEPS`, run in this one process so each
+doesn't pay for its own interpreter start-up. A `post-render: <step>
+<seconds>s` line is printed after each one, which shows up in every
+build log and is what scripts/render_profile.py reads.
+"""
+
+import importlib
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Order matters: fingerprinting hashes the final, purged and subset bytes
+STEPS = ["responsive_images", "purge_assets", "subset_fonts", "fingerprint_assets"]
+
+
+def main():
+    for name in STEPS:
+        start = time.perf_counter()
+        code = importlib.import_module(name).main()
+        print(f"post-render: {name} {time.perf_counter() - start:.2f}s", flush=True)
+        if code:
+            return code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
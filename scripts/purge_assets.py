@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Purge unused CSS and minify CSS/JS in the rendered site.
+
+Runs as a Quarto post-render step on full renders (replacing purge-css.sh
+and its purgecss/uglifyjs/uglifycss Node tools):
+
+1. Every HTML and JS file in `_site` is read once to collect the tokens
+   that could name a selector (the same kind of extraction purgecss does).
+2. Each stylesheet drops rules whose class, id or type selectors never
+   appear in those tokens, then is minified. JS is minified with rjsmin
+   when it's installed and otherwise left as is.
+3. Files with identical content (e.g. vendored libraries copied into
+   several `site_libs`) are processed once, across a process pool.
+
+Results are cached in `.cache/purge-assets/`. A stylesheet's cache key
+covers its content and the subset of used tokens it can match, so an edit
+to an unrelated page doesn't invalidate it.
+
+    python scripts/purge_assets.py [--site _site] [--force] [--workers N]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SITE_DIR = Path("_site")
+CACHE_DIR = Path(".cache/purge-assets")
+# Written by fingerprint_assets.py on an earlier run
+FINGERPRINTED_DIR = "assets"
+
+# Identifiers as purgecss's default extractor sees them
+TOKEN_RE = re.compile(r"[\w/:-]+")
+# At-rules whose blocks contain ordinary rules to purge
+NESTED_AT_RULES = ("@media", "@supports", "@layer", "@container", "@document")
+
+_PSEUDO_RE = re.compile(r"(?<!\\)::?[\w-]+(?:\([^()]*(?:\([^()]*\)[^()]*)*\))?")
+_ATTRIBUTE_RE = re.compile(r"\[[^\]]*\]")
+_IDENT_RE = re.compile(r"([.#]?)((?:[\w-]|\\.)+)")
+_STRING_OR_COMMENT_RE = re.compile(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*.*?\*/", re.DOTALL)
+_SPECIAL_RE = re.compile(_STRING_OR_COMMENT_RE.pattern + r"|[{};]", re.DOTALL)
+_SPACE_RE = re.compile(r"\s+")
+_PUNCT_SPACE_RE = re.compile(r"\s*([{};,>])\s*")
+# A colon whose next brace closes a block is in a declaration; in a selector,
+# "a :hover" and "a:hover" differ
+_DECLARATION_COLON_RE = re.compile(r"\s*:\s*(?=[^{}]*})")
+# Strings and /*! comments are swapped for these while whitespace is squeezed
+_STRING_MARK, _COMMENT_MARK = "\x00", "\x01"
+_MARK_RE = re.compile(r"\s*\x01(\d+)\x01\s*|\x00(\d+)\x00")
+
+# Set in each worker process by _init_worker
+_used = frozenset()
+_code_hash = ""
+
+
+def code_hash():
+    """Hash of this module, so changing the purge logic invalidates the cache."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+# -- scanning -----------------------------------------------------------
+
+
+def site_files(site_dir):
+    """(html, css, js, fingerprinted js) file lists under `site_dir`, from one walk.
+
+    Fingerprinted assets are final, so they are only scanned for tokens:
+    changing them in place would defeat their caching.
+    """
+    html, css, js, fingerprinted = [], [], [], []
+    fingerprinted_dir = Path(site_dir) / FINGERPRINTED_DIR
+    for root, _, files in os.walk(site_dir):
+        final = Path(root) == fingerprinted_dir
+        for name in files:
+            path = Path(root) / name
+            if name.endswith(".html"):
+                html.append(path)
+            elif name.endswith(".css") and not final:
+                css.append(path)
+            elif name.endswith(".js"):
+                (fingerprinted if final else js).append(path)
+    return html, css, js, fingerprinted
+
+
+def used_tokens(paths):
+    """Every selector-like token in the given content files."""
+    tokens = set()
+    for path in paths:
+        tokens.update(TOKEN_RE.findall(path.read_text(encoding="utf-8", errors="ignore")))
+    # `md:flex` in markup can be matched by `.md\:flex`; so can `md` and `flex`
+    for token in [t for t in tokens if ":" in t or "/" in t]:
+        tokens.update(filter(None, re.split(r"[/:]", token)))
+    return tokens
+
+
+# -- CSS ----------------------------------------------------------------
+
+
+def _blocks(css):
+    """Split CSS into top-level items: (prelude, body) or (text, None).
+
+    Strings and comments are skipped when matching braces; `/*!` comments
+    at the top level are kept as items, other comments are dropped.
+    """
+    items, depth, start, prelude = [], 0, 0, None
+    pos = 0
+    while True:
+        match = _SPECIAL_RE.search(css, pos)
+        if match is None:
+            break
+        i, token = match.start(), match.group(0)
+        pos = match.end()
+        if token in ("{", "}", ";"):
+            if token == "{":
+                if depth == 0:
+                    prelude, start = css[start:i].strip(), pos
+                depth += 1
+            elif token == "}":
+                depth -= 1
+                if depth == 0:
+                    items.append((prelude, css[start:i]))
+                    start = pos
+            elif depth == 0:
+                statement = css[start:i].strip()  # @import, @charset...
+                if statement:
+                    items.append((statement + ";", None))
+                start = pos
+        elif depth == 0 and token.startswith("/*"):
+            if token.startswith("/*!"):
+                items.append((token, None))
+            start = pos
+    return items
+
+
+def selector_identifiers(selector):
+    """Class, id and type names a selector needs present in the content."""
+    selector = _ATTRIBUTE_RE.sub(" ", _PSEUDO_RE.sub(" ", selector))
+    names = []
+    for prefix, name in _IDENT_RE.findall(selector):
+        name = name.replace("\\", "")
+        if prefix or not name[0].isdigit():  # skip `50%` etc. in keyframe-ish preludes
+            names.append(name)
+    return names
+
+
+def selector_used(selector, used):
+    return all(name in used for name in selector_identifiers(selector))
+
+
+def purge_css(css, used):
+    """CSS with rules dropped whose selectors can't match the content."""
+    out = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            out.append(prelude)
+        elif prelude.startswith("@"):
+            if prelude.lower().startswith(NESTED_AT_RULES):
+                inner = purge_css(body, used)
+                if inner.strip():
+                    out.append(f"{prelude}{{{inner}}}")
+            else:
+                out.append(f"{prelude}{{{body}}}")  # @font-face, @keyframes, ...
+        else:
+            kept = [s.strip() for s in prelude.split(",") if selector_used(s, used)]
+            if kept:
+                out.append(f"{','.join(kept)}{{{body}}}")
+    return "\n".join(out)
+
+
+def minify_css(css):
+    """Whitespace- and comment-free CSS; strings and /*! comments are kept.
+
+    Returns `css` itself if minifying wouldn't make it any smaller.
+    """
+    kept = []
+
+    def mark(match):
+        token = match.group(0)
+        if token.startswith("/*") and not token.startswith("/*!"):
+            # Comments still separate tokens: 0/**/auto isn't 0auto
+            return " "
+        kept.append(token)
+        sentinel = _COMMENT_MARK if token.startswith("/*") else _STRING_MARK
+        return f"{sentinel}{len(kept) - 1}{sentinel}"
+
+    text = _SPACE_RE.sub(" ", _STRING_OR_COMMENT_RE.sub(mark, css))
+    # Spaces around + and ~ are kept: calc() needs them
+    text = _PUNCT_SPACE_RE.sub(r"\1", text)
+    text = _DECLARATION_COLON_RE.sub(":", text).replace(": ", ":").replace(";}", "}").strip()
+
+    def unmark(match):
+        if match.group(2) is not None:
+            return kept[int(match.group(2))]
+        # Whitespace around a kept comment only matters between two tokens
+        # that would otherwise merge, e.g. in "a /*! x */ b"
+        before = match.string[match.start() - 1:match.start()]
+        after = match.string[match.end():match.end() + 1]
+        spaced = match.group(0) != match.group(0).strip()
+        separate = spaced and before and after and before not in "{};,>" and after not in "{};,>"
+        return kept[int(match.group(1))] + (" " if separate else "")
+
+    minified = _MARK_RE.sub(unmark, text)
+    return minified if len(minified) < len(css) else css
+
+
+def relevant_tokens(css, used):
+    """The used tokens that could affect how `css` is purged."""
+    candidates = set()
+    for match in _IDENT_RE.finditer(css):
+        candidates.add(match.group(2).replace("\\", ""))
+    return sorted(candidates & used)
+
+
+# -- JS -----------------------------------------------------------------
+
+
+def minify_js(js):
+    """Minified JS via rjsmin, or the input unchanged if it isn't installed."""
+    try:
+        import rjsmin
+    except ImportError:
+        return js
+    return rjsmin.jsmin(js)
+
+
+# -- workers ------------------------------------------------------------
+
+
+def _init_worker(used, module_hash):
+    global _used, _code_hash
+    _used = frozenset(used)
+    _code_hash = module_hash
+
+
+def _cached(kind, key, produce, cache_dir):
+    cache_file = Path(cache_dir) / f"{key}.{kind}"
+    if cache_file.exists():
+        return cache_file.read_text(encoding="utf-8")
+    result = produce()
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+    tmp.write_text(result, encoding="utf-8")
+    os.replace(tmp, cache_file)
+    return result
+
+
+def process_css(args):
+    """(content hash, processed text) for one unique stylesheet."""
+    digest, css, minify, cache_dir = args
+    tokens = relevant_tokens(css, _used)
+    key = hashlib.sha256(
+        "\0".join([_code_hash, digest, str(minify)] + tokens).encode("utf-8")
+    ).hexdigest()
+
+    def produce():
+        purged = purge_css(css, _used)
+        return minify_css(purged) if minify else purged
+
+    return digest, _cached("css", key, produce, cache_dir)
+
+
+def process_js(args):
+    """(content hash, minified text) for one unique script."""
+    digest, js, cache_dir = args
+    key = hashlib.sha256(f"{_code_hash}\0{digest}".encode("utf-8")).hexdigest()
+    return digest, _cached("js", key, lambda: minify_js(js), cache_dir)
+
+
+# -- driver -------------------------------------------------------------
+
+
+def unique_contents(paths):
+    """{content hash: (text, [paths])} so identical files are handled once."""
+    groups = {}
+    for path in paths:
+        text = path.read_text(encoding="utf-8", errors="surrogateescape")
+        digest = hashlib.sha256(text.encode("utf-8", errors="surrogateescape")).hexdigest()
+        groups.setdefault(digest, (text, []))[1].append(path)
+    return groups
+
+
+def write_results(groups, results):
+    """Write each processed text back to its files; returns bytes saved."""
+    saved = 0
+    for digest, (text, paths) in groups.items():
+        result = results.get(digest, text)
+        if result == text:
+            continue
+        for path in paths:
+            path.write_text(result, encoding="utf-8", errors="surrogateescape")
+            saved += len(text.encode("utf-8", errors="surrogateescape")) - len(result.encode("utf-8", errors="surrogateescape"))
+    return saved
+
+
+def purge_site(site_dir=SITE_DIR, cache_dir=CACHE_DIR, workers=None):
+    site_dir = Path(site_dir)
+    html, css, js, fingerprinted = site_files(site_dir)
+    used = used_tokens(html + js + fingerprinted)
+
+    css_groups = unique_contents(css)
+    # Already-minified and font-data scripts are left alone, as before
+    js_groups = unique_contents(
+        [p for p in js if ".min." not in p.name and not p.name.startswith("vfs_fonts")]
+    )
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(used, code_hash())) as pool:
+        css_jobs = [
+            (digest, text, not any(".min." in p.name for p in paths), cache_dir)
+            for digest, (text, paths) in css_groups.items()
+        ]
+        js_jobs = [(digest, text, cache_dir) for digest, (text, _) in js_groups.items()]
+        css_results = dict(pool.map(process_css, css_jobs))
+        js_results = dict(pool.map(process_js, js_jobs))
+
+    css_saved = write_results(css_groups, css_results)
+    js_saved = write_results(js_groups, js_results)
+    print(f"Purged {len(css)} CSS file(s) ({len(css_groups)} unique) and minified "
+          f"{sum(len(p) for _, p in js_groups.values())} JS file(s) ({len(js_groups)} unique) "
+          f"using {len(html)} page(s): {(css_saved + js_saved) / 1024:.0f} KiB saved")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Purge unused CSS and minify CSS/JS in the rendered site.")
+    parser.add_argument("--site", type=Path, default=SITE_DIR, help="rendered site directory")
+    parser.add_argument("--force", action="store_true", help="run even on partial renders")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    # Partial renders don't produce every page, so the used-selector set
+    # would be incomplete
+    if not args.force and not os.environ.get("QUARTO_PROJECT_RENDER_ALL"):
+        return 0
+    if not args.site.is_dir():
+        print(f"{args.site} not found", file=sys.stderr)
+        return 1
+    purge_site(args.site, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Render only the pages affected by changes since the last render.
+
+Each page depends on its own source, any extra inputs listed in
+`PAGE_INPUTS`, and (for posts) every file in its post directory. Changes
+are found by comparing file hashes with the state saved by the last
+successful run in `.cache/render-state.json`, or with `--since REF` from
+`git diff`. Then:
+
+- a change to a site-wide input (`GLOBAL_INPUTS`), a deleted page, or a
+  missing `_site` or state file triggers a full `quarto render`
+- otherwise each affected page is rendered on its own, followed by the
+  listing pages (and so the RSS feed) if any post changed, and then the
+  purge/fingerprint post-render steps, which Quarto only runs on full
+  renders
+
+Frozen computations are reused as usual, so a prose edit to one post
+re-executes nothing.
+
+    python scripts/render.py [--since REF] [--full] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SITE_DIR = ROOT / "_site"
+STATE_FILE = ROOT / ".cache/render-state.json"
+
+# Inputs that affect every page; any change means a full render
+GLOBAL_INPUTS = [
+    "_quarto.yml", "dimmery.scss", "styles.css", "includes.html", "fonts.css", "fonts/",
+    "scripts/post_render.py", "scripts/responsive_images.py", "scripts/purge_assets.py",
+    "scripts/subset_fonts.py", "scripts/fingerprint_assets.py",
+]
+# Inputs shared by every post (and so by the listings)
+POST_INPUTS = ["posts/_metadata.yml"]
+# Extra inputs of individual pages, besides the page source itself
+PAGE_INPUTS = {
+    "research.qmd": ["papers.yaml", "publications.py", "icon_utils.py", "scripts/generate_pages.py"],
+    "software.qmd": ["software.yaml", "icon_utils.py", "scripts/generate_pages.py"],
+}
+# Pages whose listings (and feeds) include every post
+LISTING_PAGES = ["blog.qmd"]
+# Post-render steps Quarto skips on partial renders; run once at the end
+POST_RENDER_STEPS = ["scripts/purge_assets.py", "scripts/subset_fonts.py", "scripts/fingerprint_assets.py"]
+
+
+def _matches(path, prefixes):
+    return any(path == p or (p.endswith("/") and path.startswith(p)) for p in prefixes)
+
+
+def _is_page(path):
+    """Whether `path` is a page source: a root .qmd file or a post."""
+    parts = path.split("/")
+    return (len(parts) == 1 and path.endswith(".qmd")) or (
+        len(parts) == 3 and parts[0] == "posts" and parts[2] == "index.qmd")
+
+
+def project_files():
+    """Tracked and untracked (but not ignored) files, relative to ROOT."""
+    out = subprocess.run(
+        ["git", "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return sorted({p for p in out.split("\0") if p and (ROOT / p).is_file()})
+
+
+def affected_pages(path, all_pages):
+    """Pages that depend on `path`, or None if it affects the whole site."""
+    if _matches(path, GLOBAL_INPUTS):
+        return None
+    if _matches(path, POST_INPUTS):
+        return {p for p in all_pages if p.startswith("posts/")}
+    affected = {page for page, inputs in PAGE_INPUTS.items() if path in inputs}
+    if path in all_pages:
+        affected.add(path)
+    elif path.startswith("posts/"):
+        post = "/".join(path.split("/")[:2]) + "/index.qmd"
+        if post in all_pages:
+            affected.add(post)
+    return affected
+
+
+# -- change detection ---------------------------------------------------
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def hash_files(files, previous=None):
+    """{path: [mtime_ns, size, sha256]}, reusing unchanged entries from `previous`."""
+    previous = previous or {}
+    hashes = {}
+    for rel in files:
+        stat = (ROOT / rel).stat()
+        old = previous.get(rel)
+        if old and old[0] == stat.st_mtime_ns and old[1] == stat.st_size:
+            hashes[rel] = old
+        else:
+            digest = hashlib.sha256((ROOT / rel).read_bytes()).hexdigest()
+            hashes[rel] = [stat.st_mtime_ns, stat.st_size, digest]
+    return hashes
+
+
+def changes_from_hashes(previous, current):
+    """(changed, deleted) paths between two hash states."""
+    changed = [p for p, entry in current.items() if p not in previous or previous[p][2] != entry[2]]
+    deleted = [p for p in previous if p not in current]
+    return changed, deleted
+
+
+def changes_from_git(ref):
+    """(changed, deleted) paths between `ref` and the working tree."""
+    out = subprocess.run(
+        ["git", "diff", "--name-status", "--no-renames", "-z", ref],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split("\0")
+    changed, deleted = [], []
+    for status, path in zip(out[::2], out[1::2]):
+        (deleted if status == "D" else changed).append(path)
+    untracked = subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard", "-z"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    changed += [p for p in untracked.split("\0") if p]
+    return changed, deleted
+
+
+def plan(changed, deleted, all_pages):
+    """Pages to render, or None for a full render (with the reason)."""
+    if any(_is_page(p) or _matches(p, GLOBAL_INPUTS) for p in deleted):
+        return None, "a page or site-wide input was deleted"
+    targets = set()
+    for path in changed + deleted:
+        affected = affected_pages(path, all_pages)
+        if affected is None:
+            return None, f"{path} affects every page"
+        targets |= affected
+    if any(p.startswith("posts/") for p in targets):
+        targets |= set(LISTING_PAGES)
+    # One `quarto render` per page costs a project load each time
+    if len(targets) > len(all_pages) // 2:
+        return None, f"{len(targets)} of {len(all_pages)} pages affected"
+    # Posts first, so the listings see their final metadata
+    return sorted(targets, key=lambda p: (p in LISTING_PAGES, p)), None
+
+
+# -- rendering ----------------------------------------------------------
+
+
+def run(command):
+    print(f"$ {' '.join(command)}", flush=True)
+    subprocess.run(command, cwd=ROOT, check=True)
+
+
+def render(targets, dry_run=False):
+    """Render the given pages (all of them if None)."""
+    if targets is None:
+        if not dry_run:
+            run(["quarto", "render"])
+        return
+    for page in targets:
+        print(f"  {page}")
+    if dry_run:
+        return
+    for page in targets:
+        run(["quarto", "render", page])
+    for step in POST_RENDER_STEPS:
+        run([sys.executable, step, "--force"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render only the pages affected by recent changes.")
+    parser.add_argument("--since", metavar="REF", help="find changes with git diff against REF instead of file hashes")
+    parser.add_argument("--full", action="store_true", help="render the whole site")
+    parser.add_argument("--dry-run", action="store_true", help="show what would be rendered")
+    args = parser.parse_args(argv)
+
+    state = load_state()
+    files = project_files()
+    current = hash_files(files, (state or {}).get("files"))
+    all_pages = [p for p in files if _is_page(p)]
+
+    if args.full:
+        targets, reason = None, "--full"
+    elif not SITE_DIR.is_dir():
+        targets, reason = None, "_site does not exist"
+    elif args.since:
+        targets, reason = plan(*changes_from_git(args.since), all_pages)
+    elif state is None:
+        targets, reason = None, "no previous render state"
+    else:
+        targets, reason = plan(*changes_from_hashes(state["files"], current), all_pages)
+
+    if targets is None:
+        print(f"Full render: {reason}")
+    elif not targets:
+        print("Nothing to render")
+    else:
+        print(f"Rendering {len(targets)} of {len(all_pages)} page(s):")
+
+    try:
+        if targets is None or targets:
+            render(targets, args.dry_run)
+    except subprocess.CalledProcessError as e:
+        print(f"Render failed: {e}", file=sys.stderr)
+        return e.returncode or 1
+
+    if not args.dry_run:
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"files": current}, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Run a full `quarto render` and report where the time goes.
+
+Quarto's output is read as it streams, with each chunk timestamped:
+
+- `[ n/N] page.qmd` lines mark where each page starts. A page's time runs
+  until the next page starts, or until post-render begins for the last one.
+- `Starting <lang> kernel...Done` gives the kernel start time. Any kernel,
+  `Executing` or knitr `processing file` output means the page's code ran.
+  A page with a `_freeze` entry that didn't run is a freeze hit.
+- `post-render: <step> <seconds>s` lines from scripts/post_render.py time
+  each post-render step.
+
+Output size is the page's HTML, plus for posts everything else in the
+post's output directory.
+
+The report is written as JSON (by default to `.cache/render-profile.json`,
+which CI keeps between runs). It is printed as Markdown alongside a
+comparison with the previous report, flagging pages and steps that got
+slower by more than `--threshold` (and at least a second). A page whose
+freeze state changed is reported but not flagged, since executing code is
+expected to be slow.
+
+    python scripts/render_profile.py [--output PATH] [--previous PATH] [--threshold 0.25] [--fail-on-regression]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SITE_DIR = ROOT / "_site"
+FREEZE_DIR = ROOT / "_freeze"
+REPORT_FILE = ROOT / ".cache/render-profile.json"
+# Regressions smaller than this are timing noise
+MIN_REGRESSION_SECONDS = 1.0
+
+_PAGE_RE = re.compile(r"^\[\s*\d+/\d+\]\s+(\S.*?)\s*$")
+_KERNEL_START_RE = re.compile(r"Starting \S+ kernel\.\.\.")
+_EXECUTION_RE = re.compile(r"Starting \S+ kernel|^Executing '|processing file:")
+_POST_RENDER_RE = re.compile(r"^post-render: (\S+) ([\d.]+)s$")
+
+
+class RenderLog:
+    """Per-page and per-step timings collected from Quarto's output."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.pages = {}  # page -> {"start", "end", "kernel_seconds", "executed"}
+        self.steps = {}  # post-render step -> seconds
+        self.current = None
+        self.first_page_at = None
+        self.post_render_at = None
+        self._kernel_started = None
+
+    def partial(self, text, now):
+        """Note the start of a kernel from a line that hasn't finished yet."""
+        if self.current and self._kernel_started is None and _KERNEL_START_RE.search(text):
+            self._kernel_started = now
+
+    def line(self, text, now):
+        match = _PAGE_RE.match(text)
+        if match:
+            self._end_page(now)
+            self.current = match.group(1)
+            self.pages[self.current] = {"start": now, "end": None, "kernel_seconds": None, "executed": False}
+            self.first_page_at = self.first_page_at or now
+            return
+        match = _POST_RENDER_RE.match(text)
+        if match:
+            seconds = float(match.group(2))
+            if self.post_render_at is None:
+                # Each step reports when it finishes; the first one started
+                # when the pages were done
+                self.post_render_at = now - seconds
+                self._end_page(self.post_render_at)
+            self.steps[match.group(1)] = seconds
+            return
+        if self.current is None:
+            return
+        page = self.pages[self.current]
+        self.partial(text, now)
+        if self._kernel_started is not None and "Done" in text and _KERNEL_START_RE.search(text):
+            page["kernel_seconds"] = now - self._kernel_started
+            self._kernel_started = None
+        if _EXECUTION_RE.search(text):
+            page["executed"] = True
+
+    def _end_page(self, now):
+        if self.current is not None and self.pages[self.current]["end"] is None:
+            self.pages[self.current]["end"] = now
+        self.current = None
+        self._kernel_started = None
+
+    def finish(self, now):
+        self._end_page(self.post_render_at or now)
+        self.end = now
+
+
+def run_quarto(command, log):
+    """Run `command`, echoing and timestamping its output into `log`."""
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    pending = b""
+    while chunk := os.read(process.stdout.fileno(), 65536):
+        now = time.perf_counter()
+        sys.stdout.buffer.write(chunk)
+        sys.stdout.flush()
+        *lines, pending = (pending + chunk).split(b"\n")
+        for raw in lines:
+            log.line(raw.decode("utf-8", errors="replace").rstrip("\r"), now)
+        log.partial(pending.decode("utf-8", errors="replace"), now)
+    if pending:
+        log.line(pending.decode("utf-8", errors="replace"), time.perf_counter())
+    returncode = process.wait()
+    log.finish(time.perf_counter())
+    return returncode
+
+
+# -- report -------------------------------------------------------------
+
+
+def output_bytes(page):
+    """Size of a page's rendered output."""
+    html = SITE_DIR / Path(page).with_suffix(".html")
+    if page.startswith("posts/"):
+        return sum(p.stat().st_size for p in html.parent.rglob("*") if p.is_file())
+    return html.stat().st_size if html.exists() else 0
+
+
+def has_freeze(page):
+    return (FREEZE_DIR / Path(page).with_suffix("")).is_dir()
+
+
+def build_report(log):
+    pages = {}
+    for page, entry in log.pages.items():
+        if entry["executed"]:
+            freeze = "miss" if has_freeze(page) else "executed"
+        else:
+            freeze = "hit" if has_freeze(page) else "n/a"
+        pages[page] = {
+            "seconds": round(entry["end"] - entry["start"], 3),
+            "kernel_seconds": None if entry["kernel_seconds"] is None else round(entry["kernel_seconds"], 3),
+            "freeze": freeze,
+            "output_bytes": output_bytes(page),
+        }
+    first_page = log.first_page_at or log.end
+    return {
+        "total_seconds": round(log.end - log.start, 3),
+        "startup_seconds": round(first_page - log.start, 3),
+        "pages": dict(sorted(pages.items(), key=lambda item: -item[1]["seconds"])),
+        "post_render": log.steps,
+    }
+
+
+def compare(previous, current, threshold):
+    """Rows of (kind, name, old seconds, new seconds, note) worth reporting."""
+    rows = []
+
+    def check(kind, name, old, new, note=""):
+        if old is None:
+            return
+        slower = new - old
+        if note:
+            rows.append((kind, name, old, new, note))
+        elif slower > MIN_REGRESSION_SECONDS and slower > threshold * old:
+            rows.append((kind, name, old, new, "regression"))
+
+    check("total", "quarto render", previous.get("total_seconds"), current["total_seconds"])
+    for page, entry in current["pages"].items():
+        old = previous.get("pages", {}).get(page)
+        if old is not None:
+            note = f"freeze {old['freeze']} -> {entry['freeze']}" if old["freeze"] != entry["freeze"] else ""
+            check("page", page, old["seconds"], entry["seconds"], note)
+    for step, seconds in current["post_render"].items():
+        check("post-render", step, previous.get("post_render", {}).get(step), seconds)
+    return rows
+
+
+def report_markdown(report, comparison=None, limit=15):
+    """Markdown summary, for the terminal or $GITHUB_STEP_SUMMARY."""
+    lines = [
+        "## Render profile",
+        "",
+        f"Total {report['total_seconds']:.1f}s, of which {report['startup_seconds']:.1f}s "
+        "before the first page (start-up and pre-render).",
+        "",
+        "| Page | Time | Kernel start | Freeze | Output |",
+        "|---|---:|---:|---|---:|",
+    ]
+    for page, entry in list(report["pages"].items())[:limit]:
+        kernel = "" if entry["kernel_seconds"] is None else f"{entry['kernel_seconds']:.1f}s"
+        lines.append(f"| `{page}` | {entry['seconds']:.1f}s | {kernel} | {entry['freeze']} "
+                     f"| {entry['output_bytes'] / 1024:.0f} KiB |")
+    if len(report["pages"]) > limit:
+        lines.append(f"| ...and {len(report['pages']) - limit} more | | | | |")
+    if report["post_render"]:
+        lines += ["", "| Post-render step | Time |", "|---|---:|"]
+        lines += [f"| `{step}` | {seconds:.2f}s |" for step, seconds in report["post_render"].items()]
+    if comparison is not None:
+        lines += ["", "### Compared with the previous run", ""]
+        if comparison:
+            lines += ["| | Name | Before | After | |", "|---|---|---:|---:|---|"]
+            lines += [f"| {kind} | `{name}` | {old:.1f}s | {new:.1f}s | {note} |"
+                      for kind, name, old, new, note in comparison]
+        else:
+            lines.append("No regressions.")
+    return "\n".join(lines) + "\n"
+
+
+def load_report(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the site and report per-page and post-render timings.")
+    parser.add_argument("--output", type=Path, default=REPORT_FILE, help="where to write the JSON report")
+    parser.add_argument("--previous", type=Path, help="report to compare against (default: --output before this run)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slow-down that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit non-zero if anything regressed")
+    args = parser.parse_args(argv)
+
+    previous = load_report(args.previous or args.output)
+    log = RenderLog()
+    returncode = run_quarto(["quarto", "render"], log)
+    if returncode:
+        print(f"quarto render failed with exit code {returncode}", file=sys.stderr)
+        return returncode
+
+    report = build_report(log)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    comparison = compare(previous, report, args.threshold) if previous else None
+    summary = report_markdown(report, comparison)
+    print()
+    print(summary)
+    if os.environ.get("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a", encoding="utf-8") as f:
+            f.write(summary)
+    if args.fail_on_regression and any(note == "regression" for *_, note in comparison or ()):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Serve responsive variants of post images in the rendered site.
+
+Runs as a Quarto post-render step. Reads the srcset manifest written by
+`scripts/convert_images.py`, copies each post's WebP/AVIF variants into
+`_site` (Quarto only copies resources a page references), and wraps every
+`<img>` that points at a post's main image in a `<picture>` element with
+per-format `<source srcset>` candidates. The original PNG stays as the
+fallback `src`, so social cards and old clients are unaffected. Rewritten
+images are marked `data-responsive`, which makes the step idempotent.
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+MANIFEST_FILE = Path(".image-manifest.json")
+SITE_DIR = Path("_site")
+TARGET_NAME = "main-image.png"
+
+# Listing thumbnails are rendered in a narrow column; everything else may
+# span the page.
+THUMBNAIL_SIZES = "(max-width: 576px) 100vw, 400px"
+DEFAULT_SIZES = "100vw"
+
+IMG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+# Attributes must follow whitespace, so data-src or max-width don't count
+SRC_RE = re.compile(r'\ssrc="([^"]+)"')
+WIDTH_RE = re.compile(r"\swidth\s*=", re.IGNORECASE)
+MARKER = "data-responsive"
+MARKER_RE = re.compile(rf"\s{MARKER}\b")
+MAIN_IMAGE_RE = re.compile(rf"(?:^|/)posts/([^/]+)/{re.escape(TARGET_NAME)}$")
+
+
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def copy_variants(manifest, site_dir=SITE_DIR):
+    """Copy variant files next to each post's rendered main image."""
+    copied = 0
+    for slug, entry in manifest.items():
+        dest_dir = site_dir / "posts" / slug
+        if not dest_dir.is_dir():
+            continue
+        for variant in entry.get("variants", []):
+            src = Path("posts") / slug / variant["file"]
+            dest = dest_dir / variant["file"]
+            if not src.exists():
+                continue
+            if dest.exists() and dest.stat().st_size == src.stat().st_size:
+                continue
+            shutil.copy2(src, dest)
+            copied += 1
+    return copied
+
+
+def picture_html(img_tag, src, entry):
+    """Wrap an `<img>` tag in a `<picture>` with srcset sources."""
+    prefix = src[: -len(TARGET_NAME)]
+    sizes = THUMBNAIL_SIZES if "thumbnail-image" in img_tag else DEFAULT_SIZES
+    sources = []
+    # Most compact format first: browsers take the first type they support
+    for mime in sorted(entry["srcset"], key=lambda m: m != "image/avif"):
+        candidates = ", ".join(
+            prefix + candidate.strip() for candidate in entry["srcset"][mime].split(",")
+        )
+        sources.append(f'<source type="{mime}" srcset="{candidates}" sizes="{sizes}">')
+    attrs = MARKER
+    if not WIDTH_RE.search(img_tag):
+        attrs += f' width="{entry["width"]}" height="{entry["height"]}"'
+    img_tag = img_tag.replace("<img", f"<img {attrs}", 1)
+    return "<picture>" + "".join(sources) + img_tag + "</picture>"
+
+
+def rewrite_html(text, manifest):
+    """Rewrite post main-image tags in one HTML document."""
+
+    def replace(match):
+        img_tag = match.group(0)
+        if MARKER_RE.search(img_tag):
+            return img_tag
+        src_match = SRC_RE.search(img_tag)
+        if not src_match:
+            return img_tag
+        slug_match = MAIN_IMAGE_RE.search(src_match.group(1))
+        if not slug_match:
+            return img_tag
+        entry = manifest.get(slug_match.group(1))
+        if not entry or not entry.get("srcset"):
+            return img_tag
+        return picture_html(img_tag, src_match.group(1), entry)
+
+    return IMG_RE.sub(replace, text)
+
+
+def output_html_files(site_dir=SITE_DIR):
+    """HTML files from this render, or every page on a full render."""
+    listed = os.environ.get("QUARTO_PROJECT_OUTPUT_FILES")
+    if listed:
+        files = [Path(p) for p in listed.splitlines() if p.endswith(".html")]
+        return [p for p in files if p.exists()]
+    return sorted(site_dir.rglob("*.html"))
+
+
+def main():
+    manifest = load_manifest()
+    if not manifest:
+        return 0
+
+    copied = copy_variants(manifest)
+    rewritten = 0
+    for path in output_html_files():
+        text = path.read_text(encoding="utf-8")
+        if TARGET_NAME not in text:
+            continue
+        updated = rewrite_html(text, manifest)
+        if updated != text:
+            path.write_text(updated, encoding="utf-8")
+            rewritten += 1
+
+    print(f"Responsive images: {copied} variant(s) copied, {rewritten} page(s) rewritten")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Sync papers.yaml with the author's papers on Semantic Scholar.
+
+The author's paper list is paged through with a handful of lightweight
+fields; only papers that aren't in papers.yaml yet are then fetched in full,
+in chunks, through the `/paper/batch` endpoint with a bounded number of
+requests in flight. API calls therefore scale with what changed, not with
+the size of the bibliography.
+
+API responses are cached under `.cache/semantic-scholar/`, keyed by the
+request (author, fields and page, or paper id and fields). A cached response
+younger than the TTL is used without touching the network; an older one is
+revalidated with a conditional request (ETag / Last-Modified). Rate limits
+(429) and server errors (5xx) are retried with exponential backoff, and if
+the API stays unreachable the last cached response is used instead.
+
+New entries land with `visible: false`; see `make papers`. Entries that look
+like duplicates of existing ones (see `paper_dedupe.py`) also get a
+`duplicate_of` key.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+from paper_dedupe import DuplicateFinder
+from papers_store import PapersStore
+
+# Semantic Scholar Author ID
+AUTHOR_ID = "90810256"
+YAML_FILE = "papers.yaml"
+
+API_URL = os.environ.get("SEMANTIC_SCHOLAR_API", "https://api.semanticscholar.org/graph/v1")
+API_KEY = os.environ.get("SEMANTIC_SCHOLAR_API_KEY")
+FIELDS = "paperId,title,authors,year,venue,publicationDate,externalIds,openAccessPdf,url"
+# Enough to spot new papers; the rest comes from the batch endpoint for new
+# papers only.
+LISTING_FIELDS = "paperId"
+
+PAGE_SIZE = 100
+BATCH_SIZE = 500  # the /paper/batch maximum
+MAX_IN_FLIGHT = 2
+
+CACHE_DIR = Path(".cache/semantic-scholar")
+STATE_FILE = CACHE_DIR / "state.json"
+CACHE_TTL = 24 * 60 * 60  # seconds
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds
+TIMEOUT = 30  # seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ResponseCache:
+    """JSON responses on disk, one file per request key."""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key, record):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, self._path(key))
+
+
+def cache_key(*parts):
+    """Stable cache key for a request, e.g. ("author", id, fields, offset)."""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def make_session():
+    session = requests.Session()
+    if API_KEY:
+        session.headers["x-api-key"] = API_KEY
+    return session
+
+
+def request_with_backoff(session, method, url, retries=MAX_RETRIES, **kwargs):
+    """Send a request, retrying 429/5xx and connection errors.
+
+    Waits for the server's Retry-After when given, otherwise
+    BACKOFF_BASE * 2**attempt with jitter.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    for attempt in range(retries + 1):
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            response = None
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return response
+        if attempt == retries:
+            return response
+        delay = BACKOFF_BASE * 2**attempt * (1 + random.random() / 2)
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            delay = max(delay, int(response.headers["Retry-After"]))
+        time.sleep(delay)
+
+
+def cached_get(session, url, params, key, cache, ttl=CACHE_TTL, refresh=False):
+    """GET a JSON resource through the response cache.
+
+    Returns the decoded body, or None if the request failed and nothing is
+    cached.
+    """
+    cached = cache.get(key)
+    now = time.time()
+    if cached and not refresh and now - cached["fetched_at"] < ttl:
+        return cached["body"]
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = request_with_backoff(session, "GET", url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            cached["fetched_at"] = now
+            cache.put(key, cached)
+            return cached["body"]
+        response.raise_for_status()
+        body = response.json()
+    except requests.RequestException as e:
+        print(f"Error fetching data from Semantic Scholar: {e}", file=sys.stderr)
+        if cached:
+            print("Using cached response instead", file=sys.stderr)
+            return cached["body"]
+        return None
+
+    cache.put(key, {
+        "url": url,
+        "params": params,
+        "fetched_at": now,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "body": body,
+    })
+    return body
+
+
+def iter_author_papers(author_id, fields=LISTING_FIELDS, page_size=PAGE_SIZE,
+                       session=None, cache=None, ttl=CACHE_TTL, refresh=False):
+    """Yield an author's papers, following the API's `next` offset.
+
+    Each page is cached separately. Raises RuntimeError if a page can't be
+    fetched and isn't cached, rather than silently truncating the list.
+    """
+    session = session or make_session()
+    cache = cache or ResponseCache()
+    url = f"{API_URL}/author/{author_id}/papers"
+    offset = 0
+    while offset is not None:
+        params = {"fields": fields, "offset": offset, "limit": page_size}
+        key = cache_key("author-papers", author_id, fields, offset, page_size)
+        body = cached_get(session, url, params, key, cache, ttl=ttl, refresh=refresh)
+        if body is None or "data" not in body:
+            raise RuntimeError(f"could not fetch papers at offset {offset}")
+        yield from body["data"]
+        offset = body.get("next")
+
+
+def _fetch_batch(session, ids, fields):
+    response = request_with_backoff(
+        session, "POST", f"{API_URL}/paper/batch", params={"fields": fields}, json={"ids": ids}
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_paper_details(paper_ids, fields=FIELDS, session=None, cache=None, ttl=CACHE_TTL,
+                        batch_size=BATCH_SIZE, max_in_flight=MAX_IN_FLIGHT):
+    """Full records for `paper_ids`, keyed by paperId, and the ids that failed.
+
+    Papers with a fresh cached record are not requested again; the rest go
+    to `/paper/batch` in chunks of `batch_size`, at most `max_in_flight`
+    chunks at a time. A chunk that fails doesn't stop the others; its ids
+    are returned in the failed list. Ids the API doesn't know are left out
+    of both.
+    """
+    session = session or make_session()
+    cache = cache or ResponseCache()
+    now = time.time()
+    details, missing = {}, []
+    for paper_id in dict.fromkeys(paper_ids):
+        cached = cache.get(cache_key("paper", paper_id, fields))
+        if cached and now - cached["fetched_at"] < ttl:
+            details[paper_id] = cached["body"]
+        else:
+            missing.append(paper_id)
+
+    chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        futures = {pool.submit(_fetch_batch, session, chunk, fields): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                papers = future.result()
+            except (requests.RequestException, ValueError) as e:
+                print(f"Error fetching {len(chunk)} paper(s) from Semantic Scholar: {e}", file=sys.stderr)
+                failed.extend(chunk)
+                continue
+            # The batch endpoint answers positionally, with null for unknown ids
+            for paper_id, paper in zip(chunk, papers):
+                if paper is None:
+                    continue
+                cache.put(cache_key("paper", paper_id, fields), {"fetched_at": now, "body": paper})
+                details[paper_id] = paper
+    return details, failed
+
+
+def create_yaml_entry_from_ss_paper(paper):
+    """Convert Semantic Scholar paper to YAML entry format"""
+    paper_id = paper.get('paperId')
+    title = paper.get('title', 'Untitled')
+    year = paper.get('year')
+    venue = paper.get('venue', '')
+
+    # Process authors
+    authors = []
+    for author in paper.get('authors', []):
+        author_name = author.get('name', '')
+        if 'Dimmery' in author_name:
+            authors.append("me")
+        else:
+            authors.append(author_name)
+
+    entry = {
+        'title': title,
+        'authors': authors,
+        'year': year,
+        'venue': venue if venue else None,
+        'visible': False,  # Default to not visible
+        'ssid': paper_id,
+    }
+
+    # Add external links if available
+    external_ids = paper.get('externalIds') or {}
+    if external_ids.get('DOI'):
+        entry['published_url'] = f"https://doi.org/{external_ids['DOI']}"
+
+    if external_ids.get('ArXiv'):
+        entry['preprint'] = f"https://arxiv.org/abs/{external_ids['ArXiv']}"
+
+    # Add open access PDF if available
+    open_access = paper.get('openAccessPdf')
+    if open_access and open_access.get('url'):
+        entry['pdf_url'] = open_access['url']
+
+    return entry
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def paper_key(paper):
+    """Base papers.yaml key for a paper: truncated title slug plus year."""
+    title_key = (paper.get('title') or '').lower().replace(' ', '_').replace(',', '').replace(':', '')[:20]
+    return f"{title_key}_{paper.get('year', 'unknown')}"
+
+
+def sync_with_semantic_scholar(refresh=False, ttl=CACHE_TTL):
+    """Sync YAML file with new papers from Semantic Scholar.
+
+    Only papers whose paperId isn't in papers.yaml yet are fetched in full,
+    however old they are: a paper can be indexed long after it was
+    published. Returns (number of papers added, ids whose details couldn't
+    be fetched), or None if the paper list couldn't be fetched. Failed ids
+    aren't added, so the next sync picks them up again.
+    """
+    store = PapersStore(YAML_FILE)
+
+    # Page through the author's papers to find ones we haven't seen
+    state = load_state()
+    if state.get("last_sync"):
+        print(f"Previous sync: {state['last_sync']}")
+
+    session = make_session()
+    cache = ResponseCache()
+    new_ids = {}  # ordered set
+    try:
+        for paper in iter_author_papers(AUTHOR_ID, session=session, cache=cache, ttl=ttl, refresh=refresh):
+            paper_id = paper.get('paperId')
+            if not paper_id or paper_id in store.by_ssid or paper_id in new_ids:
+                continue
+            new_ids[paper_id] = None
+    except RuntimeError as e:
+        print(f"Error listing papers: {e}", file=sys.stderr)
+        return None
+
+    # Only the new papers are fetched in full
+    details, failed = fetch_paper_details(list(new_ids), session=session, cache=cache, ttl=ttl)
+
+    # Preprint/published pairs get separate paperIds; flag those rather than
+    # treating them as new papers
+    finder = DuplicateFinder(store)
+    for paper_id in new_ids:
+        paper = details.get(paper_id)
+        if paper is None:
+            continue
+        entry = create_yaml_entry_from_ss_paper(paper)
+        duplicate = finder.find(entry)
+        if duplicate:
+            entry['duplicate_of'] = duplicate[0]
+        finder.add(store.add(paper_key(paper), entry), entry)
+
+    new_papers_count = len(store.added)
+    store.save()
+
+    # Only a complete sync counts as one
+    if not failed:
+        state["last_sync"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        save_state(state)
+    return new_papers_count, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync papers.yaml with Semantic Scholar.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="revalidate cached responses even if they are within the TTL")
+    parser.add_argument("--ttl", type=int, default=CACHE_TTL,
+                        help=f"cache lifetime in seconds (default: {CACHE_TTL})")
+    args = parser.parse_args(argv)
+
+    result = sync_with_semantic_scholar(refresh=args.refresh, ttl=args.ttl)
+    if result is None:
+        print("Failed to fetch papers from Semantic Scholar", file=sys.stderr)
+        return 1
+    added, failed = result
+    print(f"Added {added} new paper(s) to {YAML_FILE}")
+    if failed:
+        print(f"Could not fetch details for {len(failed)} paper(s): {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
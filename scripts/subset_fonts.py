@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Subset the self-hosted web fonts to the characters the site uses.
+
+Runs as a post-render step on full renders, before fingerprinting:
+
+1. Every page in `_site` is scanned once for the characters in its text.
+   Text inside <code>, <pre>, <kbd> and <samp> counts towards the code
+   families (`CODE_FAMILIES`), and the rest towards the text families.
+   `BASE_CHARACTERS` (ASCII, Latin-1 and common punctuation) is always kept
+   for text that scripts and CSS add at runtime.
+2. Each `@font-face` in `_site/fonts.css` gets a WOFF2 subset with those
+   characters, plus a second "rest" subset with everything else in the
+   font. Both are declared with a `unicode-range`, so a browser only
+   downloads the rest file on a page that needs one of those glyphs. No
+   character ever falls back to another font, even if a later partial
+   render adds text this step never saw.
+3. `fonts.css` is rewritten to point at the subsets, and the original
+   WOFF/WOFF2 files are removed from `_site`.
+
+Subsets are cached in `.cache/subset-fonts/` under a hash of the font and
+the character set. fontTools and brotli come with the `build` dependency
+group; without them fonts are served as they are.
+
+    python scripts/subset_fonts.py [--site _site] [--force] [--no-split] [--workers N]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+SITE_DIR = Path("_site")
+CACHE_DIR = Path(".cache/subset-fonts")
+FONTS_CSS = "fonts.css"
+
+# Families used only for code (Quarto's monofont)
+CODE_FAMILIES = {"Monaspace Argon"}
+CODE_TAGS = {"code", "pre", "kbd", "samp"}
+SKIP_TAGS = {"script", "style", "template", "svg", "math"}
+BASE_CHARACTERS = (
+    set(range(0x20, 0x7F)) | set(range(0xA0, 0x100))
+    | {0x2013, 0x2014, 0x2018, 0x2019, 0x201A, 0x201C, 0x201D, 0x201E,
+       0x2020, 0x2021, 0x2022, 0x2026, 0x2032, 0x2033, 0x20AC, 0x2122}
+)
+
+_FONT_FACE_RE = re.compile(r"@font-face\s*\{([^}]*)\}")
+_FAMILY_RE = re.compile(r"font-family:\s*[\"']?([^;\"']+)")
+_SRC_RE = re.compile(r"\s*src:[^;]*;?")
+_SUBSET_SUFFIXES = (".subset.woff2", ".rest.woff2")
+_SRC_URL_RE = re.compile(r"url\(\s*[\"']?([^\"')]+)[\"']?\s*\)\s*format\(\s*[\"']([^\"']+)[\"']\s*\)")
+
+
+def code_hash():
+    """Hash of this module, so changing the subsetting invalidates the cache."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+# -- scanning -----------------------------------------------------------
+
+
+class CharacterCollector(HTMLParser):
+    """Characters in a page's text, split into code and other text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text, self.code = set(), set()
+        self._skip = 0
+        self._code = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in CODE_TAGS:
+            self._code += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in CODE_TAGS:
+            self._code = max(self._code - 1, 0)
+
+    def handle_data(self, data):
+        if not self._skip:
+            (self.code if self._code else self.text).update(map(ord, data))
+
+
+def used_characters(pages):
+    """(text codepoints, code codepoints) across all pages."""
+    collector = CharacterCollector()
+    for page in pages:
+        collector.feed(page.read_text(encoding="utf-8", errors="ignore"))
+        collector.reset()
+    return collector.text | BASE_CHARACTERS, collector.code | BASE_CHARACTERS
+
+
+def font_faces(css, css_dir):
+    """(match, family, font to subset, all src paths) for each @font-face with a local font."""
+    faces = []
+    for match in _FONT_FACE_RE.finditer(css):
+        family = _FAMILY_RE.search(match.group(1))
+        sources = _SRC_URL_RE.findall(match.group(1))
+        if not family or not sources:
+            continue
+        # Subset the WOFF2 when there is one: it decompresses to the same font
+        url = next((url for url, fmt in sources if fmt.startswith("woff2")), sources[0][0])
+        path = css_dir / url
+        if path.is_file():
+            faces.append((match, family.group(1).strip(), path, [css_dir / u for u, _ in sources]))
+    return faces
+
+
+def unicode_range(codepoints):
+    """CSS unicode-range for a set of codepoints, e.g. `U+20-7E, U+A0`."""
+    ranges, start, prev = [], None, None
+    for cp in sorted(codepoints):
+        if start is None:
+            start = prev = cp
+        elif cp == prev + 1:
+            prev = cp
+        else:
+            ranges.append((start, prev))
+            start = prev = cp
+    if start is not None:
+        ranges.append((start, prev))
+    return ", ".join(f"U+{a:X}" if a == b else f"U+{a:X}-{b:X}" for a, b in ranges)
+
+
+# -- subsetting ---------------------------------------------------------
+
+
+def _load_fonttools():
+    try:
+        from fontTools import subset, ttLib
+        import brotli  # noqa: F401 - needed to write WOFF2
+    except ImportError:
+        return None
+    # It warns about every table it drops (e.g. FontForge's FFTM)
+    logging.getLogger("fontTools").setLevel(logging.ERROR)
+    return subset, ttLib
+
+
+def font_codepoints(path):
+    _, ttLib = _load_fonttools()
+    with ttLib.TTFont(path, lazy=True) as font:
+        return set(font.getBestCmap())
+
+
+def subset_font(args):
+    """Write a WOFF2 subset of `source` with `codepoints`; returns its size."""
+    source, codepoints, target, cache_dir, module_hash = args
+    key = hashlib.sha256(
+        module_hash.encode() + Path(source).read_bytes() + ",".join(map(str, sorted(codepoints))).encode()
+    ).hexdigest()
+    cached = Path(cache_dir) / f"{key}.woff2"
+    if not cached.exists():
+        subset, ttLib = _load_fonttools()
+        options = subset.Options()
+        options.flavor = "woff2"
+        options.layout_features = ["*"]  # keep kerning, ligatures and Monaspace's texture healing
+        options.name_IDs = ["*"]
+        with ttLib.TTFont(source) as font:
+            subsetter = subset.Subsetter(options)
+            subsetter.populate(unicodes=codepoints)
+            subsetter.subset(font)
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_name(f".{cached.name}.{os.getpid()}.tmp")
+            font.flavor = "woff2"
+            font.save(tmp)
+        os.replace(tmp, cached)
+    shutil.copyfile(cached, target)
+    return target.stat().st_size
+
+
+def _face_block(body, url, fmt, codepoints):
+    body = _SRC_RE.sub("", body).strip().strip(";")
+    return f'@font-face{{{body};src:url("{url}") format("{fmt}");unicode-range:{unicode_range(codepoints)}}}'
+
+
+def subset_site(site_dir=SITE_DIR, cache_dir=CACHE_DIR, split=True, workers=None):
+    css_path = Path(site_dir) / FONTS_CSS
+    if not css_path.is_file():
+        print(f"{css_path} not found (already fingerprinted?); fonts left as they are")
+        return
+    if _load_fonttools() is None:
+        print("fontTools/brotli are not installed; fonts left at full size", file=sys.stderr)
+        return
+
+    css = css_path.read_text(encoding="utf-8")
+    faces = [face for face in font_faces(css, css_path.parent) if not face[2].name.endswith(_SUBSET_SUFFIXES)]
+    if not faces:
+        print("Fonts are already subset")
+        return
+    text_chars, code_chars = used_characters(sorted(Path(site_dir).rglob("*.html")))
+
+    jobs, blocks, module_hash = [], [], code_hash()
+    for match, family, source, _ in faces:
+        available = font_codepoints(source)
+        used = available & (code_chars if family in CODE_FAMILIES else text_chars)
+        rest = available - used if split else set()
+        parts = [(used, source.with_name(f"{source.stem}.subset.woff2"))]
+        if rest:
+            parts.append((rest, source.with_name(f"{source.stem}.rest.woff2")))
+        jobs += [(source, codepoints, target, cache_dir, module_hash) for codepoints, target in parts]
+        fmt = "woff2-variations" if "variations" in match.group(1) else "woff2"
+        blocks.append([
+            _face_block(match.group(1), target.relative_to(css_path.parent).as_posix(), fmt, codepoints)
+            for codepoints, target in parts
+        ])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        sizes = list(pool.map(subset_font, jobs))
+    subset_bytes = sum(size for (*_, target, _, _), size in zip(jobs, sizes) if target.name.endswith(".subset.woff2"))
+    rest_bytes = sum(sizes) - subset_bytes
+
+    # Replace from the end so earlier match offsets stay valid
+    for (match, _, _, _), new_blocks in reversed(list(zip(faces, blocks))):
+        css = css[:match.start()] + "".join(new_blocks) + css[match.end():]
+    css_path.write_text(css, encoding="utf-8")
+
+    original_bytes = sum(source.stat().st_size for _, _, source, _ in faces)
+    for path in {path for *_, sources in faces for path in sources if path.is_file()}:
+        path.unlink()
+    print(f"Subset {len(faces)} font face(s) to {len(text_chars)} text and {len(code_chars)} code "
+          f"character(s): {original_bytes / 1024:.0f} KiB of WOFF2 became {subset_bytes / 1024:.0f} KiB"
+          + (f", plus {rest_bytes / 1024:.0f} KiB of rarely needed glyphs" if split else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Subset the site's web fonts to the characters it uses.")
+    parser.add_argument("--site", type=Path, default=SITE_DIR, help="rendered site directory")
+    parser.add_argument("--force", action="store_true", help="run even on partial renders")
+    parser.add_argument("--no-split", dest="split", action="store_false",
+                        help="don't emit the unicode-range subsets of unused glyphs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    # Partial renders only have some pages' text to go on
+    if not args.force and not os.environ.get("QUARTO_PROJECT_RENDER_ALL"):
+        return 0
+    if not args.site.is_dir():
+        print(f"{args.site} not found", file=sys.stderr)
+        return 1
+    subset_site(args.site, split=args.split, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
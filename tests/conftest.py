@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The scripts import each other as top-level modules, as when run directly;
+# the listmonk package is imported as scripts.listmonk
+sys.path[0:0] = [str(ROOT / "scripts"), str(ROOT)]
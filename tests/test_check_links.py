@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import check_links
+
+RESPONSES = {
+    "https://example.org/gone": 404,
+    "https://example.org/no-head": {"HEAD": 405, "GET": 200},
+    "https://example.org/members": 403,
+    "https://www.linkedin.com/in/someone": 999,
+}
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Run check_links.main against the stub server; returns (exit code, cache)."""
+
+    monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+
+    def run(urls, responses=RESPONSES):
+        monkeypatch.setattr(check_links, "collect_links", lambda: {url: ["test"] for url in urls})
+        stub_file = tmp_path / "stub.json"
+        stub_file.write_text(json.dumps(responses), encoding="utf-8")
+        cache_file = tmp_path / "links.json"
+        code = check_links.main(["--stub", str(stub_file), "--stub-latency", "0", "--cache", str(cache_file)])
+        return code, json.loads(cache_file.read_text(encoding="utf-8"))["links"]
+
+    return run
+
+
+def test_statuses_are_classified(run):
+    code, cache = run(["https://example.org/", *RESPONSES])
+
+    assert code == 1  # /gone is broken
+    outcomes = {url: check_links.outcome(entry) for url, entry in cache.items()}
+    assert outcomes == {
+        "https://example.org/": "ok",
+        "https://example.org/gone": "broken",
+        "https://example.org/no-head": "ok",
+        "https://example.org/members": "blocked",
+        "https://www.linkedin.com/in/someone": "blocked",
+    }
+
+
+def test_head_rejections_fall_back_to_get(run):
+    _, cache = run(["https://example.org/", *RESPONSES])
+
+    methods = {url: entry["method"] for url, entry in cache.items()}
+    assert methods["https://example.org/"] == "HEAD"
+    assert methods["https://example.org/no-head"] == "GET"
+    assert methods["https://example.org/gone"] == "GET"
+    assert methods["https://example.org/members"] == "GET"
+    # 999 isn't a HEAD problem, so there's no second request
+    assert methods["https://www.linkedin.com/in/someone"] == "HEAD"
+    assert cache["https://example.org/no-head"]["status"] == 200
+
+
+def test_blocked_links_do_not_fail_the_run(run):
+    code, _ = run(["https://example.org/members", "https://www.linkedin.com/in/someone"])
+
+    assert code == 0
+
+
+def test_fresh_results_come_from_the_cache(run, capsys):
+    run(["https://example.org/"])
+    capsys.readouterr()
+    run(["https://example.org/"])
+
+    assert "Checked 0 of 1 link(s)" in capsys.readouterr().out
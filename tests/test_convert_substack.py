@@ -0,0 +1,132 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from convert_substack import ImageFetcher
+
+IMAGE = bytes(range(256)) * 64  # 16 KiB
+ETAG = '"v1"'
+
+
+class ImageServer:
+    """Serves IMAGE at /image.png with an ETag, honouring Range and If-Range.
+
+    With `honor_range` off it always answers 200 with the whole image.
+    Request headers are recorded in `requests`.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.honor_range = True
+        self.body, self.etag = IMAGE, ETAG
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                body, status = server.body, 200
+                range_header = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if server.honor_range and range_header and if_range in (None, server.etag):
+                    start = int(range_header.removeprefix("bytes=").rstrip("-"))
+                    body, status = body[start:], 206
+                self.send_response(status)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/image.png"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def server():
+    with ImageServer() as server:
+        yield server
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = ImageFetcher(tmp_path / "cache", workers=2)
+    yield fetcher
+    fetcher.close()
+
+
+def interrupted(fetcher, url, data, validator=ETAG):
+    """Leave a partial download behind, as an interrupted run would."""
+    partial = fetcher.partial_path(url)
+    partial.write_bytes(data)
+    if validator:
+        partial.with_name(partial.name + ".validator").write_text(validator, encoding="utf-8")
+
+
+def test_download(server, fetcher, tmp_path):
+    fetcher.fetch(server.url, tmp_path / "image_1.png")
+
+    assert (tmp_path / "image_1.png").read_bytes() == IMAGE
+    assert "Range" not in server.requests[0]
+    assert list(fetcher.partial_dir.iterdir()) == []
+
+
+def test_resumed_download(server, fetcher, tmp_path):
+    interrupted(fetcher, server.url, IMAGE[:5000])
+
+    fetcher.fetch(server.url, tmp_path / "image_1.png")
+
+    assert (tmp_path / "image_1.png").read_bytes() == IMAGE
+    assert server.requests[0]["Range"] == "bytes=5000-"
+    assert server.requests[0]["If-Range"] == ETAG
+
+
+def test_server_ignoring_range_restarts_download(server, fetcher, tmp_path):
+    server.honor_range = False
+    interrupted(fetcher, server.url, IMAGE[:5000])
+
+    fetcher.fetch(server.url, tmp_path / "image_1.png")
+
+    assert (tmp_path / "image_1.png").read_bytes() == IMAGE
+
+
+def test_changed_image_is_not_spliced(server, fetcher, tmp_path):
+    interrupted(fetcher, server.url, b"old bytes" * 100)
+    server.body, server.etag = IMAGE[::-1], '"v2"'
+
+    fetcher.fetch(server.url, tmp_path / "image_1.png")
+
+    assert (tmp_path / "image_1.png").read_bytes() == IMAGE[::-1]
+
+
+def test_partial_without_validator_is_discarded(server, fetcher, tmp_path):
+    interrupted(fetcher, server.url, b"stale" * 100, validator=None)
+
+    fetcher.fetch(server.url, tmp_path / "image_1.png")
+
+    assert "Range" not in server.requests[0]
+    assert (tmp_path / "image_1.png").read_bytes() == IMAGE
+
+
+def test_cache_hit_makes_no_request(server, tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = ImageFetcher(cache_dir)
+    first.fetch(server.url, tmp_path / "a.png")
+    first.close()
+
+    second = ImageFetcher(cache_dir)
+    second.fetch(server.url, tmp_path / "b.png")
+    second.close()
+
+    assert len(server.requests) == 1
+    assert (tmp_path / "b.png").read_bytes() == IMAGE
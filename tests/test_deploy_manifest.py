@@ -0,0 +1,38 @@
+from deploy_manifest import build_manifest, diff_manifests
+
+
+def write_site(tmp_path, page="<p>Hello</p>", headers="[[headers]]\n"):
+    (tmp_path / "_site").mkdir(exist_ok=True)
+    (tmp_path / "_site/index.html").write_text(page, encoding="utf-8")
+    (tmp_path / "netlify.toml").write_text(headers, encoding="utf-8")
+    return build_manifest(tmp_path / "_site", config=[str(tmp_path / "netlify.toml")])
+
+
+def test_unchanged_site_has_nothing_to_deploy(tmp_path):
+    previous = write_site(tmp_path)
+    diff = diff_manifests(previous, write_site(tmp_path))
+
+    assert (diff["changed"], diff["deleted"], diff["config_changed"]) == ([], [], [])
+
+
+def test_page_change_is_listed(tmp_path):
+    previous = write_site(tmp_path)
+    diff = diff_manifests(previous, write_site(tmp_path, page="<p>Hi</p>"))
+
+    assert diff["changed"] == ["index.html"]
+    assert diff["config_changed"] == []
+
+
+def test_netlify_toml_change_is_detected(tmp_path):
+    previous = write_site(tmp_path)
+    diff = diff_manifests(previous, write_site(tmp_path, headers="[[redirects]]\n"))
+
+    assert diff["changed"] == []
+    assert diff["config_changed"] == [str(tmp_path / "netlify.toml")]
+
+
+def test_manifest_without_config_counts_as_changed_config(tmp_path):
+    current = write_site(tmp_path)
+    diff = diff_manifests({"files": current["files"]}, current)
+
+    assert diff["config_changed"] == [str(tmp_path / "netlify.toml")]
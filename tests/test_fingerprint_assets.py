@@ -0,0 +1,54 @@
+from fingerprint_assets import fingerprint_site
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def page(css):
+    return f'<html><head><link href="{css}" rel="stylesheet"></head></html>'
+
+
+def assets(site):
+    return sorted(p.name for p in (site / "assets").iterdir())
+
+
+def test_incremental_render_removes_stale_assets(tmp_path):
+    site = tmp_path / "_site"
+    write(site / "site_libs/theme/font.woff2", "font v1")
+    write(site / "site_libs/theme/theme.css", "@font-face{src:url(font.woff2)}")
+    write(site / "site_libs/post/post.css", "p{color:red}")
+    write(site / "index.html", page("site_libs/theme/theme.css"))
+    write(site / "post.html", page("site_libs/post/post.css"))
+    fingerprint_site(site)
+    first = assets(site)
+    assert len(first) == 3
+
+    # Re-render only post.html with a changed stylesheet; index.html keeps
+    # pointing at the theme (and, through it, the font) from the last run
+    write(site / "site_libs/post/post.css", "p{color:blue}")
+    write(site / "post.html", page("site_libs/post/post.css"))
+    fingerprint_site(site)
+
+    second = assets(site)
+    assert len(second) == 3
+    stale = [name for name in first if name.startswith("post.")]
+    assert stale and stale[0] not in second
+    assert [name for name in first if not name.startswith("post.")] == [
+        name for name in second if not name.startswith("post.")
+    ]
+
+
+def test_assets_of_deleted_pages_are_removed(tmp_path):
+    site = tmp_path / "_site"
+    write(site / "site_libs/a/a.js", "a()")
+    write(site / "site_libs/b/b.js", "b()")
+    write(site / "a.html", '<script src="site_libs/a/a.js"></script>')
+    write(site / "b.html", '<script src="site_libs/b/b.js"></script>')
+    fingerprint_site(site)
+    assert len(assets(site)) == 2
+
+    (site / "b.html").unlink()
+    fingerprint_site(site)
+    assert [name.split(".")[0] for name in assets(site)] == ["a"]
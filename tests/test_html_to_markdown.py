@@ -0,0 +1,77 @@
+import time
+
+from html_to_markdown import html_to_markdown
+
+
+def footnote_anchor(n):
+    """A footnote reference as Substack exports it."""
+    return (f'<a class="footnote-anchor" data-component-name="FootnoteAnchorToDOM" id="footnote-anchor-{n}" '
+            f'href="#footnote-{n}" target="_self">{n}</a>')
+
+
+def footnote(n, content):
+    """A footnote as Substack exports it, at the end of the post."""
+    return (f'<div class="footnote" data-component-name="FootnoteToDOM"><a id="footnote-{n}" '
+            f'href="#footnote-anchor-{n}" class="footnote-number" contenteditable="false" '
+            f'target="_self">{n}</a><div class="footnote-content">{content}</div></div>')
+
+
+def test_nested_ordered_list_is_indented_to_its_parent_content():
+    html = "<ol><li>a</li><li>b<ol><li>c</li></ol></li></ol>"
+    assert html_to_markdown(html) == "1. a\n1. b\n   1. c"
+
+
+def test_mixed_nested_lists():
+    html = "<ol><li>a<ul><li>x<ul><li>y</li></ul></li></ul></li><li>b</li></ol><p>After</p>"
+    assert html_to_markdown(html) == "1. a\n   - x\n     - y\n1. b\n\nAfter"
+
+
+def test_list_items_with_paragraphs():
+    html = "<ul><li><p>One</p></li><li><p>Two <strong>bold</strong></p></li></ul>"
+    assert html_to_markdown(html) == "- One\n- Two **bold**"
+
+
+def test_multi_paragraph_blockquote():
+    html = "<blockquote><p>One</p><p>Two <em>three</em></p></blockquote><p>After</p>"
+    assert html_to_markdown(html) == "> One\n>\n> Two *three*\n\nAfter"
+
+
+def test_footnote_reference_is_inlined():
+    html = f"<p>Claim{footnote_anchor(1)} here.</p>{footnote(1, '<p>Source.</p>')}"
+    assert html_to_markdown(html) == "Claim^[Source.] here."
+
+
+def test_footnote_containing_a_list():
+    html = f"<p>Claim{footnote_anchor(1)}.</p>" + footnote(
+        1, "<ul><li><p>Point one</p></li><li><p>Point two</p></li></ul>")
+    assert html_to_markdown(html) == "Claim^[- Point one - Point two]."
+
+
+def test_captioned_image():
+    html = (
+        '<div class="captioned-image-container"><figure><a class="image-link" href="https://cdn.test/x.png">'
+        '<picture><source srcset="https://cdn.test/x.webp"><img src="https://cdn.test/x.png"></picture></a>'
+        '<figcaption class="image-caption">A caption</figcaption></figure></div><p>Next</p>'
+    )
+    assert html_to_markdown(html, image_src=lambda url: "image_1.png") == \
+        "![Image](image_1.png)\n\n*A caption*\n\nNext"
+
+
+def test_line_break():
+    assert html_to_markdown("<p>line one<br>line two</p>") == "line one\nline two"
+
+
+def test_footnotes_holding_lists_convert_in_linear_time():
+    # The old regex converter backtracked across the rest of the document
+    # for each of these footnotes
+    n = 2000
+    body = "".join(f"<p>Paragraph {i}{footnote_anchor(i)}</p>" for i in range(1, n + 1))
+    notes = "".join(footnote(i, f"<ul><li>Point {i}</li><li>Another point</li></ul>") for i in range(1, n + 1))
+
+    start = time.perf_counter()
+    markdown = html_to_markdown(body + notes)
+    elapsed = time.perf_counter() - start
+
+    assert markdown.count("^[- Point") == n
+    assert f"Paragraph {n}^[- Point {n} - Another point]" in markdown
+    assert elapsed < 5
@@ -0,0 +1,203 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.util.retry import Retry
+
+from scripts.listmonk import ListmonkClient, ListmonkError, publish_batch, publish_post
+from scripts.listmonk import publish
+from scripts.listmonk.batch import idempotency_key
+
+
+class StubListmonk:
+    """A local HTTP server answering like the Listmonk API.
+
+    `failures` maps (method, path) to a list of statuses returned, in order,
+    before the normal response. `campaigns` are listed by GET /api/campaigns.
+    Every request is recorded in `requests`.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.failures = {}
+        self.campaigns = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                stub.requests.append((self.command, self.path, body))
+                pending = stub.failures.get((self.command, self.path))
+                if pending:
+                    status, data = pending.pop(0), {"message": "unavailable"}
+                else:
+                    status, data = 200, {"data": stub.answer(self.command, self.path, body)}
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def answer(self, method, path, body):
+        if (method, path) == ("POST", "/api/campaigns"):
+            return {"id": 7, "status": "draft", **body}
+        if method == "GET" and path.startswith("/api/campaigns?"):
+            return {"results": self.campaigns, "total": len(self.campaigns)}
+        if method == "PUT" and path.rstrip("0123456789") == "/api/campaigns/":
+            return {"id": int(path.rsplit("/", 1)[1]), "status": "draft", **body}
+        return True
+
+    def calls(self):
+        return [(method, path) for method, path, _ in self.requests]
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(Retry, "get_backoff_time", lambda self: 0)
+
+
+@pytest.fixture
+def listmonk():
+    with StubListmonk() as stub:
+        yield stub
+
+
+@pytest.fixture
+def client(listmonk):
+    with ListmonkClient(listmonk.url, "api", "secret", timeout=5) as client:
+        yield client
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A rendered post, as publish_post expects to find it."""
+    (tmp_path / "posts/hello").mkdir(parents=True)
+    (tmp_path / "posts/hello/index.qmd").write_text(
+        '---\ntitle: "Hello"\ndescription: "A first post"\ndate: "2025-01-01"\n---\n\nBody\n', encoding="utf-8")
+    (tmp_path / "_site/posts/hello").mkdir(parents=True)
+    (tmp_path / "_site/posts/hello/index.html").write_text(
+        '<html><body><main id="quarto-document-content"><p>Body</p></main></body></html>', encoding="utf-8")
+    return {"posts_dir": str(tmp_path / "posts"), "site_dir": str(tmp_path / "_site"),
+            "optimize_images": False}
+
+
+def test_publish_creates_and_starts_campaign(listmonk, client, site):
+    result = publish_post(client, "hello", [3], **site)
+
+    assert listmonk.calls() == [("POST", "/api/campaigns"), ("PUT", "/api/campaigns/7/status")]
+    _, _, payload = listmonk.requests[0]
+    assert payload["subject"] == "Hello"
+    assert payload["lists"] == [3]
+    assert payload["altbody"] == "A first post"
+    assert "send_at" not in payload
+    assert listmonk.requests[1][2] == {"status": "running"}
+    assert result["campaign_id"] == 7
+    assert result["status"] == "running"
+
+
+def test_publish_schedules_campaign(listmonk, client, site, monkeypatch):
+    monkeypatch.setattr(publish, "parse_send_time", lambda send_at, timezone: "2025-06-02T07:00:00Z")
+
+    result = publish_post(client, "hello", [3], send_at="Monday 9am", test_emails=["me@example.com"], **site)
+
+    assert listmonk.calls() == [
+        ("POST", "/api/campaigns"),
+        ("POST", "/api/campaigns/7/test"),
+        ("PUT", "/api/campaigns/7/status"),
+    ]
+    assert listmonk.requests[0][2]["send_at"] == "2025-06-02T07:00:00Z"
+    assert listmonk.requests[1][2] == {"subscribers": ["me@example.com"]}
+    assert listmonk.requests[2][2] == {"status": "scheduled"}
+    assert result["status"] == "scheduled"
+
+
+def test_status_change_is_retried_on_5xx(listmonk, client):
+    listmonk.failures[("PUT", "/api/campaigns/7/status")] = [503, 502]
+
+    assert client.set_status(7, "running") is True
+    assert listmonk.calls() == [("PUT", "/api/campaigns/7/status")] * 3
+
+
+def test_campaign_creation_is_not_retried_on_5xx(listmonk, client):
+    listmonk.failures[("POST", "/api/campaigns")] = [503]
+
+    with pytest.raises(ListmonkError, match="HTTP 503"):
+        client.create_campaign({"name": "x"})
+    # A retried POST could create the campaign twice
+    assert listmonk.calls() == [("POST", "/api/campaigns")]
+
+
+def test_retries_give_up_with_an_error(listmonk, client):
+    listmonk.failures[("GET", "/api/campaigns?page=1&per_page=100")] = [500] * 10
+
+    with pytest.raises(ListmonkError):
+        list(client.iter_campaigns())
+
+
+def draft(campaign_id, send_at, status="draft"):
+    return {"id": campaign_id, "status": status, "send_at": send_at,
+            "tags": [idempotency_key("hello", [3])], "body": "<p>Old body</p>"}
+
+
+def writes(listmonk):
+    return [(method, path) for method, path in listmonk.calls() if method != "GET"]
+
+
+def test_batch_resumes_draft_with_this_runs_schedule(listmonk, client, site):
+    listmonk.campaigns = [draft(5, "2025-01-01T09:00:00Z")]
+
+    [row] = publish_batch(client, ["hello"], [3], send_at_iso="2025-06-02T07:00:00Z", workers=1, **site)
+
+    assert writes(listmonk) == [("PUT", "/api/campaigns/5"), ("PUT", "/api/campaigns/5/status")]
+    update = listmonk.requests[1][2]
+    assert update["send_at"] == "2025-06-02T07:00:00Z"
+    assert "Old body" not in update["body"]
+    assert listmonk.requests[2][2] == {"status": "scheduled"}
+    assert (row["outcome"], row["campaign_id"], row["send_at"]) == ("resumed", 5, "2025-06-02T07:00:00Z")
+
+
+def test_batch_resumed_draft_sent_now_loses_its_old_schedule(listmonk, client, site):
+    listmonk.campaigns = [draft(5, "2025-01-01T09:00:00Z")]
+
+    [row] = publish_batch(client, ["hello"], [3], workers=1, **site)
+
+    assert listmonk.requests[1][2]["send_at"] is None
+    assert listmonk.requests[2][2] == {"status": "running"}
+    assert row["status"] == "running"
+
+
+def test_batch_skips_scheduled_campaign(listmonk, client, site):
+    listmonk.campaigns = [draft(5, "2025-01-01T09:00:00Z", status="scheduled")]
+
+    [row] = publish_batch(client, ["hello"], [3], workers=1, **site)
+
+    assert writes(listmonk) == []
+    assert (row["outcome"], row["campaign_id"]) == ("exists", 5)
+
+
+def test_batch_ignores_cancelled_campaign(listmonk, client, site):
+    listmonk.campaigns = [draft(5, None, status="cancelled")]
+
+    [row] = publish_batch(client, ["hello"], [3], workers=1, **site)
+
+    assert writes(listmonk) == [("POST", "/api/campaigns"), ("PUT", "/api/campaigns/7/status")]
+    assert (row["outcome"], row["campaign_id"]) == ("created", 7)
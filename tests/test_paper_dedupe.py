@@ -0,0 +1,39 @@
+import random
+
+from paper_dedupe import TitleIndex, normalize_title, trigrams
+
+WORDS = "causal inference under interference the of a for in and with networks experiments design".split()
+
+
+def brute_force(index, title, threshold):
+    grams = trigrams(normalize_title(title))
+    best = None
+    for key, other in index.grams.items():
+        score = len(grams & other) / len(grams | other)
+        if score >= threshold and (best is None or score > best[1]):
+            best = (key, score)
+    return best
+
+
+def test_prefix_filter_finds_every_match():
+    rng = random.Random(0)
+    titles = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 10))) for _ in range(500)]
+    index = TitleIndex()
+    for i, title in enumerate(titles):
+        index.add(i, title)
+
+    for title in titles[:30]:
+        for query in (title, title + "s", title[1:], title.upper() + "!"):
+            for threshold in (0.5, 0.85, 1.0):
+                expected = brute_force(index, query, threshold)
+                found = index.best_match(query, threshold)
+                assert (found and found[1]) == (expected and expected[1])
+
+
+def test_punctuation_and_case_are_ignored():
+    index = TitleIndex()
+    index.add("a", "Design-Based Inference for Network Experiments")
+    index.add("b", "Something else entirely")
+
+    assert index.best_match("design based inference for network experiments")[0] == "a"
+    assert index.best_match("A completely different title") is None
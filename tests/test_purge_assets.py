@@ -0,0 +1,30 @@
+from purge_assets import minify_css, purge_css
+
+
+def test_license_comment_adds_no_separator():
+    css = "/*! Bootstrap Icons */\n@font-face {\n  font-family: \"bootstrap-icons\";\n}\n"
+    assert minify_css(css) == '/*! Bootstrap Icons */@font-face{font-family:"bootstrap-icons"}'
+
+
+def test_declaration_colons_are_trimmed_on_both_sides():
+    assert minify_css("a { color :red ; margin : 0 }") == "a{color:red;margin:0}"
+
+
+def test_selector_whitespace_is_significant():
+    assert minify_css("div :first-child { margin: 0 }") == "div :first-child{margin:0}"
+    assert minify_css("a /*! x */ b { margin: 0 }") == "a/*! x */ b{margin:0}"
+
+
+def test_comments_and_strings():
+    assert minify_css("a { margin: 0/* gap */auto }") == "a{margin:0 auto}"
+    assert minify_css('a { content: "x : y" ; }') == 'a{content:"x : y"}'
+
+
+def test_already_minified_css_is_returned_unchanged():
+    css = "a{color:red}"
+    assert minify_css(css) is css
+
+
+def test_purge_drops_unused_rules():
+    css = ".used{color:red}.unused{color:blue}@media (min-width:1px){.unused{x:y}}"
+    assert minify_css(purge_css(css, {"used"})) == ".used{color:red}"
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+import requests
+
+import semantic_scholar
+from semantic_scholar import ResponseCache, fetch_paper_details, iter_author_papers
+
+
+def make_response(status, body=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode() if body is not None else b""
+    return response
+
+
+class StubSession:
+    """Answers Semantic Scholar requests from canned handlers, recording each call."""
+
+    def __init__(self, pages=None, papers=None, failing_ids=()):
+        self.pages = pages or []
+        self.papers = papers or {}
+        self.failing_ids = set(failing_ids)
+        self.calls = []
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        self.calls.append((method, url, dict(params or {}), json))
+        if url.endswith("/papers"):
+            offset = params["offset"]
+            index = offset // params["limit"]
+            body = {"offset": offset, "data": self.pages[index]}
+            if index + 1 < len(self.pages):
+                body["next"] = offset + params["limit"]
+            return make_response(200, body)
+        if url.endswith("/paper/batch"):
+            if self.failing_ids & set(json["ids"]):
+                return make_response(500)
+            return make_response(200, [self.papers.get(paper_id) for paper_id in json["ids"]])
+        return make_response(404)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(semantic_scholar.time, "sleep", lambda seconds: None)
+
+
+def test_listing_follows_next_offsets(tmp_path):
+    pages = [[{"paperId": f"p{page}-{i}"} for i in range(2)] for page in range(3)]
+    session = StubSession(pages=pages)
+
+    papers = list(iter_author_papers("author", page_size=2, session=session, cache=ResponseCache(tmp_path)))
+
+    assert [p["paperId"] for p in papers] == ["p0-0", "p0-1", "p1-0", "p1-1", "p2-0", "p2-1"]
+    assert [call[2]["offset"] for call in session.calls] == [0, 2, 4]
+
+
+def test_listing_pages_are_cached(tmp_path):
+    pages = [[{"paperId": "a"}], [{"paperId": "b"}]]
+    cache = ResponseCache(tmp_path)
+    list(iter_author_papers("author", page_size=1, session=StubSession(pages=pages), cache=cache))
+
+    session = StubSession(pages=pages)
+    papers = list(iter_author_papers("author", page_size=1, session=session, cache=cache))
+
+    assert [p["paperId"] for p in papers] == ["a", "b"]
+    assert session.calls == []
+
+
+def test_details_are_fetched_in_chunks(tmp_path):
+    ids = [f"p{i}" for i in range(5)]
+    session = StubSession(papers={paper_id: {"paperId": paper_id} for paper_id in ids[:4]})
+
+    details, failed = fetch_paper_details(ids, session=session, cache=ResponseCache(tmp_path), batch_size=2)
+
+    assert sorted(details) == ids[:4]  # p4 is unknown to the API
+    assert failed == []
+    assert sorted(call[3]["ids"] for call in session.calls) == [["p0", "p1"], ["p2", "p3"], ["p4"]]
+
+
+def test_failing_chunk_does_not_drop_the_others(tmp_path):
+    ids = [f"p{i}" for i in range(6)]
+    session = StubSession(papers={paper_id: {"paperId": paper_id} for paper_id in ids}, failing_ids={"p2"})
+
+    details, failed = fetch_paper_details(ids, session=session, cache=ResponseCache(tmp_path), batch_size=2)
+
+    assert sorted(details) == ["p0", "p1", "p4", "p5"]
+    assert sorted(failed) == ["p2", "p3"]
+
+
+def sync(tmp_path, monkeypatch, session):
+    """Run a full sync in `tmp_path`, which holds papers.yaml and the cache."""
+    monkeypatch.chdir(tmp_path)
+    if not (tmp_path / "papers.yaml").exists():
+        (tmp_path / "papers.yaml").write_text("{}\n", encoding="utf-8")
+    monkeypatch.setattr(semantic_scholar, "make_session", lambda: session)
+    return semantic_scholar.sync_with_semantic_scholar()
+
+
+def test_sync_records_last_sync(tmp_path, monkeypatch):
+    session = StubSession(
+        pages=[[{"paperId": "new"}]],
+        papers={"new": {"paperId": "new", "title": "New paper", "year": 2025, "authors": []}},
+    )
+
+    assert sync(tmp_path, monkeypatch, session) == (1, [])
+    assert "last_sync" in semantic_scholar.load_state()
+    assert "ssid: new" in (tmp_path / "papers.yaml").read_text(encoding="utf-8")
+
+
+def test_failed_sync_keeps_last_sync(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    semantic_scholar.save_state({"last_sync": "2025-01-01T00:00:00+00:00"})
+    session = StubSession(pages=[[{"paperId": "bad"}]], failing_ids={"bad"})
+
+    assert sync(tmp_path, monkeypatch, session) == (0, ["bad"])
+    assert semantic_scholar.load_state()["last_sync"] == "2025-01-01T00:00:00+00:00"